@@ -0,0 +1,94 @@
+"""
+답변 서비스(answer_service.py) HTTP 클라이언트
+
+Streamlit UI가 답변 생성을 별도 서비스에 맡길 때 사용한다.
+연결 재사용을 위해 프로세스당 하나의 httpx.Client를 공유한다.
+"""
+import json
+import threading
+
+import httpx
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(timeout=httpx.Timeout(120.0, connect=5.0))
+        return _client
+
+
+class AnswerServiceError(Exception):
+    """답변 서비스가 스트림 중에 보낸 오류 (메시지는 사용자에게 그대로 표시할 수 있음)"""
+
+
+def _answer_payload(question, chat_history, regulations, follow_up):
+    payload = {"question": question, "chat_history": [list(turn) for turn in chat_history]}
+    if regulations is not None:
+        payload["regulations"] = list(regulations)
+    if follow_up:
+        payload["follow_up"] = True
+    return payload
+
+
+def request_answer(base_url, question, chat_history=(), regulations=None, follow_up=False):
+    """JSON 엔드포인트로 답변을 요청하여 결과 딕셔너리를 반환"""
+    response = get_client().post(
+        f"{base_url.rstrip('/')}/v1/answer",
+        json=_answer_payload(question, chat_history, regulations, follow_up),
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def request_chunks(base_url, chunk_ids):
+    """청크 ID 목록의 본문/메타데이터를 조회"""
+    if not chunk_ids:
+        return []
+    response = get_client().post(f"{base_url.rstrip('/')}/v1/chunks", json={"ids": list(chunk_ids)})
+    response.raise_for_status()
+    return response.json()["chunks"]
+
+
+def request_regulations(base_url):
+    """필터로 선택할 수 있는 규정명 목록을 조회"""
+    response = get_client().get(f"{base_url.rstrip('/')}/v1/regulations")
+    response.raise_for_status()
+    return response.json()["regulations"]
+
+
+def request_telemetry(base_url):
+    """답변 서비스의 모델별 통계를 조회"""
+    response = get_client().get(f"{base_url.rstrip('/')}/v1/telemetry")
+    response.raise_for_status()
+    return response.json()["models"]
+
+
+def stream_answer(base_url, question, chat_history=(), regulations=None, follow_up=False):
+    """
+    SSE 엔드포인트로 답변을 요청하여 (이벤트명, 데이터)를 순서대로 반환.
+    서비스가 error 이벤트를 보내거나 done 이벤트 없이 스트림이 끝나면 AnswerServiceError를 발생시킨다.
+    """
+    with get_client().stream(
+        "POST",
+        f"{base_url.rstrip('/')}/v1/answer/stream",
+        json=_answer_payload(question, chat_history, regulations, follow_up),
+    ) as response:
+        response.raise_for_status()
+        event = "message"
+        for line in response.iter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):].strip())
+                if event == "error":
+                    raise AnswerServiceError(data.get("detail", "답변 서비스 오류"))
+                yield event, data
+                if event == "done":
+                    return
+            elif not line:
+                event = "message"
+    raise AnswerServiceError("답변 스트림이 완료되지 않고 끊어졌습니다.")
@@ -0,0 +1,154 @@
+"""
+답변 경로(condense → retrieve → generate) HTTP 서비스
+
+Streamlit UI와 분리된 ASGI 앱으로, UI 서버와 추론 서버를 따로 확장할 수 있다.
+각 워커는 같은 벡터DB 디렉토리를 읽기 전용으로 열며 인덱스를 생성/수정하지 않는다.
+활성 인덱스 버전이 바뀌면 재시작 없이 새 버전을 백그라운드에서 로드하여 교체한다.
+
+실행 예:
+    uvicorn answer_service:app --host 0.0.0.0 --port 8000 --workers 4
+    # UI 설정: ANSWER_SERVICE_URL=http://localhost:8000
+
+모의 모델로 로컬 테스트:
+    python mock_openai.py --port 8001
+    OPENAI_API_BASE=http://localhost:8001/v1 OPENAI_API_KEY=mock uvicorn answer_service:app --port 8000
+"""
+import sys
+import json
+import traceback
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from settings import load_settings
+
+
+class AnswerRequest(BaseModel):
+    question: str = Field(min_length=1)
+    chat_history: List[Tuple[str, str]] = Field(default_factory=list)
+    # 검색할 규정명 목록 (생략하면 질문에서 자동 추론, 빈 목록이면 전체 검색)
+    regulations: Optional[List[str]] = None
+    # 이전 답변의 추천 질문을 클릭한 경우 (이 워커가 미리 계산한 검색 결과가 있으면 사용)
+    follow_up: bool = False
+
+
+class ChunksRequest(BaseModel):
+    ids: List[str] = Field(default_factory=list, max_length=100)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    from rag_pipeline import init_pipeline, close_pipeline
+    from index_versions import PipelineSwapper
+
+    settings = load_settings()
+    # 서비스 워커는 공유 인덱스를 읽기만 함
+    settings["READ_ONLY_INDEX"] = True
+    app.state.swapper = PipelineSwapper(
+        settings["CHROMA_DIR"], lambda version: init_pipeline(settings, version=version), closer=close_pipeline
+    )
+    await run_in_threadpool(app.state.swapper.wait)
+    yield
+    app.state.swapper = None
+
+
+def current_pipeline():
+    """활성 버전의 파이프라인 (새 버전을 불러오는 동안에는 이전 버전)"""
+    swapper = app.state.swapper
+    pipeline = swapper.poll() if swapper is not None else None
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="파이프라인이 초기화되지 않았습니다.")
+    return pipeline
+
+
+app = FastAPI(title="KAIST 규정 챗봇 답변 서비스", lifespan=lifespan)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/healthz")
+def healthz():
+    pipeline = current_pipeline()
+    return {
+        "status": "ok",
+        "index_version": pipeline["index_version"],
+        "loading": app.state.swapper.loading,
+        # 새 버전 로드에 실패하면 이전 버전으로 계속 응답하며 실패 원인을 알림
+        "load_error": str(app.state.swapper.error) if app.state.swapper.error else None,
+        "embedding_info": pipeline["embedding_info"],
+    }
+
+
+def prefetch(pipeline, result, regulations):
+    """
+    답변의 추천 질문 검색을 미리 시작 (최선 노력, 실패는 로그에만 남김).
+    미리 계산한 결과는 워커 프로세스별이므로 클릭 요청이 같은 워커로 올 때만 사용된다.
+    """
+    from rag_pipeline import prefetch_follow_ups
+    try:
+        prefetch_follow_ups(pipeline, result.get("follow_up_questions", []), regulations)
+    except Exception:
+        print("추천 질문 미리 검색 시작 실패:", file=sys.stderr)
+        traceback.print_exc()
+
+
+@app.post("/v1/answer")
+def answer(request: AnswerRequest):
+    # 동기 엔드포인트는 스레드풀에서 실행되므로 이벤트 루프를 막지 않음
+    from rag_pipeline import answer_question
+    pipeline = current_pipeline()
+    try:
+        result = answer_question(
+            pipeline, request.question, request.chat_history, request.regulations, follow_up=request.follow_up
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"검색 및 답변 생성 중 오류가 발생했습니다: {str(e)}")
+    prefetch(pipeline, result, request.regulations)
+    return result
+
+
+@app.post("/v1/answer/stream")
+def answer_stream(request: AnswerRequest):
+    from rag_pipeline import stream_answer
+    pipeline = current_pipeline()
+
+    def events():
+        try:
+            for event, data in stream_answer(
+                pipeline, request.question, request.chat_history, request.regulations, follow_up=request.follow_up
+            ):
+                yield sse_event(event, data)
+                if event == "done":
+                    prefetch(pipeline, data, request.regulations)
+        except Exception as e:
+            yield sse_event("error", {"detail": f"검색 및 답변 생성 중 오류가 발생했습니다: {str(e)}"})
+
+    # 동기 제너레이터는 Starlette가 스레드풀에서 순회함
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/v1/regulations")
+def regulations():
+    # UI 사이드바의 규정 필터 선택지
+    from rag_pipeline import list_regulations
+    return {"regulations": list_regulations(current_pipeline())}
+
+
+@app.get("/v1/telemetry")
+def telemetry():
+    # 워커 프로세스별 통계 (여러 워커로 실행하면 요청을 받은 워커의 값)
+    from telemetry import get_telemetry
+    return {"models": get_telemetry().snapshot()}
+
+
+@app.post("/v1/chunks")
+def chunks(request: ChunksRequest):
+    # UI 세션은 청크 ID만 보관하고 참고 문서를 펼칠 때 본문을 조회
+    from rag_pipeline import get_chunks
+    return {"chunks": get_chunks(current_pipeline(), request.ids)}
@@ -1,6 +1,5 @@
 import os
 import streamlit as st
-import sys
 import platform
 
 # ✅ 무조건 첫 Streamlit 명령어
@@ -11,51 +10,22 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# SQLite 버전 문제 해결 (Streamlit Cloud용)
-if "streamlit" in sys.modules and platform.system() == "Linux":
-    __import__('pysqlite3')
-    sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
-
+import sys
 import time
-import shutil
 import traceback
-from tenacity import retry, stop_after_attempt, wait_fixed
-import openai
-import httpx
-import ssl
-import urllib3
-import json
-import re
-from dotenv import load_dotenv
-# .env 파일 로드
-load_dotenv()
+import uuid
+
+from settings import load_settings, HWP_DIR, CHROMA_DIR
+from example_questions import EXAMPLE_QUESTIONS
+from session_store import SessionStore
+from conversation_store import ConversationStore
+from grounding import describe as describe_citation
+from index_versions import active_version, list_versions, activate as activate_version, rollback as rollback_version
+from rerun_profiler import start_rerun, get_profiler
+
 # 디버그 모드 활성화
 DEBUG_MODE = False
 
-# SSL 검증 비활성화
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-ssl._create_default_https_context = ssl._create_unverified_context
-
-# LangChain 컴포넌트 임포트
-try:
-    from langchain.text_splitter import RecursiveCharacterTextSplitter
-    from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-    from langchain_community.vectorstores import Chroma
-    from langchain.chains import RetrievalQA
-    from langchain_teddynote.document_loaders import HWPLoader
-    from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
-    from langchain.chains.question_answering import load_qa_chain
-    from langchain.chains import ConversationalRetrievalChain
-    from langchain.memory import ConversationBufferMemory
-except ImportError as e:
-    st.error(f"필요한 패키지를 찾을 수 없습니다: {str(e)}")
-    st.info("다음 명령어로 필요한 패키지를 설치하세요:")
-    st.code("pip install langchain langchain-openai langchain-community chromadb langchain-teddynote")
-    st.stop()
-
-# 디렉토리 설정
-HWP_DIR = os.path.join(os.path.dirname(__file__), 'data')
-CHROMA_DIR = os.path.join(os.path.dirname(__file__), 'chroma_db')
 os.makedirs(HWP_DIR, exist_ok=True)
 os.makedirs(CHROMA_DIR, exist_ok=True)
 
@@ -64,32 +34,168 @@ def is_streamlit_cloud():
     # Streamlit Cloud(리눅스) 환경에서는 secrets.toml이 존재
     return platform.system() == "Linux" and hasattr(st, "secrets") and "OPENAI_API_KEY" in st.secrets
 
-def should_rebuild_vectordb():
-    """벡터DB 재생성이 필요한지 확인하는 함수"""
-    # Streamlit Cloud 환경에서는 기존 DB 사용 (읽기 전용 환경)
-    if is_streamlit_cloud():
-        return False
-    
-    # 로컬 환경에서는 기존 로직 사용
-    return not os.path.exists(CHROMA_DIR) or not os.listdir(CHROMA_DIR)
-
-if is_streamlit_cloud():
-    openai.api_key = st.secrets["OPENAI_API_KEY"]
-    openai.api_base = st.secrets.get("OPENAI_API_BASE", "https://api.openai.com/v1")
-    OPENAI_MODEL = st.secrets.get("OPENAI_MODEL", "gpt-4.1-mini")
-    OPENAI_EMBEDDING_MODEL = st.secrets.get("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002")
-else:
-    openai.api_key = os.environ.get("OPENAI_API_KEY", "")
-    openai.api_base = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1")
-    OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "openai.gpt-4.1-mini-2025-04-14")
-    OPENAI_EMBEDDING_MODEL = os.environ.get("OPENAI_EMBEDDING_MODEL", "azure.text-embedding-3-large")
+SETTINGS = load_settings(st.secrets if is_streamlit_cloud() else None)
 
 # API 키 확인
-if not openai.api_key:
+if not SETTINGS["OPENAI_API_KEY"]:
     st.error("⚠️ OpenAI API 키가 설정되지 않았습니다!")
     st.info("Streamlit Cloud의 Settings > Secrets에서 OPENAI_API_KEY를 설정하거나, 로컬에서는 .env 파일을 생성하세요.")
     st.stop()
 
+# 재실행 프로파일링 (APP_PROFILE이 꺼져 있으면 mark/finish는 아무 일도 하지 않음)
+RERUN_PROFILE = start_rerun(SETTINGS, st.session_state.get("session_id"))
+
+def _init_pipeline(settings, version):
+    """백그라운드 스레드에서 LangChain 등 무거운 모듈을 import하고 파이프라인을 구성"""
+    from rag_pipeline import init_pipeline
+    return init_pipeline(settings, version=version)
+
+def _close_pipeline(pipeline):
+    """교체된 파이프라인의 자원 해제 (교체 후 일정 시간이 지나면 호출됨)"""
+    from rag_pipeline import close_pipeline
+    close_pipeline(pipeline)
+
+# RAG 파이프라인은 프로세스 전체에서 공유하며, UI가 렌더링되는 동안 백그라운드에서 초기화.
+# 활성 인덱스 버전이 바뀌면 새 버전을 백그라운드에서 로드하고 준비될 때까지 이전 버전으로 응답
+@st.cache_resource(show_spinner=False)
+def get_pipeline_swapper(chroma_dir):
+    from index_versions import PipelineSwapper
+    return PipelineSwapper(chroma_dir, lambda version: _init_pipeline(SETTINGS, version), closer=_close_pipeline)
+
+def get_rebuild_job():
+    from rebuild_job import get_job
+    return get_job()
+
+@st.fragment(run_every=1.0)
+def rebuild_progress():
+    """재생성 진행 상황 (이 조각만 1초마다 다시 실행되며, 작업이 끝나면 전체 화면을 갱신)"""
+    from rebuild_job import STAGE_LABELS
+    job = get_rebuild_job()
+    state = job.snapshot()
+    if state is None or not job.running:
+        st.rerun()
+    detail = STAGE_LABELS[state["stage"]]
+    if state["stage"] == "parse":
+        detail += f" {state['files_done']}/{state['files_total']} (캐시 {state['cache_hits']}개)"
+        if state["current_file"]:
+            detail += f" · {state['current_file']}"
+    elif state["stage"] == "embed":
+        detail += f" {state['embedded']}/{state['chunks']} 조각"
+    elif state["stage"] == "split":
+        detail += f" {state['chunks']}개 조각"
+    if state["eta_seconds"] is not None:
+        detail += f" · 남은 시간 약 {state['eta_seconds']:.0f}초"
+    st.progress(state["fraction"], text=f"⏳ {detail}")
+    st.caption(f"경과 {time.time() - state['started_at']:.0f}초 · 생성 중에도 기존 버전으로 답변합니다.")
+
+def wait_for_pipeline():
+    """파이프라인 초기화가 끝날 때까지 기다린 뒤 반환 (실패 시 오류를 표시하고 None 반환)"""
+    swapper = get_pipeline_swapper(CHROMA_DIR)
+    pipeline = swapper.poll()
+    if pipeline is None and swapper.loading:
+        with st.spinner("⏳ 규정 검색 시스템을 준비하는 중입니다..."):
+            pipeline = swapper.wait()
+    if pipeline is None:
+        error = swapper.error
+        st.error(str(error) if error else "규정 검색 시스템을 준비하지 못했습니다.")
+        if DEBUG_MODE and error is not None:
+            st.code("".join(traceback.format_exception(type(error), error, error.__traceback__)), language="python")
+        # 다음 실행 시 다시 초기화를 시도
+        swapper.retry()
+        return None
+    return pipeline
+
+def generate_answer(question, chat_history, regulations=None, follow_up=False):
+    """
+    답변을 스트리밍으로 생성하여 ("token", 텍스트 조각)... → ("done", 전체 결과) 이벤트를 반환.
+    답변 서비스가 설정되어 있으면 SSE로, 아니면 프로세스 내 파이프라인으로 생성한다
+    (파이프라인이 준비되지 않았으면 이벤트 없이 끝남).
+    프로세스 내 파이프라인이면 답변의 추천 질문 검색을 사용자가 읽는 동안 미리 시작한다
+    (답변 서비스는 서비스 워커에서 미리 시작함).
+    """
+    if SETTINGS["ANSWER_SERVICE_URL"]:
+        from answer_client import stream_answer as stream_service_answer
+        yield from stream_service_answer(
+            SETTINGS["ANSWER_SERVICE_URL"], question, chat_history, regulations, follow_up=follow_up
+        )
+        return
+    pipeline = wait_for_pipeline()
+    if pipeline is None:
+        return
+    from rag_pipeline import stream_answer, prefetch_follow_ups
+    for event, data in stream_answer(pipeline, question, chat_history, regulations, follow_up=follow_up):
+        yield event, data
+        if event != "done":
+            continue
+        try:
+            prefetch_follow_ups(pipeline, data["follow_up_questions"], regulations)
+        except Exception:
+            # 미리 검색은 최선 노력이므로 실패해도 답변은 그대로 표시하고 서버 로그에만 남김
+            print("추천 질문 미리 검색 시작 실패:", file=sys.stderr)
+            traceback.print_exc()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_service_regulations(service_url):
+    from answer_client import request_regulations
+    return request_regulations(service_url)
+
+def available_regulations():
+    """사이드바 필터에 표시할 규정 목록 (파이프라인이 아직 준비 중이면 빈 목록)"""
+    if SETTINGS["ANSWER_SERVICE_URL"]:
+        try:
+            return fetch_service_regulations(SETTINGS["ANSWER_SERVICE_URL"])
+        except Exception:
+            return []
+    pipeline = get_pipeline_swapper(CHROMA_DIR).poll()
+    if pipeline is None:
+        return []
+    from rag_pipeline import list_regulations
+    return list_regulations(pipeline)
+
+def fetch_model_stats():
+    """모델별 답변 통계 (답변 서비스를 쓰면 서비스 워커의 통계)"""
+    if SETTINGS["ANSWER_SERVICE_URL"]:
+        from answer_client import request_telemetry
+        return request_telemetry(SETTINGS["ANSWER_SERVICE_URL"])
+    from telemetry import get_telemetry
+    return get_telemetry().snapshot()
+
+def format_ms(value):
+    """통계 시간 표시 (측정값이 없으면 n/a)"""
+    return "n/a" if value is None else f"{value:.0f} ms"
+
+def fetch_prefetch_stats():
+    """추천 질문 미리 검색 통계 (프로세스 내 파이프라인에서만 사용, 없으면 None)"""
+    if SETTINGS["ANSWER_SERVICE_URL"]:
+        return None
+    pipeline = get_pipeline_swapper(CHROMA_DIR).poll()
+    prefetcher = pipeline.get("prefetcher") if pipeline else None
+    return prefetcher.snapshot() if prefetcher else None
+
+def selected_regulations():
+    """사이드바 선택값을 검색 필터로 변환 (None: 자동 추론, 빈 목록: 전체 규정)"""
+    selected = st.session_state.get("regulation_filter") or []
+    if selected:
+        return list(selected)
+    return None if st.session_state.get("regulation_auto", True) else []
+
+def resolve_reference_docs(chunk_ids):
+    """세션에 저장된 청크 ID를 표시할 때 본문/메타데이터로 변환"""
+    if SETTINGS["ANSWER_SERVICE_URL"]:
+        from answer_client import request_chunks
+        return request_chunks(SETTINGS["ANSWER_SERVICE_URL"], chunk_ids)
+    pipeline = wait_for_pipeline()
+    if pipeline is None:
+        return []
+    from rag_pipeline import get_chunks
+    return get_chunks(pipeline, chunk_ids)
+
+RERUN_PROFILE.mark("pipeline")
+# 세션 UI가 그려지는 동안 초기화가 진행되도록 가장 먼저 시작 (답변 서비스를 쓰면 불필요)
+if not SETTINGS["ANSWER_SERVICE_URL"]:
+    get_pipeline_swapper(CHROMA_DIR).poll()
+
+RERUN_PROFILE.mark("css")
 # CSS - 최상단에 배치하여 먼저 적용되도록 함
 st.markdown("""
 <style>
@@ -478,155 +584,40 @@ section[data-testid="stSidebar"] .sidebar-header {
 </style>
 """, unsafe_allow_html=True)
 
-# 메시지 세션 초기화
-if "messages" not in st.session_state:
-    st.session_state.messages = [
-        {"role": "assistant", "content": "안녕하세요! KAIST 규정에 대해 궁금한 점이 있으시면 무엇이든 물어보세요. 어떤 도움이 필요하신가요?"}
-    ]
+RERUN_PROFILE.mark("session")
+# 세션 상태는 프로세스 공유 저장소에 두고 st.session_state에는 세션 ID만 보관
+# 메시지는 SQLite에도 기록되어 재접속이나 서버 재시작 후에도 이어서 볼 수 있음
+@st.cache_resource(show_spinner=False)
+def get_session_store():
+    return SessionStore(persistence=ConversationStore(SETTINGS["CONVERSATION_DB"]))
+
+def start_new_session():
+    st.session_state.session_id = uuid.uuid4().hex
+    # URL에 세션 ID를 남겨 새로고침/재접속 시 같은 대화를 복원
+    st.query_params["sid"] = st.session_state.session_id
+
+if "session_id" not in st.session_state:
+    if st.query_params.get("sid"):
+        st.session_state.session_id = st.query_params["sid"]
+    else:
+        start_new_session()
 
-# 대화 기록 메모리 초기화
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+# 메시지와 대화 기록 (메모리에 없으면 저장소에서 최근 대화만 복원)
+session = get_session_store().get(st.session_state.session_id)
 
 # 예시 질문 중복 방지를 위한 함수
 def add_user_message(message):
     # 중복 메시지 체크: 같은 내용의 user 메시지가 이미 마지막에 있으면 추가하지 않음
-    if (len(st.session_state.messages) > 0 and
-            st.session_state.messages[-1]["role"] == "user" and
-            st.session_state.messages[-1]["content"] == message):
+    if (len(session.messages) > 0 and
+            session.messages[-1]["role"] == "user" and
+            session.messages[-1]["content"] == message):
         return False
     
     # 메시지 추가
-    st.session_state.messages.append({"role": "user", "content": message})
+    get_session_store().add_message(st.session_state.session_id, session, {"role": "user", "content": message})
     return True
 
-# 후속 질문을 추출하는 함수 수정
-def extract_follow_up_questions(text):
-    """
-    어시스턴트 답변에서 후속 질문을 추출하는 함수
-    마크다운 형식의 관련 질문 섹션에서 질문들을 리스트로 반환
-    """
-    # 디버깅을 위한 텍스트 출력 (DEBUG_MODE가 True인 경우)
-    if DEBUG_MODE:
-        print(f"답변 텍스트 확인: {text[:200]}...")
-    
-    # 마크다운 패턴 처리 - 새로운 형식에 맞게 업데이트
-    patterns = [
-        # 마크다운 헤더 형식 (새로운 지정 형식)
-        r"##\s*추천\s*질문\s*\n([\s\S]*?)(?=##|$)",
-        # 마크다운 헤더 형식 (다른 변형)
-        r"##\s*관련\s*질문\s*\n([\s\S]*?)(?=##|$)",
-        # 이전 형식들과의 호환성 유지
-        r"###?\s*추천\s*질문\s*:?\n([\s\S]*?)(?=###|$)",
-        r"###?\s*관련\s*질문\s*:?\n([\s\S]*?)(?=###|$)",
-        # 일반 텍스트 패턴 (백업)
-        r"추천\s*질문\s*:?\n([\s\S]*?)(?=\n\n|$)"
-    ]
-    
-    questions_section = ""
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            questions_section = match.group(1).strip()
-            break
-    
-    if not questions_section:
-        # 디버깅용 전체 텍스트의 일부 출력
-        if DEBUG_MODE:
-            debug_text = text[:200] + "..." if len(text) > 200 else text
-            print(f"DEBUG: 텍스트에서 질문 섹션을 찾을 수 없습니다. 텍스트 시작 부분: {debug_text}")
-            print(f"DEBUG: 전체 텍스트: {text}")
-        
-        # 대안: 간단한 자체 생성 질문 사용 (LLM 호출 없이)
-        return [
-            "다른 관련 규정에 대해 알려주세요",
-            "이 내용을 더 자세히 설명해주세요",
-            "이 규정의 예외사항이 있나요?"
-        ]
-    
-    # 디버깅: 찾은 질문 섹션 출력
-    if DEBUG_MODE:
-        print(f"DEBUG: 찾은 질문 섹션: {questions_section}")
-    
-    # 번호가 매겨진 항목 추출 (1. 2. 3. 등의 형식)
-    numbered_items = re.findall(r'^\s*\d+\.?\s*(.*?)$', questions_section, re.MULTILINE)
-    if numbered_items and len(numbered_items) >= 2:  # 최소 2개 이상의 번호 매김 항목이 있으면
-        # 디버깅: 번호가 매겨진 항목 확인
-        if DEBUG_MODE:
-            print(f"DEBUG: 번호 매김 항목 발견: {numbered_items}")
-        
-        # 각 항목 정리 (대괄호 등 제거)
-        questions = []
-        for item in numbered_items:
-            # 대괄호로 둘러싸인 내용 추출 또는 그냥 항목 사용
-            clean_item = re.sub(r'^\[(.*)\]$', r'\1', item.strip())
-            if clean_item and len(clean_item) > 5:
-                questions.append(clean_item)
-        
-        if len(questions) >= 2:  # 의미 있는 질문이 2개 이상 추출됐으면 사용
-            return questions
-    
-    # 번호 매김이 실패하면 일반적인 방법으로 추출 시도
-    questions = []
-    for line in questions_section.split("\n"):
-        # HTML 태그 제거
-        line = re.sub(r'<[^>]*>', '', line)
-        # 줄에서 앞부분의 불릿, 번호, 대시 등 제거
-        clean_line = re.sub(r"^[\s\-–•*0-9.)\]]*\s*", "", line).strip()
-        # 대괄호 안의 내용만 추출 또는 전체 라인 사용
-        if '[' in clean_line and ']' in clean_line:
-            bracket_content = re.search(r'\[(.*?)\]', clean_line)
-            if bracket_content:
-                clean_line = bracket_content.group(1).strip()
-        
-        if clean_line and not clean_line.startswith("관련해서") and len(clean_line) > 5:
-            questions.append(clean_line)
-    
-    # 디버깅: 추출된 질문 확인
-    if DEBUG_MODE and questions:
-        print(f"DEBUG: 추출된 질문: {questions}")
-    
-    # 질문이 없는 경우 기본 질문 사용
-    if not questions:
-        return [
-            "다른 관련 규정에 대해 알려주세요",
-            "이 내용을 더 자세히 설명해주세요",
-            "이 규정의 예외사항이 있나요?"
-        ]
-    
-    return questions
-
-# 후속 질문 섹션을 제거하는 함수 업데이트
-def remove_follow_up_questions_section(text):
-    """
-    어시스턴트 답변에서 후속 질문 섹션을 제거하는 함수
-    마크다운 형식 지원
-    """
-    # 마크다운 패턴들 - 새로운 형식 포함
-    patterns = [
-        r"##\s*추천\s*질문\s*\n[\s\S]*?(?=##|$)",  # 새 형식 (##)
-        r"##\s*관련\s*질문\s*\n[\s\S]*?(?=##|$)",  # 새 형식 (##)
-        r"####\s*추천\s*질문\s*\n[\s\S]*?(?=####|$)",  # 새 형식 (####)
-        r"####\s*관련\s*질문\s*\n[\s\S]*?(?=####|$)",  # 새 형식 (####)
-        r"###?\s*추천\s*질문\s*:?\n[\s\S]*?(?=###|$)",  # 기존 형식 (###)
-        r"###?\s*관련\s*질문\s*:?\n[\s\S]*?(?=###|$)",  # 기존 형식 (###)
-        r"추천\s*질문\s*:?\n[\s\S]*?(?=\n\n|$)"  # 일반 텍스트 형식
-    ]
-    
-    # 원본 텍스트 저장
-    original_text = text
-    
-    # 각 패턴 적용
-    result = text
-    for pattern in patterns:
-        result = re.sub(pattern, "", result)
-    
-    # 디버깅 - 텍스트 변경 확인
-    if DEBUG_MODE and original_text != result:
-        print(f"DEBUG: 질문 섹션 제거됨. 원본 길이: {len(original_text)}, 처리 후 길이: {len(result)}")
-    
-    return result.strip()
-
+RERUN_PROFILE.mark("sidebar")
 # 사이드바 예시 질문
 with st.sidebar:
     # 사이드바 상단에 로고와 타이틀 배치
@@ -641,15 +632,130 @@ with st.sidebar:
     
     with st.expander("⚙️ 설정", expanded=False):
         st.markdown("#### 📚 벡터DB 설정")
-        force_rebuild = st.checkbox("벡터DB 강제 재생성", value=False)
-        if force_rebuild and os.path.exists(CHROMA_DIR):
-            if st.button("벡터DB 재생성", help="기존 벡터DB를 삭제하고 새로 생성합니다", key="rebuild_btn"):
-                shutil.rmtree(CHROMA_DIR, ignore_errors=True)
-                if "retriever" in st.session_state:
-                    del st.session_state.retriever
-                st.success("✨ 벡터DB가 삭제되었습니다. 새로고침하여 재생성을 시작하세요.")
+        # 새 버전은 기존 버전과 나란히 생성되며, 완료되면 활성 버전 포인터만 교체됨
+        current_version = active_version(CHROMA_DIR)
+        swapper = get_pipeline_swapper(CHROMA_DIR)
+        st.caption(f"활성 버전: `{current_version or '없음'}`")
+        if swapper.loading and swapper.pipeline is not None:
+            st.caption(f"새 버전을 불러오는 중입니다. 준비될 때까지 `{swapper.version}` 버전으로 답변합니다.")
+        elif swapper.error is not None and swapper.pipeline is not None:
+            st.error(f"버전 `{swapper.failed_version}` 로드 실패 (`{swapper.version}` 버전으로 계속 답변합니다): {swapper.error}")
+            if st.button("다시 불러오기", key="retry_swap_btn"):
+                swapper.retry()
                 st.rerun()
+
+        # 재생성은 백그라운드 작업으로 실행되며 진행 상황은 조각(fragment) 단위로 주기적으로 갱신
+        rebuild_job = get_rebuild_job()
+        if rebuild_job.running:
+            rebuild_progress()
+        else:
+            last_build = rebuild_job.snapshot()
+            if last_build is not None:
+                if last_build["status"] == "failed":
+                    st.error(f"새 버전 생성 실패 (기존 버전은 그대로 유지됩니다): {last_build['error']}")
+                else:
+                    st.success(f"✨ 버전 `{last_build['version']}` 생성 및 활성화 완료 "
+                               f"({last_build['finished_at'] - last_build['started_at']:.0f}초)")
+                for level, notice in last_build["notices"]:
+                    getattr(st, level)(notice)
+            if st.button("새 버전 생성", key="rebuild_btn", disabled=SETTINGS["READ_ONLY_INDEX"],
+                         help="기존 벡터DB로 계속 답변하면서 새 버전을 생성한 뒤 교체합니다"):
+                if not rebuild_job.start(SETTINGS):
+                    st.warning("이미 다른 사용자가 재생성을 진행하고 있습니다.")
+                st.rerun()
+
+        completed_versions = [version for version, _, done in list_versions(CHROMA_DIR) if done]
+        if len(completed_versions) > 1:
+            target_version = st.selectbox(
+                "버전 선택", completed_versions, key="index_version_select",
+                index=completed_versions.index(current_version) if current_version in completed_versions else 0,
+            )
+            col_activate, col_rollback = st.columns(2)
+            with col_activate:
+                if st.button("이 버전 활성화", key="activate_version_btn", disabled=target_version == current_version):
+                    activate_version(CHROMA_DIR, target_version)
+                    st.rerun()
+            with col_rollback:
+                rolled_back = False
+                if st.button("이전 버전으로 롤백", key="rollback_btn"):
+                    try:
+                        rollback_version(CHROMA_DIR)
+                        rolled_back = True
+                    except ValueError as e:
+                        st.warning(str(e))
+                if rolled_back:
+                    st.rerun()
+
+        st.markdown("#### 🧠 메모리 사용량")
+        if st.button("메모리 리포트 보기", key="memory_report_btn"):
+            report = get_session_store().memory_report()
+            st.markdown(
+                f"- 프로세스 RSS: **{report['rss_bytes'] / 1024 / 1024:.1f} MB**\n"
+                f"- 활성 세션: **{report['sessions']}개** (유휴 제거 누적 {report['evicted']}개)\n"
+                f"- 세션 상태 합계: {report['session_bytes'] / 1024:.1f} KB "
+                f"(평균 {report['avg_session_bytes'] / 1024:.1f} KB, 최대 {report['max_session_bytes'] / 1024:.1f} KB)"
+            )
+            writes = get_session_store().persistence.stats()
+            st.markdown(
+                f"- 대화 저장 {writes['writes']}건, 쓰기 지연 p50 {writes['p50_ms']:.2f} ms / "
+                f"p95 {writes['p95_ms']:.2f} ms / 최대 {writes['max_ms']:.2f} ms"
+            )
+
+        st.markdown("#### 📊 모델별 통계")
+        if st.button("모델별 통계 보기", key="telemetry_btn"):
+            model_stats = fetch_model_stats()
+            if not model_stats:
+                st.caption("아직 기록된 답변이 없습니다.")
+            for model_name, stats in model_stats.items():
+                st.markdown(
+                    f"- **{model_name}**: 답변 {stats['answers']}건, "
+                    f"생성 p50 {stats['latency_p50_ms']:.0f} ms / p95 {stats['latency_p95_ms']:.0f} ms, "
+                    f"인용 확인 필요 답변 {stats['answer_flag_rate'] * 100:.1f}% "
+                    f"(인용 {stats['citations']}개 중 {stats['flagged_citations']}개), "
+                    f"검증 p95 {stats['verify_p95_ms']:.2f} ms, "
+                    f"프롬프트 캐시 적중 {stats['cache_hit_rate'] * 100:.1f}%, "
+                    f"답변당 비용 ${stats['cost_per_answer_usd']:.5f}, "
+                    f"첫 토큰 p50 {format_ms(stats['first_token_p50_cached_ms'])}(캐시) / "
+                    f"{format_ms(stats['first_token_p50_uncached_ms'])}(미캐시)"
+                )
+            prefetch_stats = fetch_prefetch_stats()
+            if prefetch_stats:
+                st.caption(
+                    f"추천 질문 미리 검색: {prefetch_stats['prefetched']}개 중 적중 {prefetch_stats['hits']}회 "
+                    f"(클릭 적중률 {prefetch_stats['hit_rate'] * 100:.1f}%, "
+                    f"낭비율 {prefetch_stats['waste_rate'] * 100:.1f}%, 예산 초과로 건너뜀 {prefetch_stats['skipped']}개)"
+                )
+        if SETTINGS["APP_PROFILE"]:
+            st.markdown("#### 🔬 재실행 프로파일")
+            if st.button("느린 재실행 보기", key="profile_btn"):
+                slowest = get_profiler(SETTINGS).slowest(10)
+                if not slowest:
+                    st.caption("아직 기록된 재실행이 없습니다.")
+                for summary in slowest:
+                    sections = sorted(summary["sections"], key=lambda section: -section["wall_ms"])[:3]
+                    breakdown = ", ".join(
+                        f"{section['name']} {section['wall_ms']:.0f} ms"
+                        + (f" (CPU {section['cpu_ms']:.0f} ms)" if section["cpu_ms"] is not None else "")
+                        for section in sections
+                    )
+                    st.markdown(
+                        f"- **{summary['wall_ms']:.0f} ms** "
+                        f"({time.strftime('%H:%M:%S', time.localtime(summary['started_at']))}): {breakdown}"
+                    )
+                    st.caption(f"CPU: {summary['cpu_profile']} / 할당: {summary['alloc_profile']}")
     
+    st.markdown("### 🔎 검색 범위")
+    regulation_options = available_regulations()
+    if regulation_options:
+        st.multiselect(
+            "규정 선택", regulation_options, key="regulation_filter",
+            placeholder="선택하지 않으면 전체 규정에서 검색",
+        )
+        if not st.session_state.get("regulation_filter"):
+            st.toggle("질문에서 관련 규정 자동 추론", value=True, key="regulation_auto")
+    else:
+        st.caption("규정 목록을 준비하는 중이거나, 규정 정보 없이 생성된 벡터DB입니다.")
+
     st.markdown("### 💡 예시 질문")
     
     # 직접 HTML과 CSS로 예시 질문 버튼 스타일링
@@ -674,78 +780,65 @@ with st.sidebar:
     }
     </style>
     """, unsafe_allow_html=True)
-    
-    example_questions = [
-        "법인카드로 지출한 금액은 어떤 증빙서류가 필요하고, 정산 기한은 언제까지인가요?",
-        "출장 중 식비와 숙박비는 각각 얼마까지 인정되며, 기준 금액을 초과하면 어떻게 되나요?",
-        "상품권을 구매한 경우, 비용 처리 시 어떤 제한이 있고 어떤 서류가 필요하나요?",
-        "과세 항목과 비과세 항목을 구분하는 기준은 무엇이며, 대표적인 예시는 어떤 게 있나요?",
-        "같은 항목으로 중복 지출이 발생한 경우 어떻게 처리되고, 환수 대상이 될 수 있나요?",
-        "강의료나 연구수당 등 인건비 항목은 어떤 소득유형으로 분류되며, 세율은 얼마인가요?",
-        "사적 용도 또는 가족 명의 계좌로 지급된 지출은 어떤 절차로 확인되며, 문제가 될 경우 조치는 무엇인가요?",
-        "연말 또는 회계연도 말에 몰아서 지출한 경우 규정상 문제가 될 수 있나요?",
-        "비용 지출 시 카드 사용이 필수인가요, 아니면 현금 정산도 가능한가요?",
-        "지출 예정일 전에 선지급이 필요한 경우 어떤 조건과 절차를 따라야 하나요?"
-    ]
 
     # 예시 질문 버튼을 컨테이너로 감싸서 한 번만 렌더링되도록 함
     question_container = st.container()
     with question_container:
-        for q in example_questions:
+        for q in EXAMPLE_QUESTIONS:
             if st.button(q, key=f"btn_{hash(q)}", use_container_width=True):
                 if add_user_message(q):
                     st.rerun()
 
+RERUN_PROFILE.mark("messages")
 # 채팅 초기화 버튼을 우측에 배치
-if st.session_state.messages and len(st.session_state.messages) > 1:  # 초기 메시지만 있는 경우는 제외
+if session.messages and len(session.messages) > 1:  # 초기 메시지만 있는 경우는 제외
     col1, col2, col3 = st.columns([6, 1, 1])
     with col3:
         if st.button("대화 초기화", key="clear_chat"):
-            st.session_state.messages = [
-                {"role": "assistant", "content": "안녕하세요! KAIST 규정에 대해 궁금한 점이 있으시면 무엇이든 물어보세요. 어떤 도움이 필요하신가요?"}
-            ]
-            # 대화 히스토리도 초기화
-            st.session_state.chat_history = []
+            # 저장된 대화는 그대로 두고 새 세션으로 시작
+            start_new_session()
             st.rerun()
 
 # 채팅 영역에 일관된 공간 제공
 st.markdown('<div class="message-container">', unsafe_allow_html=True)
 
+# 복원된 세션은 최근 대화만 불러오므로, 이전 대화는 요청 시 한 페이지씩 추가
+if session.has_older:
+    if st.button("⬆️ 이전 대화 더 보기", key="load_older"):
+        get_session_store().load_older(st.session_state.session_id, session)
+        st.rerun()
+
 # 채팅 히스토리 표시 - 각 메시지는 정확히 한 번만 표시됨
-for i, message in enumerate(st.session_state.messages):
+for i, message in enumerate(session.messages):
+    # 이전 대화를 앞에 추가해도 위젯 키가 바뀌지 않도록 저장 순번 사용
+    message_key = message.get("seq", i)
     # 모든 메시지를 표시 (건너뛰는 메시지 없음)
     with st.chat_message(message["role"], avatar="🧑‍💻" if message["role"] == "user" else "🤖"):
         if message["role"] == "assistant":
-            # 어시스턴트 메시지인 경우 후속 질문 섹션 제거 후 표시
-            clean_content = remove_follow_up_questions_section(message["content"])
             # HTML 렌더링 활성화
-            st.markdown(clean_content, unsafe_allow_html=True)
+            st.markdown(message["content"], unsafe_allow_html=True)
+            if message.get("regulations"):
+                st.caption(f"🔎 검색 범위: {', '.join(message['regulations'])}")
+            # 참고 문서에서 확인되지 않은 조항 인용 안내 (답변 후 로컬 검증 결과)
+            if message.get("unverified_citations"):
+                st.warning(f"⚠️ 참고 문서에서 확인되지 않은 인용: {', '.join(message['unverified_citations'])}")
             
             # 참고 문서가 있는 경우에만 표시 (상단에 배치)
-            if message["role"] == "assistant" and "reference_docs" in message and message["reference_docs"]:
-                with st.expander("📚 참고 문서"):
-                    for doc_idx, doc in enumerate(message["reference_docs"]):
-                        st.markdown(f"**문서 {doc_idx+1}**")
+            # 세션에는 청크 ID만 저장되어 있으며, 펼쳤을 때만 본문을 조회
+            # (st.expander는 접혀 있어도 본문 코드가 실행되므로 토글로 대신함)
+            if message.get("reference_ids"):
+                if st.toggle("📚 참고 문서", key=f"refs_{message_key}"):
+                    for doc_idx, doc in enumerate(resolve_reference_docs(message["reference_ids"])):
+                        metadata = doc.get("metadata") or {}
+                        label = " ".join(filter(None, [metadata.get("regulation"), metadata.get("article")]))
+                        st.markdown(f"**문서 {doc_idx+1}**" + (f" · {label}" if label else ""))
                         st.markdown(f"```\n{doc['content']}\n```")
                         if "metadata" in doc and doc["metadata"]:
                             st.markdown(f"*메타데이터:* {doc['metadata']}")
             
-            # 첫 번째 환영 메시지(인덱스 0)가 아닌 경우에만 후속 질문 표시
-            if i > 0:  
-                # 후속 질문 추출 또는 기본 질문 사용
-                follow_up_questions = ["다른 관련 규정에 대해 알려주세요", 
-                                      "이 내용을 더 자세히 설명해주세요", 
-                                      "이 규정의 예외사항이 있나요?"]
-                
-                # 메시지에 후속 질문이 저장되어 있으면 그것 사용
-                if "follow_up_questions" in message and message["follow_up_questions"]:
-                    follow_up_questions = message["follow_up_questions"]
-                # 아니면 내용에서 추출
-                else:
-                    extracted = extract_follow_up_questions(message["content"])
-                    if extracted:
-                        follow_up_questions = extracted
-                
+            # 답변과 함께 받은 후속 질문이 있는 경우에만 표시 (환영 메시지 제외)
+            follow_up_questions = message.get("follow_up_questions") or []
+            if not message.get("welcome") and follow_up_questions:
                 # 후속 질문 버튼 표시
                 st.write("---")
                 st.write("**더 질문해보세요:**")
@@ -780,16 +873,19 @@ for i, message in enumerate(st.session_state.messages):
                 # 각 질문을 버튼으로 표시 - Streamlit 버튼 사용
                 for idx, question in enumerate(follow_up_questions):
                     # 질문 내용의 해시값을 포함하여 고유한 키 생성
-                    unique_key = f"follow_up_{i}_{idx}_{abs(hash(question)) % 10000}"
+                    unique_key = f"follow_up_{message_key}_{idx}_{abs(hash(question)) % 10000}"
                     if st.button(question, key=unique_key, use_container_width=True):
-                        add_user_message(question)
+                        if add_user_message(question):
+                            # 미리 계산한 검색 결과를 쓰도록 추천 질문 클릭임을 표시
+                            st.session_state.follow_up_click = question
                         st.rerun()
         else:
             # 사용자 메시지는 그대로 표시
             st.markdown(message["content"])
 
+RERUN_PROFILE.mark("answer")
 # 답변되지 않은 user 메시지가 있는지 확인
-messages = st.session_state.messages
+messages = session.messages
 has_pending_user_message = (
     len(messages) > 1
     and messages[-1]["role"] == "user"
@@ -800,305 +896,94 @@ has_pending_user_message = (
 if has_pending_user_message:
     # 마지막 질문 메시지는 채팅 히스토리에서 이미 표시됨, 여기서는 표시하지 않음
     
-    # 답변 생성 (UI에 직접 표시하지 않고 st.session_state.messages에만 추가)
-    if "retriever" not in st.session_state or "qa" not in st.session_state:
-        st.error("시스템이 아직 초기화되지 않았습니다. 잠시 후 다시 시도해주세요.")
-        st.session_state.messages.append({
-            "role": "assistant", 
-            "content": "❌ 시스템이 아직 초기화되지 않았습니다. 잠시 후 다시 시도해주세요.",
-            "reference_docs": [],
-            "follow_up_questions": ["시스템 재시작하기", "도움말 보기", "문서 확인하기"]
-        })
-        st.rerun()
-    else:
-        with st.spinner('🤔 답변 생성 중...'):
-            try:
-                # 대화 히스토리 형식 변환 (ConversationalRetrievalChain 형식에 맞게)
-                current_question = messages[-1]["content"]
-                
-                # 검색 결과
-                search_docs = st.session_state.retriever.get_relevant_documents(current_question)
-                
-                # 답변 생성 - 대화 히스토리 활용
-                result = st.session_state.qa({"question": current_question, "chat_history": st.session_state.chat_history})
-                answer = result["answer"]
-                
-                # 대화 히스토리에 현재 질문-답변 쌍 추가
-                st.session_state.chat_history.append((current_question, answer))
-                
-                # 후속 질문 생성 - 답변에서 추출 또는 기본값 사용
-                follow_up_questions = extract_follow_up_questions(answer)
-                if not follow_up_questions:
-                    # 기본 후속 질문
-                    follow_up_questions = [
-                        "이 내용을 더 자세히 설명해주세요",
-                        "관련 규정의 예외사항이 있나요?",
-                        "비슷한 다른 사례가 있을까요?"
-                    ]
-                
-                # 검색 결과가 있는 경우
-                if search_docs:
-                    # 참고 문서 정보 저장을 위한 형식 변환
-                    reference_docs = []
-                    
-                    # 검색 문서 정보 저장 (모든 문서 포함)
-                    for doc in search_docs:
-                        # 메타데이터 저장
-                        metadata = {}
-                        if hasattr(doc, 'metadata') and doc.metadata:
-                            metadata = doc.metadata
-                        
-                        # 참고 문서 정보 저장
-                        reference_docs.append({
-                            "content": doc.page_content,
-                            "metadata": metadata
-                        })
-                    
-                    # 메시지 저장 (참고 문서 정보 포함)
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": answer,
-                        "reference_docs": reference_docs,
-                        "follow_up_questions": follow_up_questions
-                    })
-                
-                # 검색 결과가 없는 경우
-                else:
-                    # 참고 문서 없이 메시지 저장
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": answer,  # 경고 메시지 없이
-                        "reference_docs": [],
-                        "follow_up_questions": follow_up_questions
-                    })
+    # 답변 생성 (생성 중에는 받은 텍스트를 바로 표시하고, 끝나면 session.messages에 추가한 뒤 다시 그림)
+    with st.spinner('🤔 답변 생성 중...'):
+        try:
+            current_question = messages[-1]["content"]
             
-            except Exception as e:
-                error_message = f"검색 및 답변 생성 중 오류가 발생했습니다: {str(e)}"
-                st.error(error_message)
-                st.session_state.messages.append({
+            # 답변 생성 - 대화 히스토리 활용
+            follow_up = st.session_state.pop("follow_up_click", None) == current_question
+            result = None
+            streamed = ""
+            placeholder = None
+            for event, data in generate_answer(current_question, session.chat_history, selected_regulations(), follow_up):
+                if event == "token":
+                    if placeholder is None:
+                        placeholder = st.chat_message("assistant", avatar="🤖").empty()
+                    streamed += data
+                    placeholder.markdown(streamed + "▌", unsafe_allow_html=True)
+                elif event == "done":
+                    result = data
+            if result is None:
+                get_session_store().add_message(st.session_state.session_id, session, {
                     "role": "assistant", 
-                    "content": f"❌ {error_message}",
-                    "reference_docs": [],
-                    "follow_up_questions": ["다시 질문하기", "시스템 재시작하기", "다른 방식으로 질문하기"]
+                    "content": "❌ 시스템이 아직 초기화되지 않았습니다. 잠시 후 다시 시도해주세요.",
+                    "reference_ids": [],
+                    # 오류 응답에는 추천 질문을 표시하지 않음 (클릭하면 규정 질문으로 전송되므로)
+                    "follow_up_questions": [],
                 })
-                if DEBUG_MODE:
-                    with st.expander("🔍 디버그 정보"):
-                        st.code(traceback.format_exc(), language="python")
+            else:
+                answer = result["answer"]
             
-            # 처리 후 페이지 새로고침
-            st.rerun()
+                # 검색 결과 - 답변 생성에 사용된 문서의 청크 ID만 저장 (본문은 공유 인덱스에서 조회)
+                reference_ids = [doc["id"] for doc in result["source_documents"]]
+            
+                # 대화 히스토리에 현재 질문-답변 쌍 추가 (최근 턴만 유지)
+                get_session_store().append_turn(session, current_question, answer)
+            
+                # 메시지 저장 (참고 문서 정보 포함, 검색 결과가 없으면 빈 목록)
+                get_session_store().add_message(st.session_state.session_id, session, {
+                    "role": "assistant", 
+                    "content": answer,
+                    "reference_ids": reference_ids,
+                    # 답변과 같은 구조화된 응답으로 받은 후속 질문
+                    "follow_up_questions": result.get("follow_up_questions", []),
+                    # 실제로 검색에 적용된 규정 필터 (자동 추론 포함)
+                    "regulations": (result.get("filters") or {}).get("regulations", []),
+                    "unverified_citations": [
+                        describe_citation(item) for item in (result.get("grounding") or {}).get("flagged", [])
+                    ],
+                })
+        
+        except Exception as e:
+            from answer_client import AnswerServiceError
+            # 답변 서비스가 보낸 오류는 이미 사용자에게 표시할 메시지임
+            error_message = str(e) if isinstance(e, AnswerServiceError) else f"검색 및 답변 생성 중 오류가 발생했습니다: {str(e)}"
+            st.error(error_message)
+            get_session_store().add_message(st.session_state.session_id, session, {
+                "role": "assistant", 
+                "content": f"❌ {error_message}",
+                "reference_ids": [],
+                "follow_up_questions": [],
+            })
+            if DEBUG_MODE:
+                with st.expander("🔍 디버그 정보"):
+                    st.code(traceback.format_exc(), language="python")
+        
+        # 처리 후 페이지 새로고침
+        st.rerun()
 
 st.markdown('</div>', unsafe_allow_html=True)
 
+RERUN_PROFILE.mark("chat_input")
 # 채팅 입력 처리 (마지막에 렌더링)
 chat_input = st.chat_input("KAIST 규정에 대해 궁금한 점을 물어보세요")
 if chat_input:
-    # 시스템 초기화 확인
-    if "qa" not in st.session_state or "retriever" not in st.session_state:
-        st.error("시스템이 아직 초기화되지 않았습니다. 페이지를 새로고침 후 다시 시도해주세요.")
-    else:
-        if add_user_message(chat_input):
-            st.rerun()
+    # 파이프라인이 아직 준비 중이면 답변 생성 단계에서 기다림
+    if add_user_message(chat_input):
+        st.rerun()
 
-# 벡터DB 생성/로드 부분은 여기서 처리
-try:
-    # 벡터DB가 없으면 생성, 있으면 로드
-    need_rebuild = force_rebuild or should_rebuild_vectordb()
-    
-    if need_rebuild:
-        docs = []
-        for filename in os.listdir(HWP_DIR):
-            if filename.endswith('.hwp'):
-                try:
-                    file_path = os.path.join(HWP_DIR, filename)
-                    loader = HWPLoader(file_path)
-                    file_docs = loader.load()
-                    docs.extend(file_docs)
-                except Exception as e:
-                    st.error(f"HWP 파일 로드 실패 ({filename}): {str(e)}")
-                    continue
-        
-        if not docs:
-            st.error("로드된 문서가 없습니다. HWP 파일이 올바른지 확인하세요.")
-            st.stop()
-        
-        try:
-            splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-            splits = splitter.split_documents(docs)
-        except Exception as e:
-            st.error(f"문서 분할 실패: {str(e)}")
-            st.stop()
-        
-        try:
-            embeddings = OpenAIEmbeddings(
-                openai_api_key=openai.api_key,
-                openai_api_base=openai.api_base,
-                model=OPENAI_EMBEDDING_MODEL
-            )
-            # 메타데이터에 임베딩 정보 추가
-            embedding_info_str = json.dumps({"type": "openai", "provider": "standard", "model": OPENAI_EMBEDDING_MODEL})
-            metadata = {"embedding_info": embedding_info_str}
-            # 벡터DB 생성
-            db = Chroma.from_documents(
-                documents=splits, 
-                embedding=embeddings, 
-                persist_directory=CHROMA_DIR,
-                collection_metadata={"embedding_info": embedding_info_str}
-            )
-            db.persist()
-            # 메타데이터 파일로 저장
-            with open(os.path.join(CHROMA_DIR, "embedding_info.json"), "w") as f:
-                json.dump({"type": "openai", "provider": "standard", "model": OPENAI_EMBEDDING_MODEL}, f)
-            st.success(f"벡터DB 생성 완료! 총 {len(splits)}개 문서 조각이 임베딩되었습니다.")
-        except Exception as e:
-            st.error(f"벡터DB 생성 실패: {str(e)}")
-            if DEBUG_MODE:
-                import traceback
-                st.code(traceback.format_exc(), language="python")
-            st.stop()
-    else:
-        # 이전에 사용한 임베딩 정보 로드
-        embedding_info_path = os.path.join(CHROMA_DIR, "embedding_info.json")
-        if os.path.exists(embedding_info_path):
-            try:
-                with open(embedding_info_path, "r") as f:
-                    saved_embedding_info = json.load(f)
-                # 사용자에게 저장된 임베딩 정보 안내
-                if saved_embedding_info["type"] != "openai":
-                    st.warning(f"주의: 벡터DB는 {saved_embedding_info['type']} 임베딩으로 생성되었으나, 현재 openai 임베딩을 선택하셨습니다. 검색 결과가 정확하지 않을 수 있습니다.")
-            except Exception as e:
-                st.warning(f"임베딩 정보 로드 실패: {e}. 기본 임베딩을 사용합니다.")
-                saved_embedding_info = None
-        else:
-            st.warning("임베딩 정보 파일을 찾을 수 없습니다. 벡터DB를 재생성하는 것이 좋습니다.")
-            saved_embedding_info = None
-        try:
-            embeddings = OpenAIEmbeddings(
-                openai_api_key=openai.api_key,
-                openai_api_base=openai.api_base,
-                model=OPENAI_EMBEDDING_MODEL
-            )
-            db = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-        except Exception as e:
-            st.error(f"벡터DB 로드 실패: {str(e)}")
-            if DEBUG_MODE:
-                import traceback
-                st.code(traceback.format_exc(), language="python")
-            st.stop()
-    try:
-        retriever = db.as_retriever(search_kwargs={"k": 3})
-        @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-        def create_llm_with_retry():
-            return ChatOpenAI(
-                temperature=0,
-                openai_api_key=openai.api_key,
-                openai_api_base=openai.api_base,
-                model_name=OPENAI_MODEL,
-                request_timeout=60,
-                http_client=httpx.Client(verify=False),
-            )
-        llm = create_llm_with_retry()
-        # --- System Prompt 추가 ---
-        system_message = SystemMessagePromptTemplate.from_template(
-            "너는 KAIST 회계규정에 대한 질문 및 답변을 전문적으로 처리하는 챗봇이야. 항상 친절하고 정확하게 답변해줘. "
-            "답변할 때는 반드시 참고한 규정 내용이나 조항을 명시적으로 언급하고, 가능한 경우 규정명이나 조항 번호도 함께 언급해줘. "
-            "확실하지 않거나 규정에 명시되지 않은 내용에 대해서는 '이 부분은 규정에 명확히 명시되어 있지 않습니다'라고 솔직하게 답변해줘. 추측하지 말고 알고 있는 내용만 답변해. "
-            "답변은 마크다운을 활용해 다음과 같이 구성해줘:\n\n"
-            "질문에 대한 직접적인 답변을 여기에 작성해줘. 핵심을 간결하고 명확하게 설명해.\n\n"
-            "관련 규정 설명과 출처를 여기에 간결하게 명시해줘. 규정명, 조항 번호 등을 구체적으로 포함해. 이 부분은 작게 작성하고 너무 길지 않게 해."
-        )
-        human_message = HumanMessagePromptTemplate.from_template(
-            "다음 맥락 정보를 바탕으로 질문에 답변해주세요. 맥락 정보에서 참고한 규정 출처를 반드시 답변에 포함해주세요.\n\n"
-            "맥락: {context}\n\n"
-            "질문: {question}\n\n"
-            "이전 대화: {chat_history}\n\n"
-            "참고: \n"
-            "- 답변은 마크다운을 활용해 만드세요. 중요 내용은 **볼드체**로 강조하세요.\n"
-            "- 답변에 규정 출처(규정명, 조항 등)를 반드시 포함하세요.\n"
-            "- 답변에 규정 출처(규정명, 조항 등)는 기울임채로, 작은 글씨로 답변하세요.\n"
-            "- 확실하지 않은 내용은 추측하지 말고 명확히 모른다고 답변하세요.\n"
-            "- 답변 마지막에는 반드시 다음 형식으로 사용자가 질문과 답변 내용과 관련된 후속 질문 3개를 제안해주세요:\n\n"
-            "#### 추천 질문\n"
-            "1. [첫 번째 관련 질문]\n"
-            "2. [두 번째 관련 질문]\n"
-            "3. [세 번째 관련 질문]"
-        )
-        prompt = ChatPromptTemplate.from_messages([system_message, human_message])
-        
-        # 대화 메모리 생성
-        memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True, output_key="answer")
-        
-        # ConversationalRetrievalChain 생성
-        qa = ConversationalRetrievalChain.from_llm(
-            llm=ChatOpenAI(
-                temperature=0,
-                openai_api_key=openai.api_key,
-                openai_api_base=openai.api_base,
-                model_name=OPENAI_MODEL,
-                request_timeout=60,
-                http_client=httpx.Client(verify=False),
-            ),
-            retriever=retriever,
-            combine_docs_chain_kwargs={"prompt": prompt},
-            memory=memory,
-            return_source_documents=True,
-            return_generated_question=True,
-            verbose=DEBUG_MODE
-        )
-        # qa 변수를 session_state에 할당
-        st.session_state.qa = qa
-        
+RERUN_PROFILE.mark("notices")
+# 초기화 결과 안내 (백그라운드 초기화가 끝난 경우에만)
+if not SETTINGS["ANSWER_SERVICE_URL"]:
+    pipeline = get_pipeline_swapper(CHROMA_DIR).poll()
+    # 세션마다 인덱스 버전별로 한 번만 표시
+    if pipeline is not None and st.session_state.get("pipeline_notices_shown") != pipeline["index_version"]:
+        st.session_state.pipeline_notices_shown = pipeline["index_version"]
+        for level, notice in pipeline["notices"]:
+            getattr(st, level)(notice)
         # 디버깅용 로그
         if DEBUG_MODE:
             st.write(f"[DEBUG] QA 모델이 초기화되었습니다.")
-        
-        # Retriever도 session_state에 할당
-        st.session_state.retriever = retriever
-    except Exception as e:
-        st.error(f"RAG 파이프라인 생성 실패: {str(e)}")
-        if DEBUG_MODE:
-            import traceback
-            st.code(traceback.format_exc(), language="python")
-        st.stop()
-except Exception as e:
-    st.error(f"앱 실행 중 예상치 못한 오류가 발생했습니다: {str(e)}")
-    if DEBUG_MODE:
-        import traceback
-        st.code(traceback.format_exc(), language="python")
-
-# 사용자 질문과 답변을 기반으로 관련 후속 질문 생성하는 함수
-def generate_follow_up_questions(question, answer):
-    """사용자 질문과 답변을 기반으로 관련 후속 질문 생성"""
-    try:
-        # 후속 질문 생성을 위한 프롬프트
-        prompt = f"""
-        다음 질문과 답변을 참고하여, 사용자가 이어서 물어볼 만한 관련 질문 3개를 생성해주세요.
-        질문과 답변의 맥락을 유지하고, 사용자가 더 알고 싶어할 만한 내용을 다루는 질문이어야 합니다.
-        
-        사용자 질문: {question}
-        답변: {answer}
-        
-        관련 질문 3개 (간결하게):
-        """
-        
-        # 모델 사용하여 질문 생성
-        response = st.session_state.qa.combine_docs_chain.llm.predict(prompt)
-        
-        # 생성된 텍스트에서 질문 추출
-        questions = []
-        for line in response.strip().split('\n'):
-            line = line.strip()
-            # 번호 붙은 행만 추출 (1. 2. 3. 등)
-            if re.match(r'^\d+\.?\s+', line):
-                # 번호 제거하고 질문만 추출
-                question = re.sub(r'^\d+\.?\s+', '', line).strip()
-                if question and len(question) > 10:
-                    questions.append(question)
-            
-        # 최대 3개 질문 반환
-        return questions[:3]
-    except Exception as e:
-        if DEBUG_MODE:
-            st.error(f"후속 질문 생성 실패: {str(e)}")
-        # 오류 시 빈 리스트 반환
-        return []
+
+RERUN_PROFILE.finish()
@@ -0,0 +1,220 @@
+"""
+질문 일괄 처리 (감사 체크리스트 등 대량 질의)
+
+CSV(question 열, 선택적으로 id 열) 또는 JSONL({"id", "question"}) 파일의 질문을 읽어
+질문 임베딩은 배치로 계산해 검색하고, 답변 생성은 동시 실행 수를 제한해 병렬로 처리한다.
+결과(답변, 참고 조각, 항목별 소요 시간)는 완료되는 대로 JSONL 파일에 한 줄씩 추가하며,
+중단 후 같은 명령으로 다시 실행하면 이미 성공한 항목은 건너뛰고 나머지만 처리한다.
+
+사용 예:
+    python batch_qa.py checklist.csv -o answers.jsonl
+    python batch_qa.py questions.jsonl -o answers.jsonl --concurrency 8 --regulations "회계규정,여비규정"
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from settings import load_settings
+
+# 한 번에 임베딩/검색하는 질문 수
+DEFAULT_BATCH_SIZE = 32
+# 동시에 실행하는 답변 생성 수
+DEFAULT_CONCURRENCY = 4
+
+
+def read_questions(path):
+    """[(id, 질문)] (id가 없으면 줄 번호)"""
+    items = []
+    if path.lower().endswith(".csv"):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for index, row in enumerate(csv.DictReader(f)):
+                question = (row.get("question") or "").strip()
+                if question:
+                    items.append((str(row.get("id") or index), question))
+    else:
+        with open(path, encoding="utf-8") as f:
+            for index, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get("question"):
+                    items.append((str(record.get("id", index)), record["question"].strip()))
+    return items
+
+
+def completed_ids(output_path):
+    """출력 파일에서 오류 없이 끝난 항목 ID (같은 ID가 여러 번 있으면 마지막 결과 기준)"""
+    if not os.path.exists(output_path):
+        return set()
+    status = {}
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 중단 시 마지막 줄이 잘렸을 수 있음
+                continue
+            status[record["id"]] = "error" not in record
+    return {item_id for item_id, ok in status.items() if ok}
+
+
+def citation(doc, with_content):
+    from rag_pipeline import source_label
+
+    entry = {"id": doc.id, "label": source_label(doc.metadata or {}), "metadata": doc.metadata or {}}
+    if with_content:
+        entry["content"] = doc.page_content
+    return entry
+
+
+def answer_item(pipeline, item_id, question, docs, filters, retrieve_ms, with_content):
+    """검색이 끝난 항목의 답변을 생성하여 출력 레코드를 반환 (예외는 레코드에 기록)"""
+    from rag_pipeline import build_inputs, generate, check_grounding, choose_route
+
+    record = {
+        "id": item_id,
+        "question": question,
+        "citations": [citation(doc, with_content) for doc in docs],
+        "filters": filters,
+        "timings": {"retrieve_ms": retrieve_ms},
+    }
+    started = time.perf_counter()
+    try:
+        route = choose_route(pipeline, question, docs, filters)
+        output = generate(pipeline, build_inputs(question, docs), route=route, docs=docs)
+        record["route"] = route
+        record["model"] = output["model"]
+        record["answer"] = output["answer"]
+        record["follow_up_questions"] = output["follow_up_questions"]
+        record["usage"] = output["usage"]
+        # 모델이 밝힌 인용은 본문 인용과 함께 검증 결과에 포함됨
+        record["grounding"] = check_grounding(pipeline, output, docs)
+    except Exception as e:
+        record["error"] = str(e)
+    record["timings"]["generate_ms"] = (time.perf_counter() - started) * 1000
+    return record
+
+
+def run(pipeline, items, output_path, batch_size, concurrency, regulations=None, with_content=True, log=print):
+    """pending 항목을 처리하여 출력 파일에 추가하고 (성공 수, 실패 수, 생성 시간 목록)을 반환"""
+    from rag_pipeline import retrieve_batch
+
+    succeeded, failed, generate_ms = 0, 0, []
+    started = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-qa") as executor:
+        in_flight = set()
+
+        def write(record):
+            nonlocal succeeded, failed
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            # 중단되어도 완료된 항목은 남도록 한 줄마다 기록
+            out.flush()
+            if "error" in record:
+                failed += 1
+            else:
+                succeeded += 1
+
+        def report():
+            total = succeeded + failed
+            elapsed = time.perf_counter() - started
+            log(f"[{total}/{len(items)}] 성공 {succeeded}, 실패 {failed}, "
+                f"남은 시간 약 {elapsed / total * (len(items) - total):.0f}초")
+
+        def drain(block):
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED, timeout=None if block else 0)
+            if not done:
+                return
+            for future in done:
+                in_flight.discard(future)
+                record = future.result()
+                write(record)
+                generate_ms.append(record["timings"]["generate_ms"])
+            report()
+
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            batch_started = time.perf_counter()
+            try:
+                results = retrieve_batch(pipeline, [question for _, question in batch], regulations)
+            except Exception as e:
+                # 검색 실패(임베딩 API 오류 등)는 배치의 항목마다 오류로 기록하여 다시 실행하면 재시도
+                retrieve_ms = (time.perf_counter() - batch_started) * 1000 / len(batch)
+                for item_id, question in batch:
+                    write({
+                        "id": item_id,
+                        "question": question,
+                        "error": f"검색 실패: {e}",
+                        "timings": {"retrieve_ms": retrieve_ms},
+                    })
+                report()
+                continue
+            # 배치 검색 시간을 항목 수로 나누어 항목별 검색 시간으로 기록
+            retrieve_ms = (time.perf_counter() - batch_started) * 1000 / len(batch)
+            for (item_id, question), (docs, filters) in zip(batch, results):
+                in_flight.add(executor.submit(
+                    answer_item, pipeline, item_id, question, docs, filters, retrieve_ms, with_content
+                ))
+            # 검색 결과가 메모리에 쌓이지 않도록 생성 대기열을 동시 실행 수의 두 배로 제한
+            while len(in_flight) > concurrency * 2:
+                drain(block=True)
+            drain(block=False)
+        while in_flight:
+            drain(block=True)
+    return succeeded, failed, generate_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="질문 파일 일괄 답변")
+    parser.add_argument("input", help="질문 CSV(question 열) 또는 JSONL 파일")
+    parser.add_argument("-o", "--output", required=True, help="결과 JSONL 파일 (있으면 이어서 처리)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--regulations", default=None,
+                        help="검색할 규정명 (쉼표 구분, 생략하면 질문별 자동 추론, 빈 문자열이면 전체)")
+    parser.add_argument("--no-content", action="store_true", help="참고 조각 본문은 저장하지 않음")
+    args = parser.parse_args()
+
+    items = read_questions(args.input)
+    done = completed_ids(args.output)
+    pending = [(item_id, question) for item_id, question in items if item_id not in done]
+    print(f"질문 {len(items)}개 중 완료 {len(items) - len(pending)}개, 처리할 항목 {len(pending)}개")
+    if not pending:
+        return
+
+    from rag_pipeline import init_pipeline
+
+    settings = load_settings()
+    settings["READ_ONLY_INDEX"] = True
+    pipeline = init_pipeline(settings)
+    print(f"인덱스 버전: {pipeline['index_version']}")
+
+    regulations = None
+    if args.regulations is not None:
+        regulations = [name.strip() for name in args.regulations.split(",") if name.strip()]
+
+    started = time.perf_counter()
+    succeeded, failed, generate_ms = run(
+        pipeline, pending, args.output, args.batch_size, args.concurrency,
+        regulations=regulations, with_content=not args.no_content,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"완료: 성공 {succeeded}개, 실패 {failed}개, {elapsed:.1f}초 ({len(pending) / elapsed:.2f} 질문/초)")
+    if generate_ms:
+        ordered = sorted(generate_ms)
+        print(f"생성 시간 p50 {statistics.median(ordered):.0f} ms, "
+              f"p95 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]:.0f} ms")
+    if failed:
+        print("실패한 항목은 같은 명령으로 다시 실행하면 재시도합니다.")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+모델 API 호출 기록/재생 (httpx transport)
+
+채팅/임베딩 클라이언트 아래에서 요청-응답 쌍(스트리밍 응답은 조각과 도착 시각까지)을 카세트 파일에
+기록하고, 재생 모드에서는 네트워크 없이 기록된 응답을 돌려준다. 같은 질문 세트로 답변 경로 전체를
+게이트웨이 비용/지연/비결정성 없이 반복 실행(회귀 비교, 프로파일링)하기 위한 것이다.
+
+- 요청은 메서드, 경로, 정렬된 JSON 본문의 해시로 구분하며 인증 헤더는 기록하지 않는다.
+- 같은 요청이 여러 번 기록되면 재생 시 기록된 순서대로 돌려주고, 다 쓰면 마지막 응답을 반복한다.
+- 카세트 파일은 gzip으로 압축한 JSON 하나이며, 기록 모드에서는 주기적으로와 종료 시에 저장한다.
+- 재생 지연은 recorded(기록된 첫 바이트/조각 시각 재현) 또는 zero(지연 없음)
+- 재생만 할 때는 네트워크에 연결하지 않으므로 OPENAI_API_KEY에 임의의 값을 넣어도 된다.
+
+사용 예:
+    LLM_CASSETTE=runs/checklist.cassette LLM_CASSETTE_MODE=record python batch_qa.py checklist.csv -o recorded.jsonl
+    LLM_CASSETTE=runs/checklist.cassette python batch_qa.py checklist.csv -o replayed.jsonl
+"""
+import os
+import gzip
+import json
+import time
+import codecs
+import atexit
+import hashlib
+import threading
+
+import httpx
+
+MODES = ("replay", "record", "auto")
+LATENCIES = ("zero", "recorded")
+CASSETTE_VERSION = 1
+# 기록 모드에서 이 수만큼 새 응답이 쌓이면 파일에 저장
+SAVE_EVERY = 20
+
+
+def request_key(request):
+    """메서드 + 경로 + 정렬된 JSON 본문의 해시 (본문이 JSON이 아니면 원본 바이트)"""
+    body = request.content or b""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False).encode("utf-8")
+    except ValueError:
+        pass
+    digest = hashlib.sha256(request.method.encode() + b" " + request.url.path.encode() + b"\n" + body)
+    return digest.hexdigest()[:32]
+
+
+def request_summary(request):
+    """카세트를 열어 볼 때 알아볼 수 있는 요약 (모델명, 스트리밍 여부)"""
+    try:
+        body = json.loads(request.content or b"{}")
+    except ValueError:
+        body = {}
+    return {
+        "method": request.method,
+        "path": request.url.path,
+        "model": body.get("model"),
+        "stream": bool(body.get("stream")),
+    }
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+class Cassette:
+    """카세트 파일 하나 (채팅/임베딩 클라이언트가 공유)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.interactions = {}
+        self.requests = {}
+        self._cursor = {}
+        self._unsaved = 0
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            self.interactions = data.get("interactions", {})
+            self.requests = data.get("requests", {})
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.interactions.values())
+
+    def has(self, key):
+        return key in self.interactions
+
+    def next_entry(self, key):
+        """기록된 순서대로 응답 항목을 반환 (다 쓰면 마지막 항목 반복)"""
+        with self._lock:
+            entries = self.interactions.get(key)
+            if not entries:
+                raise CassetteMiss(key)
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def add(self, key, summary, entry):
+        with self._lock:
+            self.interactions.setdefault(key, []).append(entry)
+            self.requests.setdefault(key, summary)
+            self._unsaved += 1
+            save = self._unsaved >= SAVE_EVERY
+        if save:
+            self.save()
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체 (기록 중 중단되어도 이전 카세트는 유지)"""
+        with self._lock:
+            if not self._unsaved:
+                return
+            data = {"version": CASSETTE_VERSION, "interactions": self.interactions, "requests": self.requests}
+            self._unsaved = 0
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    """실제 응답 본문을 그대로 전달하면서 조각과 도착 시각(요청 시작 기준 ms)을 기록"""
+
+    def __init__(self, stream, started, on_close):
+        self._stream = stream
+        self._started = started
+        self._on_close = on_close
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.chunks = []
+
+    def __iter__(self):
+        for chunk in self._stream:
+            text = self._decoder.decode(chunk)
+            if text:
+                self.chunks.append([round((time.perf_counter() - self._started) * 1000, 1), text])
+            yield chunk
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._on_close(self.chunks)
+
+
+class _ReplayStream(httpx.SyncByteStream):
+    """기록된 조각을 (recorded 모드면 기록된 시각에 맞춰) 다시 내보냄"""
+
+    def __init__(self, chunks, realistic):
+        self._chunks = chunks
+        self._realistic = realistic
+
+    def __iter__(self):
+        started = time.perf_counter()
+        for offset_ms, text in self._chunks:
+            if self._realistic:
+                delay = offset_ms / 1000 - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield text.encode("utf-8")
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """
+    mode: replay(기록에 없으면 오류 응답), record(항상 실제 호출 후 기록), auto(기록에 있으면 재생, 없으면 기록)
+    latency: zero 또는 recorded
+    """
+
+    def __init__(self, cassette, mode="replay", latency="zero", inner=None):
+        if mode not in MODES:
+            raise ValueError(f"지원하지 않는 카세트 모드입니다: {mode} ({', '.join(MODES)})")
+        if latency not in LATENCIES:
+            raise ValueError(f"지원하지 않는 재생 지연 설정입니다: {latency} ({', '.join(LATENCIES)})")
+        self.cassette = cassette
+        self.mode = mode
+        self.realistic = latency == "recorded"
+        self._inner = inner
+
+    @property
+    def inner(self):
+        # 재생 전용이면 네트워크 transport를 만들지 않음
+        if self._inner is None:
+            self._inner = httpx.HTTPTransport(verify=False)
+        return self._inner
+
+    def handle_request(self, request):
+        request.read()
+        key = request_key(request)
+        if self.mode == "record" or (self.mode == "auto" and not self.cassette.has(key)):
+            return self._record(request, key)
+        try:
+            entry = self.cassette.next_entry(key)
+        except CassetteMiss:
+            summary = request_summary(request)
+            # 4xx는 OpenAI 클라이언트가 재시도하지 않으므로 바로 원인을 알 수 있음
+            return httpx.Response(400, json={"error": {
+                "type": "cassette_miss",
+                "message": f"카세트에 기록되지 않은 요청입니다: {summary['method']} {summary['path']} "
+                           f"(model={summary['model']}, key={key}). LLM_CASSETTE_MODE=record 또는 auto로 다시 기록하세요.",
+            }})
+        return self._replay(entry)
+
+    def _replay(self, entry):
+        if self.realistic and entry.get("ttfb_ms"):
+            time.sleep(entry["ttfb_ms"] / 1000)
+        headers = {"content-type": entry["content_type"]}
+        if "chunks" in entry:
+            # 첫 조각의 시각은 ttfb에 포함되어 있으므로 기준을 옮김
+            base = entry["chunks"][0][0] if entry["chunks"] else 0.0
+            chunks = [[offset - base, text] for offset, text in entry["chunks"]]
+            return httpx.Response(entry["status"], headers=headers, stream=_ReplayStream(chunks, self.realistic))
+        return httpx.Response(entry["status"], headers=headers, content=entry["body"].encode("utf-8"))
+
+    def _record(self, request, key):
+        # 압축되지 않은 본문을 받아 텍스트로 기록
+        request.headers["accept-encoding"] = "identity"
+        started = time.perf_counter()
+        response = self.inner.handle_request(request)
+        ttfb_ms = round((time.perf_counter() - started) * 1000, 1)
+        content_type = response.headers.get("content-type", "application/json")
+        streaming = content_type.startswith("text/event-stream")
+
+        def on_close(chunks):
+            entry = {"status": response.status_code, "content_type": content_type, "ttfb_ms": ttfb_ms}
+            if streaming:
+                entry["chunks"] = chunks
+            else:
+                entry["body"] = "".join(text for _, text in chunks)
+            # 서버 오류 응답은 재생해도 의미가 없으므로 기록하지 않음
+            if response.status_code < 500:
+                self.cassette.add(key, request_summary(request), entry)
+
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name.lower() not in ("content-length", "content-encoding", "transfer-encoding")]
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            stream=_RecordingStream(response.stream, started, on_close),
+            extensions=response.extensions,
+        )
+
+    def close(self):
+        if self._inner is not None:
+            self._inner.close()
+
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path):
+    """경로별 카세트 (같은 파일을 쓰는 클라이언트끼리 공유, 종료 시 저장)"""
+    path = os.path.abspath(path)
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(path)
+            atexit.register(cassette.save)
+        return cassette
+
+
+def transport_from_settings(settings):
+    """LLM_CASSETTE가 설정되어 있으면 기록/재생 transport, 아니면 None"""
+    if not settings.get("LLM_CASSETTE"):
+        return None
+    return CassetteTransport(
+        get_cassette(settings["LLM_CASSETTE"]),
+        mode=settings["LLM_CASSETTE_MODE"],
+        latency=settings["LLM_CASSETTE_LATENCY"],
+    )
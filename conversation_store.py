@@ -0,0 +1,108 @@
+"""
+대화 내용 영구 저장소 (SQLite WAL)
+
+메시지는 (session_id, seq) 기본키로 추가만 하며(append-only) 수정하지 않는다.
+세션 재개 시에는 최근 메시지만 읽고, 이전 대화는 요청할 때 페이지 단위로 읽는다.
+턴당 쓰기 지연 시간을 기록하여 stats()로 확인할 수 있다.
+"""
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    extra TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+# 메시지 딕셔너리 중 content/role 외에 함께 저장하는 필드
+EXTRA_FIELDS = ("reference_ids", "follow_up_questions", "regulations", "unverified_citations")
+
+# 쓰기 지연 통계에 보관하는 최근 측정값 수
+LATENCY_WINDOW = 1000
+
+
+class ConversationStore:
+    """세션별 메시지를 SQLite에 저장/조회"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._write_ms = deque(maxlen=LATENCY_WINDOW)
+        self.writes = 0
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        """스레드별 연결 (Streamlit 스크립트는 세션마다 다른 스레드에서 실행됨)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL에서는 NORMAL로도 충돌 시 손상되지 않으며 커밋마다 fsync하지 않음
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append_message(self, session_id, seq, message):
+        """메시지 한 건을 추가 (세션이 처음이면 세션 행도 생성)"""
+        extra = {field: message[field] for field in EXTRA_FIELDS if field in message}
+        now = time.time()
+        conn = self._connect()
+        # 연결 생성(스레드당 한 번)은 턴당 쓰기 지연에 포함하지 않음
+        started = time.perf_counter()
+        with self._write_lock:
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO sessions (session_id, created_at) VALUES (?, ?)",
+                    (session_id, now),
+                )
+                conn.execute(
+                    "INSERT INTO messages (session_id, seq, role, content, extra, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (session_id, seq, message["role"], message["content"],
+                     json.dumps(extra, ensure_ascii=False) if extra else None, now),
+                )
+            self._write_ms.append((time.perf_counter() - started) * 1000)
+            self.writes += 1
+
+    def load_messages(self, session_id, limit, before_seq=None):
+        """before_seq 이전(없으면 가장 최근)의 메시지를 최대 limit개, 오래된 순으로 반환"""
+        if before_seq is None:
+            before_seq = 2 ** 62
+        rows = self._connect().execute(
+            "SELECT seq, role, content, extra FROM messages "
+            "WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (session_id, before_seq, limit),
+        ).fetchall()
+        messages = []
+        for seq, role, content, extra in reversed(rows):
+            message = {"role": role, "content": content, "seq": seq}
+            if extra:
+                message.update(json.loads(extra))
+            messages.append(message)
+        return messages
+
+    def stats(self):
+        """턴당 쓰기 지연 시간 통계 (ms)"""
+        samples = sorted(self._write_ms)
+        if not samples:
+            return {"writes": self.writes, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {
+            "writes": self.writes,
+            "p50_ms": samples[len(samples) // 2],
+            "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "max_ms": samples[-1],
+        }
@@ -0,0 +1,285 @@
+"""
+임베딩 차원 축소 및 양자화 인덱스
+
+text-embedding-3 계열 임베딩(Matryoshka 표현)을 앞쪽 N차원으로 잘라 재정규화하고,
+int8/float16으로 양자화한 벡터로 1차 검색한 뒤 상위 후보만 float32 원본으로 재점수화한다.
+원본 float32 벡터는 메모리 매핑 파일로 두어 재점수화에 필요한 행만 읽는다.
+규정 필터가 주어지면 청크별 규정 코드로 대상 행을 먼저 골라 그 행만 점수를 계산한다.
+"""
+import os
+import json
+
+import numpy as np
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.documents import Document
+
+# 지원하는 저장 정밀도
+SUPPORTED_QUANTIZATIONS = ("float32", "float16", "int8")
+
+EMBEDDING_INFO_FILE = "embedding_info.json"
+QUANTIZED_INDEX_FILE = "quantized_index.npz"
+FULL_VECTORS_FILE = "vectors_f32.npy"
+
+# 1차 점수 계산 시 한 번에 복원하는 행 수 (임시 메모리 상한)
+SCORE_BLOCK_ROWS = 4096
+
+
+def truncate_and_normalize(vectors, dimensions=None):
+    """벡터를 앞쪽 dimensions 차원으로 자르고 L2 정규화한다 (1차원/2차원 모두 지원)"""
+    arr = np.asarray(vectors, dtype=np.float32)
+    if dimensions:
+        arr = arr[..., :dimensions]
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+
+def quantize(vectors, method):
+    """정규화된 float32 벡터를 지정한 정밀도로 양자화하여 (codes, scales)를 반환"""
+    if method not in SUPPORTED_QUANTIZATIONS:
+        raise ValueError(f"지원하지 않는 양자화 방식입니다: {method}")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if method == "int8":
+        # 벡터별 대칭 스케일: 최대 절대값을 127로 매핑
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    if method == "float16":
+        return vectors.astype(np.float16), None
+    return vectors, None
+
+
+class TruncatedEmbeddings(Embeddings):
+    """기존 임베딩 모델의 결과를 Matryoshka 방식으로 잘라 재정규화하는 래퍼"""
+
+    def __init__(self, base, dimensions=None):
+        self.base = base
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts):
+        vectors = self.base.embed_documents(texts)
+        if not self.dimensions:
+            return vectors
+        return truncate_and_normalize(vectors, self.dimensions).tolist()
+
+    def embed_query(self, text):
+        vector = self.base.embed_query(text)
+        if not self.dimensions:
+            return vector
+        return truncate_and_normalize(vector, self.dimensions).tolist()
+
+
+class QuantizedIndex:
+    """양자화 벡터로 1차 검색하고 float32 원본으로 상위 후보를 재점수화하는 인덱스"""
+
+    def __init__(self, ids, codes, scales, method, full_vectors=None, groups=None, group_names=()):
+        self.ids = list(ids)
+        self.codes = codes
+        self.scales = scales
+        self.method = method
+        self.full_vectors = full_vectors
+        # 청크별 규정 코드 (group_names의 인덱스, 규정 정보가 없으면 -1)
+        self.groups = groups
+        self.group_names = list(group_names)
+
+    @classmethod
+    def build(cls, ids, vectors, method, dimensions=None, regulations=None):
+        """(id, 벡터) 목록으로 인덱스를 생성 (regulations: 청크별 규정명 목록)"""
+        full = truncate_and_normalize(vectors, dimensions)
+        codes, scales = quantize(full, method)
+        groups, group_names = None, ()
+        if regulations is not None:
+            group_names = sorted({name for name in regulations if name})
+            lookup = {name: i for i, name in enumerate(group_names)}
+            groups = np.array([lookup.get(name, -1) for name in regulations], dtype=np.int16)
+        return cls(ids, codes, scales, method, full_vectors=full, groups=groups, group_names=group_names)
+
+    def save(self, directory):
+        """양자화 코드와 float32 원본을 디렉토리에 저장"""
+        arrays = {
+            "ids": np.array(self.ids),
+            "codes": self.codes,
+            "method": np.array(self.method),
+        }
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        if self.groups is not None:
+            arrays["groups"] = self.groups
+            arrays["group_names"] = np.array(self.group_names)
+        np.savez(os.path.join(directory, QUANTIZED_INDEX_FILE), **arrays)
+        if self.full_vectors is not None:
+            np.save(os.path.join(directory, FULL_VECTORS_FILE), np.asarray(self.full_vectors, dtype=np.float32))
+
+    @classmethod
+    def load(cls, directory):
+        """저장된 인덱스를 로드 (float32 원본은 메모리 매핑으로 열어 필요한 행만 읽음)"""
+        with np.load(os.path.join(directory, QUANTIZED_INDEX_FILE)) as data:
+            ids = data["ids"].tolist()
+            codes = data["codes"]
+            scales = data["scales"] if "scales" in data.files else None
+            method = str(data["method"])
+            groups = data["groups"] if "groups" in data.files else None
+            group_names = data["group_names"].tolist() if "group_names" in data.files else ()
+        full_path = os.path.join(directory, FULL_VECTORS_FILE)
+        full_vectors = np.load(full_path, mmap_mode="r") if os.path.exists(full_path) else None
+        return cls(ids, codes, scales, method, full_vectors=full_vectors, groups=groups, group_names=group_names)
+
+    @staticmethod
+    def exists(directory):
+        return os.path.exists(os.path.join(directory, QUANTIZED_INDEX_FILE))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def memory_bytes(self):
+        """검색 시 상주하는 메모리 (양자화 코드 + 스케일)"""
+        total = self.codes.nbytes
+        if self.scales is not None:
+            total += self.scales.nbytes
+        if self.groups is not None:
+            total += self.groups.nbytes
+        return total
+
+    def rows_for(self, regulations):
+        """지정한 규정에 속한 행 번호 배열 (규정 정보가 없는 인덱스면 None = 전체)"""
+        if not regulations or self.groups is None:
+            return None
+        codes = [i for i, name in enumerate(self.group_names) if name in set(regulations)]
+        return np.flatnonzero(np.isin(self.groups, codes))
+
+    def approximate_scores(self, query, rows=None):
+        """양자화 벡터 기준 내적 점수 (블록 단위로 복원하여 임시 메모리를 제한, rows가 주어지면 해당 행만)"""
+        n = len(self.ids) if rows is None else len(rows)
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SCORE_BLOCK_ROWS):
+            if rows is None:
+                block = self.codes[start:start + SCORE_BLOCK_ROWS]
+            else:
+                block = self.codes[rows[start:start + SCORE_BLOCK_ROWS]]
+            scores[start:start + SCORE_BLOCK_ROWS] = block.astype(np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+    def search(self, query, k=3, rescore_k=20, rescore=True, regulations=None):
+        """쿼리 벡터로 상위 k개의 (id, 점수)를 반환 (regulations가 주어지면 해당 규정의 청크만 검색)"""
+        rows = self.rows_for(regulations)
+        n = len(self.ids) if rows is None else len(rows)
+        if n == 0:
+            return []
+        query = truncate_and_normalize(query, self.codes.shape[1])
+        approx = self.approximate_scores(query, rows)
+
+        # 1차: 양자화 점수로 재점수화 후보 선택 (행 번호는 전체 인덱스 기준으로 변환)
+        m = min(max(rescore_k, k), n)
+        top = np.sort(np.argpartition(-approx, m - 1)[:m])
+        candidates = top if rows is None else rows[top]
+
+        # 2차: float32 원본으로 후보만 재점수화 (메모리 매핑 파일의 해당 행만 읽음)
+        if rescore and self.full_vectors is not None:
+            scores = np.asarray(self.full_vectors[candidates], dtype=np.float32) @ query
+        else:
+            scores = approx[top]
+
+        order = np.argsort(-scores)[:k]
+        return [(self.ids[candidates[i]], float(scores[i])) for i in order]
+
+
+def fetch_documents(collection, hits):
+    """(청크 ID, 점수) 목록 순서대로 Chroma 컬렉션에서 본문/메타데이터를 가져와 (문서, 점수) 목록으로 반환"""
+    if not hits:
+        return []
+    result = collection.get(ids=[chunk_id for chunk_id, _ in hits], include=["documents", "metadatas"])
+    by_id = {
+        chunk_id: (text, metadata)
+        for chunk_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+    }
+    docs = []
+    for chunk_id, score in hits:
+        if chunk_id not in by_id:
+            continue
+        text, metadata = by_id[chunk_id]
+        docs.append((Document(id=chunk_id, page_content=text, metadata=metadata or {}), score))
+    return docs
+
+
+class ChromaRetriever(BaseRetriever):
+    """Chroma 컬렉션을 직접 조회하여 청크 ID와 유사도 점수를 함께 반환하는 리트리버"""
+
+    embeddings: Any
+    collection: Any
+    k: int = 3
+
+    def search_with_scores(self, query, regulations=None):
+        return self.search_by_vector(self.embeddings.embed_query(query), regulations)
+
+    def search_by_vector(self, query_vector, regulations=None):
+        """이미 계산한 쿼리 임베딩으로 검색 (여러 질문의 임베딩을 한 번에 계산할 때 사용)"""
+        # 규정 필터는 Chroma where 조건으로 전달 (메타데이터로 후보를 먼저 좁힌 뒤 벡터 검색)
+        where = {"regulation": {"$in": list(regulations)}} if regulations else None
+        result = self.collection.query(
+            query_embeddings=[query_vector],
+            n_results=self.k,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+        docs = []
+        for chunk_id, text, metadata, distance in zip(
+            result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+        ):
+            # 정규화된 벡터의 제곱 L2 거리를 코사인 유사도로 변환
+            docs.append((Document(id=chunk_id, page_content=text, metadata=metadata or {}), 1.0 - distance / 2.0))
+        return docs
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        return [doc for doc, _ in self.search_with_scores(query)]
+
+
+class QuantizedRetriever(BaseRetriever):
+    """QuantizedIndex로 검색하고 문서 본문/메타데이터는 Chroma 컬렉션에서 가져오는 리트리버"""
+
+    index: Any
+    embeddings: Any
+    collection: Any
+    k: int = 3
+    rescore_k: int = 20
+
+    def search_with_scores(self, query, regulations=None):
+        return self.search_by_vector(self.embeddings.embed_query(query), regulations)
+
+    def search_by_vector(self, query_vector, regulations=None):
+        """이미 계산한 쿼리 임베딩으로 검색"""
+        hits = self.index.search(query_vector, k=self.k, rescore_k=self.rescore_k, regulations=regulations)
+        return fetch_documents(self.collection, hits)
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        return [doc for doc, _ in self.search_with_scores(query)]
+
+
+def build_quantized_index(collection, directory, method, dimensions=None):
+    """Chroma 컬렉션에 저장된 임베딩으로 양자화 인덱스를 생성하여 저장"""
+    data = collection.get(include=["embeddings", "metadatas"])
+    regulations = [(metadata or {}).get("regulation", "") for metadata in data["metadatas"]]
+    index = QuantizedIndex.build(data["ids"], data["embeddings"], method, dimensions, regulations=regulations)
+    index.save(directory)
+    return index
+
+
+def save_embedding_info(directory, info):
+    """임베딩 설정(모델, 차원, 양자화)을 embedding_info.json에 기록"""
+    with open(os.path.join(directory, EMBEDDING_INFO_FILE), "w") as f:
+        json.dump(info, f)
+
+
+def load_embedding_info(directory) -> Optional[dict]:
+    """embedding_info.json을 읽어 반환 (없으면 None)"""
+    path = os.path.join(directory, EMBEDDING_INFO_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
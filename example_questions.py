@@ -0,0 +1,14 @@
+"""사이드바 예시 질문 (부하 테스트 등 다른 도구도 같은 목록을 사용)"""
+
+EXAMPLE_QUESTIONS = [
+    "법인카드로 지출한 금액은 어떤 증빙서류가 필요하고, 정산 기한은 언제까지인가요?",
+    "출장 중 식비와 숙박비는 각각 얼마까지 인정되며, 기준 금액을 초과하면 어떻게 되나요?",
+    "상품권을 구매한 경우, 비용 처리 시 어떤 제한이 있고 어떤 서류가 필요하나요?",
+    "과세 항목과 비과세 항목을 구분하는 기준은 무엇이며, 대표적인 예시는 어떤 게 있나요?",
+    "같은 항목으로 중복 지출이 발생한 경우 어떻게 처리되고, 환수 대상이 될 수 있나요?",
+    "강의료나 연구수당 등 인건비 항목은 어떤 소득유형으로 분류되며, 세율은 얼마인가요?",
+    "사적 용도 또는 가족 명의 계좌로 지급된 지출은 어떤 절차로 확인되며, 문제가 될 경우 조치는 무엇인가요?",
+    "연말 또는 회계연도 말에 몰아서 지출한 경우 규정상 문제가 될 수 있나요?",
+    "비용 지출 시 카드 사용이 필수인가요, 아니면 현금 정산도 가능한가요?",
+    "지출 예정일 전에 선지급이 필요한 경우 어떤 조건과 절차를 따라야 하나요?"
+]
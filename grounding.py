@@ -0,0 +1,189 @@
+"""
+답변 인용 검증 (추가 LLM 호출 없이 로컬에서 수행)
+
+답변에서 규정명과 조항 번호(제N조, 제N조의M) 인용을 추출하여
+1) 검색된 참고 조각에 해당 조항이 있는지, 2) 없다면 벡터DB 생성 시 만든 조항 색인에 존재하는 조항인지
+확인한다. 참고 조각에 없는 인용은 표시 대상으로 분류하며, 색인에도 없는 조항은 지어낸 인용일 가능성이 높다.
+"""
+import os
+import re
+import json
+import time
+
+ARTICLE_INDEX_FILE = "article_index.json"
+
+# 조항 인용: 제12조, 제 12 조의 2
+ARTICLE_REF_RE = re.compile(r"제\s*(\d+)\s*조(?:\s*의\s*(\d+))?")
+# 조항 제목: 줄 맨 앞의 "제N조(제목)" (regulation_meta.ARTICLE_RE와 같은 형식,
+# regulation_meta는 LangChain을 import하므로 앱 시작 경로에서 가져오지 않음)
+ARTICLE_HEADING_RE = re.compile(r"^\s*제\s*(\d+)\s*조(?:\s*의\s*(\d+))?\s*\([^)\n]{1,60}\)", re.M)
+# 규정명 인용: 회계규정, 「여비규정」 (띄어쓰기 없는 한 단어)
+# '기준'은 지급기준/산정기준 같은 일반 명사와 구분되지 않으므로 규정명 접미사로 보지 않음
+REGULATION_REF_RE = re.compile(r"([가-힣A-Za-z0-9·]{2,30}(?:규정|규칙|세칙|지침|요령))")
+# 특정 규정을 가리키지 않는 표현
+GENERIC_REGULATIONS = {"이규정", "본규정", "동규정", "관련규정", "해당규정", "다른규정", "세부규정", "내부규정", "위규정"}
+# 조항 인용과 같은 문장에서 이 거리(글자 수) 안에 앞서 나온 규정명을 해당 조항의 규정으로 봄
+REGULATION_WINDOW = 40
+
+# 검증 결과
+SUPPORTED = "supported"                # 참고 조각에 있는 조항
+NOT_RETRIEVED = "not_retrieved"        # 존재하는 조항이지만 참고 조각에는 없음
+UNKNOWN_ARTICLE = "unknown_article"    # 색인에 없는 조항 (지어낸 인용 가능성)
+UNKNOWN_REGULATION = "unknown_regulation"
+FLAGGED_STATUSES = (NOT_RETRIEVED, UNKNOWN_ARTICLE, UNKNOWN_REGULATION)
+
+
+def normalize_name(name):
+    return re.sub(r"[\s「」『』\"'“”]", "", name or "")
+
+
+def article_id(number, sub=None):
+    return f"제{int(number)}조" + (f"의{int(sub)}" if sub else "")
+
+
+def normalize_article(text):
+    match = ARTICLE_REF_RE.search(text or "")
+    return article_id(*match.groups()) if match else ""
+
+
+class ArticleIndex:
+    """규정명 → 조항 ID 집합 (벡터DB 생성 시 조항 메타데이터로 생성)"""
+
+    def __init__(self, articles):
+        self.articles = {normalize_name(name): set(ids) for name, ids in articles.items()}
+        self.names = {normalize_name(name): name for name in articles}
+
+    @classmethod
+    def from_documents(cls, docs):
+        articles = {}
+        for doc in docs:
+            metadata = doc.metadata or {}
+            name = metadata.get("regulation")
+            if not name:
+                continue
+            ids = articles.setdefault(name, set())
+            if metadata.get("article"):
+                ids.add(normalize_article(metadata["article"]))
+        return cls(articles)
+
+    def save(self, directory):
+        data = {self.names[key]: sorted(ids) for key, ids in self.articles.items()}
+        with open(os.path.join(directory, ARTICLE_INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, directory):
+        """저장된 색인을 로드 (없으면 None)"""
+        path = os.path.join(directory, ARTICLE_INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match_regulations(self, cited):
+        """인용된 규정명과 일치하는 색인 규정 키 목록 (약칭/부분 이름 허용)"""
+        key = normalize_name(cited)
+        if key in self.articles:
+            return [key]
+        return [name for name in self.articles if key in name or name in key]
+
+    def has_article(self, regulation_keys, article):
+        keys = regulation_keys if regulation_keys is not None else self.articles.keys()
+        return any(article in self.articles.get(key, ()) for key in keys)
+
+
+def extract_citations(answer):
+    """답변에서 (규정명 또는 None, 조항 ID) 인용 목록을 추출 (중복 제거, 나온 순서)"""
+    regulations = []
+    for match in REGULATION_REF_RE.finditer(answer):
+        if normalize_name(match.group(1)) not in GENERIC_REGULATIONS:
+            regulations.append((match.start(), match.end(), match.group(1)))
+    citations = []
+    for match in ARTICLE_REF_RE.finditer(answer):
+        article = article_id(*match.groups())
+        regulation = None
+        for start, end, name in reversed(regulations):
+            if end > match.start():
+                continue
+            between = answer[end:match.start()]
+            if match.start() - end <= REGULATION_WINDOW and not re.search(r"[.\n]", between):
+                regulation = name
+            break
+        if (regulation, article) not in citations:
+            citations.append((regulation, article))
+    return citations
+
+
+def _chunk_articles(doc):
+    """
+    참고 조각이 담고 있는 (규정명, 조항) 집합 (메타데이터의 조항 + 본문의 조항 제목).
+    본문 중의 "제5조에 따라" 같은 참조는 해당 조항 내용이 아니므로 포함하지 않는다.
+    """
+    metadata = doc.metadata or {}
+    regulation = normalize_name(metadata.get("regulation", ""))
+    articles = set()
+    if metadata.get("article"):
+        articles.add(normalize_article(metadata["article"]))
+    for match in ARTICLE_HEADING_RE.finditer(doc.page_content):
+        articles.add(article_id(*match.groups()))
+    return regulation, articles
+
+
+def verify_answer(answer, docs, article_index=None, declared=()):
+    """
+    답변의 조항 인용을 검증하여 보고서를 반환.
+    declared: 모델이 구조화된 응답의 citations로 밝힌 (규정명, 조항) 목록 (본문 인용과 합쳐 검증)
+    {"citations": [{"regulation", "article", "status"}], "flagged": [...], "elapsed_ms"}
+    """
+    started = time.perf_counter()
+    chunks = [_chunk_articles(doc) for doc in docs]
+    citations = extract_citations(answer)
+    for regulation, article in declared:
+        article = normalize_article(article)
+        if not article:
+            continue
+        if (regulation, article) in citations or (regulation is None and any(a == article for _, a in citations)):
+            continue
+        if (None, article) in citations:
+            # 본문에서 규정명 없이 인용한 조항은 모델이 밝힌 규정명으로 구체화
+            citations[citations.index((None, article))] = (regulation, article)
+        else:
+            citations.append((regulation, article))
+    results = []
+    for regulation, article in citations:
+        cited_key = normalize_name(regulation) if regulation else None
+
+        def same_regulation(chunk_regulation):
+            return cited_key is None or cited_key in chunk_regulation or (chunk_regulation and chunk_regulation in cited_key)
+
+        if any(same_regulation(chunk_regulation) and article in articles for chunk_regulation, articles in chunks):
+            status = SUPPORTED
+        elif article_index is None:
+            # 색인이 없는 기존 벡터DB에서는 존재 여부를 알 수 없음
+            status = NOT_RETRIEVED
+        else:
+            keys = article_index.match_regulations(regulation) if regulation else None
+            if keys == []:
+                status = UNKNOWN_REGULATION
+            elif article_index.has_article(keys, article):
+                status = NOT_RETRIEVED
+            else:
+                status = UNKNOWN_ARTICLE
+        results.append({"regulation": regulation, "article": article, "status": status})
+    flagged = [item for item in results if item["status"] in FLAGGED_STATUSES]
+    return {
+        "citations": results,
+        "flagged": flagged,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def describe(citation):
+    """화면 표시용 인용 문자열"""
+    label = " ".join(filter(None, [citation["regulation"], citation["article"]]))
+    reason = {
+        NOT_RETRIEVED: "참고 문서에 없음",
+        UNKNOWN_ARTICLE: "존재하지 않는 조항",
+        UNKNOWN_REGULATION: "알 수 없는 규정",
+    }.get(citation["status"], "")
+    return f"{label} ({reason})" if reason else label
@@ -0,0 +1,202 @@
+"""
+HWP 파싱 결과 디스크 캐시
+
+HWP 파싱은 벡터DB 생성에서 가장 느린 CPU 단계이므로, 파일 내용 해시와 로더 버전을 키로
+추출된 문서(텍스트와 메타데이터)를 저장해 두고 재생성/분할 실험 시 다시 파싱하지 않는다.
+전체 크기가 상한을 넘으면 가장 오래 사용하지 않은 항목부터 제거한다.
+
+사용 예:
+    python hwp_cache.py stats              # 항목 수, 크기, 절약된 파싱 시간
+    python hwp_cache.py evict --max-mb 100
+    python hwp_cache.py clear
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+
+from settings import BASE_DIR
+
+CACHE_DIR = os.path.join(BASE_DIR, '.hwp_cache')
+# 캐시 항목 형식이 바뀌면 올려서 기존 항목을 무효화
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+META_SUFFIX = ".meta.json"
+DATA_SUFFIX = ".docs.json"
+
+
+def loader_version():
+    """캐시 키에 포함할 HWP 로더 버전 (로더가 바뀌면 다시 파싱)"""
+    try:
+        from importlib.metadata import version
+        teddynote = version("langchain-teddynote")
+    except Exception:
+        teddynote = "unknown"
+    return f"{CACHE_FORMAT_VERSION}:langchain-teddynote=={teddynote}"
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path, value):
+    # 다른 프로세스가 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class HwpCache:
+    """파일 내용 해시 + 로더 버전 키로 파싱된 문서를 저장하는 디스크 캐시"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = loader_version()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, file_path):
+        return hashlib.sha256(f"{file_digest(file_path)}:{self.version}".encode()).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + META_SUFFIX, base + DATA_SUFFIX
+
+    def load_documents(self, file_path, parse):
+        """
+        캐시에 있으면 저장된 문서를, 없으면 parse(file_path)로 파싱한 뒤 저장하여 반환.
+        (문서 목록, 캐시 적중 여부)를 반환한다.
+        """
+        from langchain_core.documents import Document
+
+        key = self.key_for(file_path)
+        meta_path, data_path = self._paths(key)
+        if os.path.exists(meta_path) and os.path.exists(data_path):
+            try:
+                with open(data_path, encoding="utf-8") as f:
+                    records = json.load(f)
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                meta["hits"] += 1
+                meta["last_used"] = time.time()
+                _write_json(meta_path, meta)
+                docs = [
+                    # 같은 내용의 파일이 다른 경로에 있어도 현재 경로를 출처로 사용
+                    Document(page_content=r["page_content"], metadata={**r["metadata"], "source": file_path})
+                    for r in records
+                ]
+                return docs, True
+            except (OSError, ValueError, KeyError):
+                # 손상된 항목은 다시 파싱하여 덮어씀
+                pass
+
+        started = time.perf_counter()
+        docs = parse(file_path)
+        parse_seconds = time.perf_counter() - started
+
+        records = [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs]
+        _write_json(data_path, records)
+        _write_json(meta_path, {
+            "source": os.path.basename(file_path),
+            "loader_version": self.version,
+            "parse_seconds": parse_seconds,
+            "size": os.path.getsize(data_path),
+            "hits": 0,
+            "created_at": time.time(),
+            "last_used": time.time(),
+        })
+        self.evict()
+        return docs, False
+
+    def entries(self):
+        """(키, 메타데이터) 목록"""
+        result = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(META_SUFFIX):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, name), encoding="utf-8") as f:
+                    result.append((name[:-len(META_SUFFIX)], json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return result
+
+    def remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self, max_bytes=None):
+        """전체 크기가 상한 이하가 될 때까지 오래 사용하지 않은 항목부터 제거하고 제거한 수를 반환"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries(), key=lambda item: item[1].get("last_used", 0))
+        total = sum(meta.get("size", 0) for _, meta in entries)
+        removed = 0
+        for key, meta in entries:
+            if total <= max_bytes:
+                break
+            self.remove(key)
+            total -= meta.get("size", 0)
+            removed += 1
+        return removed
+
+    def clear(self):
+        for key, _ in self.entries():
+            self.remove(key)
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(meta.get("size", 0) for _, meta in entries),
+            "hits": sum(meta.get("hits", 0) for _, meta in entries),
+            "parse_seconds": sum(meta.get("parse_seconds", 0) for _, meta in entries),
+            # 적중할 때마다 원래 파싱 시간만큼 절약
+            "saved_seconds": sum(meta.get("hits", 0) * meta.get("parse_seconds", 0) for _, meta in entries),
+            "stale": sum(1 for _, meta in entries if meta.get("loader_version") != self.version),
+            "files": sorted(
+                ((meta.get("source", key), meta.get("hits", 0), meta.get("parse_seconds", 0)) for key, meta in entries),
+                key=lambda item: -item[1] * item[2],
+            ),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HWP 파싱 결과 캐시 관리")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="캐시 통계와 절약된 파싱 시간")
+    evict = sub.add_parser("evict", help="크기 상한을 넘는 오래된 항목 제거")
+    evict.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024)
+    sub.add_parser("clear", help="모든 항목 제거")
+    args = parser.parse_args()
+
+    cache = HwpCache(args.cache_dir)
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"항목 {stats['entries']}개, {stats['bytes'] / 1024 / 1024:.1f} MB "
+              f"(이전 로더 버전 {stats['stale']}개)")
+        print(f"적중 {stats['hits']}회, 최초 파싱 {stats['parse_seconds']:.1f}초, "
+              f"절약된 파싱 시간 {stats['saved_seconds']:.1f}초")
+        for source, hits, seconds in stats["files"][:20]:
+            print(f"    {source:<40} 적중 {hits:>4}회 x {seconds:>6.2f}초")
+    elif args.command == "evict":
+        removed = cache.evict(int(args.max_mb * 1024 * 1024))
+        print(f"{removed}개 항목을 제거했습니다.")
+    elif args.command == "clear":
+        cache.clear()
+        print("캐시를 비웠습니다.")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+"""
+버전별 벡터DB 디렉토리와 활성 버전 전환
+
+새 인덱스는 CHROMA_DIR/versions/<버전>/ 에 기존 인덱스와 나란히 생성하고, 생성이 끝나면
+ACTIVE 포인터 파일을 os.replace로 원자적으로 교체하여 활성화한다. 생성 중이거나 실패해도
+기존 버전은 그대로 서비스되며, 이전 버전으로 롤백할 수 있다.
+ACTIVE 파일이 없고 CHROMA_DIR에 직접 저장된 인덱스가 있으면 이를 'legacy' 버전으로 취급한다.
+
+사용 예:
+    python index_versions.py list
+    python index_versions.py activate 20250301-120000-ab12cd
+    python index_versions.py rollback
+    python index_versions.py prune --keep 3
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: flock 대신 msvcrt의 바이트 범위 잠금을 사용
+    fcntl = None
+    import msvcrt
+
+from settings import CHROMA_DIR
+
+LEGACY_VERSION = "legacy"
+VERSIONS_DIR = "versions"
+ACTIVE_FILE = "ACTIVE"
+HISTORY_FILE = "ACTIVE.history"
+# 인덱스 생성 잠금 파일 (여러 프로세스가 동시에 생성하지 않도록 flock/msvcrt 잠금을 검, 내용은 참고용 PID)
+BUILD_LOCK_FILE = "BUILD.lock"
+# 생성이 끝난 버전에만 기록되는 파일 (없으면 생성 중이거나 실패한 버전)
+VERSION_INFO_FILE = "version.json"
+
+# 완료되지 않은 버전 디렉토리는 이 시간이 지나면 실패한 것으로 보고 정리
+STALE_BUILD_SECONDS = 6 * 60 * 60
+# 교체된 파이프라인은 진행 중인 답변이 끝나도록 이 시간이 지난 뒤 해제
+RETIRE_GRACE_SECONDS = 300
+
+_RESERVED = {VERSIONS_DIR, ACTIVE_FILE, HISTORY_FILE, BUILD_LOCK_FILE}
+
+
+def _has_legacy_index(root):
+    return os.path.isdir(root) and any(name not in _RESERVED and not name.endswith(".tmp") for name in os.listdir(root))
+
+
+def active_version(root=CHROMA_DIR):
+    """활성 버전 이름 (포인터가 없으면 legacy 인덱스 유무에 따라 'legacy' 또는 None)"""
+    try:
+        with open(os.path.join(root, ACTIVE_FILE), encoding="utf-8") as f:
+            version = f.read().strip()
+        if version:
+            return version
+    except FileNotFoundError:
+        pass
+    return LEGACY_VERSION if _has_legacy_index(root) else None
+
+
+def version_dir(root, version):
+    """버전의 인덱스 디렉토리 (legacy나 버전이 없으면 CHROMA_DIR 자체)"""
+    if version in (None, LEGACY_VERSION):
+        return root
+    return os.path.join(root, VERSIONS_DIR, version)
+
+
+def active_index_dir(root=CHROMA_DIR):
+    return version_dir(root, active_version(root))
+
+
+def create_version(root=CHROMA_DIR):
+    """새 버전 디렉토리를 만들어 (버전, 디렉토리)를 반환"""
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    directory = version_dir(root, version)
+    os.makedirs(directory)
+    return version, directory
+
+
+def finalize_version(directory, info):
+    """생성이 끝난 버전에 버전 정보를 기록 (이 파일이 있어야 활성화 가능)"""
+    with open(os.path.join(directory, VERSION_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump({**info, "completed_at": time.time()}, f, ensure_ascii=False)
+
+
+def is_complete(root, version):
+    if version == LEGACY_VERSION:
+        return _has_legacy_index(root)
+    return os.path.exists(os.path.join(version_dir(root, version), VERSION_INFO_FILE))
+
+
+def activate(root, version):
+    """ACTIVE 포인터를 원자적으로 교체하여 버전을 활성화"""
+    if not is_complete(root, version):
+        raise ValueError(f"완료되지 않았거나 존재하지 않는 버전입니다: {version}")
+    previous = active_version(root)
+    tmp_path = os.path.join(root, f"{ACTIVE_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, ACTIVE_FILE))
+    with open(os.path.join(root, HISTORY_FILE), "a", encoding="utf-8") as f:
+        f.write(f"{time.time():.0f}\t{previous or ''}\t{version}\n")
+    return previous
+
+
+# 이 프로세스가 가진 생성 잠금 {루트 경로: 잠금 파일}
+_build_locks = {}
+_build_locks_lock = threading.Lock()
+
+
+def _try_lock(f):
+    """열린 잠금 파일에 배타적 잠금을 시도 (다른 프로세스가 가지고 있으면 False)"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            # 파일 첫 바이트를 잠금 (파일 끝을 넘어도 잠글 수 있음)
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def acquire_build_lock(root=CHROMA_DIR):
+    """
+    인덱스 생성 잠금을 얻으면 True.
+    잠금은 파일에 건 OS 잠금(flock, Windows는 msvcrt)이므로 생성 중인 프로세스가 비정상 종료되면 OS가 해제한다
+    (컨테이너 재시작 후 같은 PID를 받아도 남은 파일 때문에 막히지 않음).
+    """
+    os.makedirs(root, exist_ok=True)
+    key = os.path.abspath(root)
+    with _build_locks_lock:
+        if key in _build_locks:
+            return False
+        f = open(os.path.join(root, BUILD_LOCK_FILE), "a+", encoding="utf-8")
+        if not _try_lock(f):
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        _build_locks[key] = f
+        return True
+
+
+def release_build_lock(root=CHROMA_DIR):
+    # 파일은 지우지 않음 (지우면 다른 프로세스가 이전 파일에 잠금을 걸 수 있음)
+    with _build_locks_lock:
+        f = _build_locks.pop(os.path.abspath(root), None)
+    if f is not None:
+        f.close()
+
+
+def history(root=CHROMA_DIR):
+    """활성화 기록 [(시각, 이전 버전, 새 버전)] (오래된 순)"""
+    path = os.path.join(root, HISTORY_FILE)
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) == 3:
+                entries.append((float(parts[0]), parts[1] or None, parts[2]))
+    return entries
+
+
+def rollback(root=CHROMA_DIR):
+    """현재 버전 직전에 활성화되어 있던 (아직 남아 있는) 버전으로 되돌리고 그 버전을 반환"""
+    current = active_version(root)
+    for _, previous, version in reversed(history(root)):
+        if version == current and previous and previous != current and is_complete(root, previous):
+            activate(root, previous)
+            return previous
+    raise ValueError("롤백할 이전 버전이 없습니다.")
+
+
+def list_versions(root=CHROMA_DIR):
+    """[(버전, 정보, 완료 여부)] (오래된 순, legacy 인덱스가 있으면 맨 앞)"""
+    result = []
+    if _has_legacy_index(root):
+        result.append((LEGACY_VERSION, {}, True))
+    versions_root = os.path.join(root, VERSIONS_DIR)
+    if os.path.isdir(versions_root):
+        for version in sorted(os.listdir(versions_root)):
+            info_path = os.path.join(versions_root, version, VERSION_INFO_FILE)
+            info = {}
+            if os.path.exists(info_path):
+                with open(info_path, encoding="utf-8") as f:
+                    info = json.load(f)
+            result.append((version, info, bool(info)))
+    return result
+
+
+def prune(root=CHROMA_DIR, keep=3):
+    """활성 버전과 최근 keep개의 완료된 버전, 생성 중인 버전을 제외하고 삭제한 뒤 삭제한 버전을 반환"""
+    current = active_version(root)
+    versions = [item for item in list_versions(root) if item[0] != LEGACY_VERSION]
+    complete = [version for version, _, done in versions if done]
+    kept = set(complete[-keep:]) | {current}
+    removed = []
+    for version, _, done in versions:
+        directory = version_dir(root, version)
+        if version in kept:
+            continue
+        if not done and time.time() - os.path.getmtime(directory) < STALE_BUILD_SECONDS:
+            continue
+        shutil.rmtree(directory, ignore_errors=True)
+        removed.append(version)
+    return removed
+
+
+class PipelineSwapper:
+    """
+    활성 버전이 바뀌면 백그라운드에서 새 버전의 파이프라인을 로드하고,
+    로드가 끝날 때까지는 이전 버전의 파이프라인으로 계속 응답한다.
+    loader(version)는 파이프라인 딕셔너리를 반환하며 index_version 키로 실제 로드한 버전을 알린다.
+    closer(pipeline)를 지정하면 교체된 파이프라인을 RETIRE_GRACE_SECONDS가 지난 뒤 해제한다.
+    """
+
+    def __init__(self, root, loader, closer=None):
+        self.root = root
+        self.loader = loader
+        self.closer = closer
+        self.version = None
+        self.pipeline = None
+        self.error = None
+        self.failed_version = None
+        self._target = None
+        self._pending = None
+        self._failed = set()
+        self._retired = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-load")
+
+    def poll(self):
+        """끝난 로드를 반영하고, 활성 버전이 바뀌었으면 로드를 시작한 뒤 현재 파이프라인(없으면 None)을 반환"""
+        target = active_version(self.root)
+        with self._lock:
+            if target != self._target:
+                # 활성 버전이 바뀌면 이전 실패 기록과 관계없이 다시 로드
+                self._target = target
+                self._failed.clear()
+            if self._pending is not None and self._pending[1].done():
+                version, future = self._pending
+                self._pending = None
+                if future.exception() is None:
+                    if self.pipeline is not None:
+                        self._retired.append((time.monotonic(), self.pipeline))
+                    self.pipeline = future.result()
+                    self.version = self.pipeline.get("index_version", version)
+                    self.error = None
+                    self.failed_version = None
+                else:
+                    # 같은 버전을 계속 다시 로드하지 않도록 기록 (retry()나 활성 버전 변경으로 해제)
+                    self.error = future.exception()
+                    self.failed_version = version
+                    self._failed.add(version)
+            needs_load = self.pipeline is None or target != self.version
+            if needs_load and self._pending is None and target not in self._failed:
+                self._pending = (target, self._executor.submit(self.loader, target))
+            expired = self._take_expired()
+            pipeline = self.pipeline
+        for retired in expired:
+            self._close(retired)
+        return pipeline
+
+    def _take_expired(self):
+        """해제할 때가 된 교체된 파이프라인 목록 (현재 버전과 같은 버전은 자원을 공유할 수 있으므로 해제하지 않고 버림)"""
+        now = time.monotonic()
+        expired = [pipeline for retired_at, pipeline in self._retired if now - retired_at >= RETIRE_GRACE_SECONDS]
+        self._retired = [item for item in self._retired if now - item[0] < RETIRE_GRACE_SECONDS]
+        return [pipeline for pipeline in expired if pipeline.get("index_version") != self.version]
+
+    def _close(self, pipeline):
+        if self.closer is None:
+            return
+        try:
+            self.closer(pipeline)
+        except Exception:
+            pass
+
+    @property
+    def loading(self):
+        return self._pending is not None
+
+    def wait(self):
+        """파이프라인이 하나도 없으면 첫 로드가 끝날 때까지 기다린 뒤 현재 파이프라인을 반환"""
+        pipeline = self.poll()
+        pending = self._pending
+        if pipeline is None and pending is not None:
+            wait([pending[1]])
+            pipeline = self.poll()
+        return pipeline
+
+    def retry(self):
+        """실패한 버전을 다시 로드할 수 있도록 실패 기록을 지움"""
+        with self._lock:
+            self._failed.clear()
+            self.error = None
+            self.failed_version = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터DB 버전 관리")
+    parser.add_argument("--root", default=CHROMA_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="버전 목록과 활성 버전")
+    activate_parser = sub.add_parser("activate", help="지정한 버전을 활성화")
+    activate_parser.add_argument("version")
+    sub.add_parser("rollback", help="직전 활성 버전으로 되돌리기")
+    prune_parser = sub.add_parser("prune", help="오래된 버전 삭제")
+    prune_parser.add_argument("--keep", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = active_version(args.root)
+        for version, info, done in list_versions(args.root):
+            marker = "*" if version == current else " "
+            status = f"청크 {info['chunks']}개" if "chunks" in info else ("완료" if done else "생성 중/실패")
+            print(f"{marker} {version:<24} {status}")
+    elif args.command == "activate":
+        previous = activate(args.root, args.version)
+        print(f"{previous} → {args.version} 활성화")
+    elif args.command == "rollback":
+        print(f"{rollback(args.root)} 버전으로 롤백했습니다.")
+    elif args.command == "prune":
+        removed = prune(args.root, args.keep)
+        print(f"{len(removed)}개 버전을 삭제했습니다: {', '.join(removed)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+HWP 규정 문서 로드/분할 및 벡터DB 생성
+
+HWP 파서와 텍스트 분할기는 무겁기 때문에 벡터DB 재생성이 필요할 때만 이 모듈을 import한다.
+"""
+import os
+import json
+import hashlib
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_teddynote.document_loaders import HWPLoader
+from langchain_community.vectorstores import Chroma
+
+from embedding_index import build_quantized_index, save_embedding_info
+from hwp_cache import HwpCache
+from regulation_meta import RegulationClassifier, split_by_article
+from query_expansion import SynonymIndex
+from grounding import ArticleIndex
+
+# 벡터DB에 한 번에 추가(임베딩)하는 조각 수
+EMBED_BATCH_SIZE = 100
+
+
+def parse_hwp(file_path):
+    return HWPLoader(file_path).load()
+
+
+def load_hwp_documents(hwp_dir, cache=None, progress=None):
+    """
+    디렉토리의 모든 HWP 파일을 로드하여 (문서 목록, 오류 메시지 목록)을 반환.
+    파싱 결과는 파일 내용 해시 기준으로 캐시되어 내용이 바뀐 파일만 다시 파싱한다.
+    문서는 조항 단위로 나뉘며 규정명/장/조항/시행일 메타데이터가 붙는다.
+    progress가 주어지면 파일마다 progress("parse", ...)로 진행 상황을 알린다.
+    """
+    cache = cache or HwpCache()
+    docs = []
+    errors = []
+    filenames = [filename for filename in sorted(os.listdir(hwp_dir)) if filename.endswith('.hwp')]
+    for index, filename in enumerate(filenames):
+        hit = False
+        try:
+            file_path = os.path.join(hwp_dir, filename)
+            file_docs, hit = cache.load_documents(file_path, parse_hwp)
+            for doc in file_docs:
+                docs.extend(split_by_article(doc, file_path))
+        except Exception as e:
+            errors.append(f"HWP 파일 로드 실패 ({filename}): {str(e)}")
+        if progress:
+            progress("parse", files_done=index + 1, files_total=len(filenames), current_file=filename, cache_hit=hit)
+    return docs, errors
+
+
+def split_documents(docs, chunk_size=500, chunk_overlap=50):
+    """문서를 검색 단위 조각으로 분할"""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return splitter.split_documents(docs)
+
+
+def chunk_ids(splits):
+    """
+    조각별 결정적 ID (원본 파일명, 규정, 조항, 같은 조항 안의 순번, 본문의 해시).
+    벡터DB를 다시 만들어도 바뀌지 않은 조각은 같은 ID를 가지므로 저장된 대화의 참고 문서가 유지된다.
+    """
+    ids = []
+    positions = {}
+    for doc in splits:
+        metadata = doc.metadata or {}
+        key = (
+            os.path.basename(str(metadata.get("source") or "")),
+            str(metadata.get("regulation") or ""),
+            str(metadata.get("article") or ""),
+        )
+        position = positions.get(key, 0)
+        positions[key] = position + 1
+        digest = hashlib.sha1("\0".join([*key, str(position), doc.page_content]).encode("utf-8"))
+        ids.append(digest.hexdigest())
+    return ids
+
+
+def build_vectordb(splits, chroma_dir, embeddings, embedding_info, progress=None):
+    """
+    분할된 문서로 벡터DB(및 필요 시 양자화 인덱스, 규정 분류기, 동의어 사전, 조항 색인)를 생성.
+    임베딩은 EMBED_BATCH_SIZE개씩 나누어 추가하며 progress("embed", ...)로 진행 상황을 알린다.
+    """
+    db = Chroma(
+        persist_directory=chroma_dir,
+        embedding_function=embeddings,
+        # 메타데이터에 임베딩 정보 추가 (차원/양자화 설정 포함)
+        collection_metadata={"embedding_info": json.dumps(embedding_info)}
+    )
+    ids = chunk_ids(splits)
+    for start in range(0, len(splits), EMBED_BATCH_SIZE):
+        end = start + EMBED_BATCH_SIZE
+        db.add_documents(splits[start:end], ids=ids[start:end])
+        if progress:
+            progress("embed", embedded=min(end, len(splits)), chunks=len(splits))
+    db.persist()
+    if progress:
+        progress("finalize")
+    # 양자화 인덱스 생성 (float32가 아닌 경우에만)
+    if embedding_info["quantization"] != "float32":
+        build_quantized_index(db._collection, chroma_dir, embedding_info["quantization"])
+    # 질문에서 관련 규정을 추론하는 분류기 저장
+    RegulationClassifier.from_documents(splits).save(chroma_dir)
+    # 코퍼스에서 추출한 동의어/약어 사전 저장
+    SynonymIndex.build(splits).save(chroma_dir)
+    # 답변 인용 검증에 쓰는 규정별 조항 색인 저장
+    ArticleIndex.from_documents(splits).save(chroma_dir)
+    # 메타데이터 파일로 저장
+    save_embedding_info(chroma_dir, embedding_info)
+    return db
@@ -0,0 +1,253 @@
+"""
+로컬 테스트용 OpenAI 호환 모의 서버 (/v1/chat/completions, /v1/embeddings)
+
+실제 게이트웨이 없이 답변 서비스나 앱을 실행하고 부하 테스트를 하기 위한 서버로,
+응답 지연(첫 토큰까지)과 토큰 생성 속도, 오류율을 설정할 수 있다.
+OpenAI와 같이 1024 토큰 이상의 동일한 프롬프트 앞부분을 128 토큰 단위로 캐시한 것으로 보고
+usage의 cached_tokens를 채우며, --prefill-ms-per-1k를 주면 캐시되지 않은 입력 토큰만큼 첫 토큰이 늦어진다.
+
+실행 예:
+    python mock_openai.py --port 8001 --latency-ms 300 --tokens-per-sec 60
+    OPENAI_API_BASE=http://localhost:8001/v1 OPENAI_API_KEY=mock streamlit run app.py
+"""
+import os
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import argparse
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 환경변수 또는 명령행 인자로 설정
+CONFIG = {
+    "latency_ms": float(os.environ.get("MOCK_LATENCY_MS", "300")),
+    "tokens_per_sec": float(os.environ.get("MOCK_TOKENS_PER_SEC", "60")),
+    "embedding_dim": int(os.environ.get("MOCK_EMBEDDING_DIM", "3072")),
+    "error_rate": float(os.environ.get("MOCK_ERROR_RATE", "0")),
+    # 캐시되지 않은 입력 1000 토큰당 첫 토큰 추가 지연 (ms)
+    "prefill_ms_per_1k": float(os.environ.get("MOCK_PREFILL_MS_PER_1K", "0")),
+}
+
+# 프롬프트 캐시 모의: 앞부분 해시 집합 (최소 길이와 단위는 OpenAI 프롬프트 캐시와 동일)
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+CACHE_MAX_ENTRIES = 100_000
+_prefix_cache = set()
+
+FOLLOW_UP_POOL = [
+    "출장 중 숙박비 한도를 초과하면 어떻게 처리하나요?",
+    "법인카드 사용 후 증빙서류는 언제까지 제출해야 하나요?",
+    "상품권 구매 시 필요한 서류는 무엇인가요?",
+    "연구수당은 어떤 소득유형으로 분류되나요?",
+    "선지급이 필요한 경우 어떤 절차를 따라야 하나요?",
+    "현금으로 정산할 수 있는 경우는 언제인가요?",
+    "중복 지출이 확인되면 환수 절차는 어떻게 되나요?",
+    "회계연도 말 집행 시 주의할 점은 무엇인가요?",
+]
+
+app = FastAPI(title="OpenAI 호환 모의 서버")
+
+
+def _seed(text):
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def mock_embedding(text, dimensions):
+    """텍스트 해시로 결정되는 정규화된 벡터 (같은 텍스트는 항상 같은 벡터)"""
+    rng = random.Random(_seed(text))
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def mock_reply(messages, json_mode=False):
+    """마지막 사용자 메시지에 대한 모의 답변 텍스트 (json_mode면 답변 JSON 객체 문자열)"""
+    prompt = messages[-1]["content"] if messages else ""
+    if isinstance(prompt, list):
+        prompt = " ".join(part.get("text", "") for part in prompt if isinstance(part, dict))
+    # 후속 질문 독립화(condense) 요청이면 질문만 반환
+    if "Standalone question:" in prompt and "Follow Up Input:" in prompt:
+        return prompt.split("Follow Up Input:", 1)[1].split("\n", 1)[0].strip()
+    rng = random.Random(_seed(prompt))
+    follow_ups = rng.sample(FOLLOW_UP_POOL, 3)
+    answer = (
+        "**모의 응답입니다.** 관련 규정에 따르면 해당 지출은 증빙서류를 갖추어 정해진 기한 내에 정산해야 합니다.\n\n"
+        "*출처: 회계규정 제12조(지출의 증빙)*"
+    )
+    if not json_mode:
+        return answer
+    return json.dumps({
+        "answer": answer,
+        "citations": [{"regulation": "회계규정", "article": "제12조"}],
+        "follow_up_questions": follow_ups,
+    }, ensure_ascii=False)
+
+
+def tokenize(text):
+    """공백을 기준으로 나눈 토큰 (공백은 앞 토큰에 붙임)"""
+    tokens = []
+    for piece in text.split(" "):
+        tokens.append(piece + " ")
+    if tokens:
+        tokens[-1] = tokens[-1][:-1]
+    return tokens
+
+
+def prompt_text(messages):
+    return "".join(f"{m.get('role')}:{m.get('content', '')}\n" for m in messages)
+
+
+def count_prompt_tokens(messages):
+    # 한국어 프롬프트 기준 대략 2글자당 1토큰
+    return max(1, len(prompt_text(messages)) // 2)
+
+
+def cached_prefix_tokens(messages):
+    """이전 요청과 같은 앞부분의 토큰 수를 반환하고, 이번 요청의 앞부분을 캐시에 등록"""
+    text = prompt_text(messages)
+    tokens = count_prompt_tokens(messages)
+    if len(_prefix_cache) > CACHE_MAX_ENTRIES:
+        _prefix_cache.clear()
+    cached = 0
+    for end in range(CACHE_MIN_TOKENS, tokens + 1, CACHE_BLOCK_TOKENS):
+        key = hashlib.sha256(text[:end * 2].encode("utf-8")).digest()
+        if key in _prefix_cache:
+            cached = end
+        else:
+            _prefix_cache.add(key)
+    return cached
+
+
+def usage_for(messages, completion_tokens, cached_tokens=0):
+    prompt_tokens = count_prompt_tokens(messages)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+
+def first_token_delay(messages, cached_tokens):
+    uncached = count_prompt_tokens(messages) - cached_tokens
+    return (CONFIG["latency_ms"] + uncached / 1000 * CONFIG["prefill_ms_per_1k"]) / 1000
+
+
+def maybe_error():
+    if CONFIG["error_rate"] and random.random() < CONFIG["error_rate"]:
+        return JSONResponse(status_code=500, content={"error": {"message": "mock upstream error", "type": "server_error"}})
+    return None
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    error = maybe_error()
+    if error is not None:
+        return error
+    inputs = body.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    dimensions = body.get("dimensions") or CONFIG["embedding_dim"]
+    await asyncio.sleep(CONFIG["latency_ms"] / 1000 / 4)
+    data = [
+        {"object": "embedding", "index": i, "embedding": mock_embedding(str(text), dimensions)}
+        for i, text in enumerate(inputs)
+    ]
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "mock-embedding"),
+        "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    error = maybe_error()
+    if error is not None:
+        return error
+    messages = body.get("messages", [])
+    model = body.get("model", "mock-chat")
+    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+    tokens = tokenize(mock_reply(messages, json_mode))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    token_delay = 1.0 / CONFIG["tokens_per_sec"] if CONFIG["tokens_per_sec"] > 0 else 0.0
+    cached_tokens = cached_prefix_tokens(messages)
+
+    if not body.get("stream"):
+        await asyncio.sleep(first_token_delay(messages, cached_tokens) + token_delay * len(tokens))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage_for(messages, len(tokens), cached_tokens),
+        }
+
+    include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+    async def events():
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        await asyncio.sleep(first_token_delay(messages, cached_tokens))
+        yield f"data: {json.dumps(chunk({'role': 'assistant', 'content': ''}), ensure_ascii=False)}\n\n"
+        for token in tokens:
+            yield f"data: {json.dumps(chunk({'content': token}), ensure_ascii=False)}\n\n"
+            await asyncio.sleep(token_delay)
+        yield f"data: {json.dumps(chunk({}, 'stop'))}\n\n"
+        if include_usage:
+            final = chunk({})
+            final["choices"] = []
+            final["usage"] = usage_for(messages, len(tokens), cached_tokens)
+            yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 모의 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=CONFIG["latency_ms"], help="첫 토큰까지의 지연 (ms)")
+    parser.add_argument("--tokens-per-sec", type=float, default=CONFIG["tokens_per_sec"], help="토큰 생성 속도")
+    parser.add_argument("--embedding-dim", type=int, default=CONFIG["embedding_dim"])
+    parser.add_argument("--error-rate", type=float, default=CONFIG["error_rate"], help="500 오류 응답 비율 (0~1)")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=CONFIG["prefill_ms_per_1k"],
+                        help="캐시되지 않은 입력 1000 토큰당 첫 토큰 추가 지연 (ms)")
+    args = parser.parse_args()
+
+    CONFIG.update(
+        latency_ms=args.latency_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        embedding_dim=args.embedding_dim,
+        error_rate=args.error_rate,
+        prefill_ms_per_1k=args.prefill_ms_per_1k,
+    )
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+질문 난이도에 따른 생성 경로 선택 (로컬 규칙, LLM 호출 없음)
+
+검색 결과의 신뢰도(최고 유사도), 질문 길이, 관련된 조항 수, 복합 추론 표현 여부로
+1) 질문이 특정 조항 내용을 묻고 그 조항이 검색되었으면 조항 원문 발췌로 바로 답하고 (direct)
+2) 한 조항으로 답할 수 있는 짧은 사실 확인 질문은 작고 빠른 모델로 (fast)
+3) 나머지(여러 규정에 걸친 질문, 이어지는 대화, 검색 신뢰도가 낮은 질문)는 기본 모델로 (large) 보낸다.
+"""
+from grounding import ARTICLE_REF_RE, article_id, normalize_article
+
+DIRECT = "direct"
+FAST = "fast"
+LARGE = "large"
+# 조항 발췌 답변을 통계에 기록할 때 쓰는 모델 이름
+DIRECT_MODEL = "article-excerpt"
+
+# 조항 발췌로 답하는 질문의 최대 길이 (글자 수)
+DIRECT_MAX_CHARS = 30
+# 빠른 모델로 보내는 질문의 최대 길이 (글자 수)
+FAST_MAX_CHARS = 40
+# 최고 유사도와 이 차이 이내의 조각을 질문과 관련된 조각으로 봄
+ARTICLE_SCORE_BAND = 0.05
+# 여러 규정을 엮어 판단해야 하는 질문에 나타나는 표현
+REASONING_MARKERS = ("비교", "차이", "동시에", "만약", "둘 다", "각각", "여러", "판단", "왜", "시나리오")
+
+
+def related_articles(docs, scores):
+    """최고 점수 근처의 조각들이 속한 (규정명, 조항) 집합"""
+    if not scores:
+        return set()
+    top = scores[0]
+    articles = set()
+    for doc, score in zip(docs, scores):
+        if score < top - ARTICLE_SCORE_BAND:
+            continue
+        metadata = doc.metadata or {}
+        # 조항 정보가 없는 조각(기존 벡터DB)은 조각 단위로 구분
+        articles.add((metadata.get("regulation"), normalize_article(metadata.get("article", "")) or doc.id))
+    return articles
+
+
+def find_cited_article(question, docs):
+    """질문이 '제N조'를 직접 가리키고 그 조항이 검색 결과에 있으면 해당 조각"""
+    match = ARTICLE_REF_RE.search(question)
+    if not match:
+        return None
+    wanted = article_id(*match.groups())
+    matches = [doc for doc in docs if normalize_article((doc.metadata or {}).get("article", "")) == wanted]
+    # 여러 규정의 같은 번호 조항이 검색되면 질문에 규정명이 나온 쪽을 우선
+    for doc in matches:
+        if (doc.metadata or {}).get("regulation") and doc.metadata["regulation"] in question:
+            return doc
+    return matches[0] if matches else None
+
+
+def route(question, docs, scores, chat_history=(), min_score=0.5, fast_available=True):
+    """
+    생성 경로를 선택하여 {"target", "reason", "features"}를 반환.
+    docs/scores: 검색 결과와 유사도 (점수 내림차순)
+    """
+    compact = question.strip()
+    articles = related_articles(docs, scores)
+    features = {
+        "top_score": round(scores[0], 4) if scores else None,
+        "chars": len(compact),
+        "articles": len(articles),
+        "follow_up": bool(chat_history),
+        "reasoning": any(marker in compact for marker in REASONING_MARKERS),
+    }
+
+    def decide(target, reason):
+        return {"target": target, "reason": reason, "features": features}
+
+    if not docs:
+        return decide(LARGE, "검색 결과 없음")
+    if features["follow_up"]:
+        return decide(LARGE, "이어지는 대화")
+    if features["reasoning"]:
+        return decide(LARGE, "복합 추론 표현")
+    if features["chars"] <= DIRECT_MAX_CHARS:
+        cited = find_cited_article(compact, docs)
+        if cited is not None:
+            features["direct_chunk"] = cited.id
+            return decide(DIRECT, "질문한 조항이 검색됨")
+    if features["top_score"] < min_score:
+        return decide(LARGE, "검색 신뢰도 낮음")
+    if features["articles"] > 1:
+        return decide(LARGE, "여러 조항 관련")
+    if features["chars"] > FAST_MAX_CHARS:
+        return decide(LARGE, "긴 질문")
+    if not fast_available:
+        return decide(LARGE, "빠른 모델 미설정")
+    return decide(FAST, "단일 조항 사실 확인")
+
+
+def direct_answer(doc):
+    """검색된 조항 원문을 인용한 답변 ({"answer", "citations", "follow_up_questions"})"""
+    metadata = doc.metadata or {}
+    label = " ".join(filter(None, [metadata.get("regulation"), metadata.get("article")]))
+    if metadata.get("article_title"):
+        label += f"({metadata['article_title']})"
+    quoted = "\n".join(f"> {line}" if line.strip() else ">" for line in doc.page_content.strip().splitlines())
+    return {
+        "answer": f"질문하신 조항의 규정 원문입니다.\n\n{quoted}\n\n*출처: {label}*",
+        "citations": [{
+            "regulation": metadata.get("regulation"),
+            "article": normalize_article(metadata.get("article", "")),
+        }],
+        "follow_up_questions": [],
+    }
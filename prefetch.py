@@ -0,0 +1,118 @@
+"""
+추천 질문 검색 결과 미리 계산 (추측 실행)
+
+답변과 함께 표시되는 추천 질문은 사용자가 클릭하는 경우가 많으므로, 사용자가 답변을 읽는 동안
+추천 질문들의 임베딩과 검색(rag_pipeline.retrieve_batch)을 백그라운드에서 한 번에 계산해 둔다.
+추천 질문은 이전 대화 없이도 이해되는 질문으로 생성하므로, 클릭하면 condense 단계 없이
+미리 계산한 검색 결과를 그대로 사용한다.
+
+예산: 답변당 최대 질문 수, 대기 중인 작업 수, 보관 개수와 보관 시간을 제한한다.
+사용되지 않고 만료/교체된 항목은 낭비로 집계한다.
+"""
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# 동시에 대기할 수 있는 미리 계산 작업 수 (초과하면 새 요청은 건너뜀)
+MAX_PENDING_BATCHES = 4
+# 보관하는 검색 결과 수 (세션 전체 공유)
+MAX_ENTRIES = 256
+
+
+def prefetch_key(question, regulations):
+    return question.strip(), tuple(sorted(regulations)) if regulations is not None else None
+
+
+class RetrievalPrefetcher:
+    """파이프라인 단위의 추천 질문 검색 결과 캐시"""
+
+    def __init__(self, pipeline, max_questions=3, ttl=300.0):
+        self.pipeline = pipeline
+        self.max_questions = max_questions
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        # 키 → (Future, 배치 내 위치, 등록 시각)
+        self._entries = OrderedDict()
+        self._pending = 0
+        self.stats = {"prefetched": 0, "skipped": 0, "hits": 0, "misses": 0, "wasted": 0}
+
+    def submit(self, questions, regulations=None):
+        """추천 질문들의 검색을 백그라운드에서 시작 (예산을 넘으면 일부 또는 전부 건너뜀)"""
+        from rag_pipeline import retrieve_batch
+
+        with self._lock:
+            self._expire()
+            questions = [q for q in questions if prefetch_key(q, regulations) not in self._entries]
+            questions = questions[:self.max_questions]
+            if not questions:
+                return 0
+            if self._pending >= MAX_PENDING_BATCHES:
+                self.stats["skipped"] += len(questions)
+                return 0
+            self._pending += 1
+            future = self._executor.submit(self._run, retrieve_batch, questions, regulations)
+            now = time.monotonic()
+            for index, question in enumerate(questions):
+                self._entries[prefetch_key(question, regulations)] = (future, index, now)
+            self.stats["prefetched"] += len(questions)
+            while len(self._entries) > MAX_ENTRIES:
+                self._entries.popitem(last=False)
+                self.stats["wasted"] += 1
+        return len(questions)
+
+    def _run(self, retrieve_batch, questions, regulations):
+        try:
+            return retrieve_batch(self.pipeline, questions, regulations)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def take(self, question, regulations=None, timeout=None):
+        """
+        미리 계산한 (문서 목록, 필터 정보)를 꺼냄 (없거나 실패했으면 None).
+        아직 계산 중이면 완료를 기다린다 (처음부터 검색하는 것보다 빠름).
+        """
+        with self._lock:
+            self._expire()
+            entry = self._entries.pop(prefetch_key(question, regulations), None)
+        if entry is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        future, index, _ = entry
+        try:
+            result = future.result(timeout=timeout)[index]
+        except Exception:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return result
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._entries:
+            key, (_, _, created) = next(iter(self._entries.items()))
+            if now - created < self.ttl:
+                break
+            del self._entries[key]
+            self.stats["wasted"] += 1
+
+    def close(self):
+        """대기 중인 미리 검색을 취소하고 스레드를 정리 (파이프라인 교체 시)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        """적중률(클릭한 추천 질문 중 미리 계산된 비율)과 낭비율(미리 계산했지만 쓰이지 않은 비율)"""
+        with self._lock:
+            self._expire()
+            stats = dict(self.stats, cached=len(self._entries), pending=self._pending)
+        clicks = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / clicks if clicks else 0.0
+        stats["waste_rate"] = stats["wasted"] / stats["prefetched"] if stats["prefetched"] else 0.0
+        return stats
@@ -0,0 +1,154 @@
+"""
+검색 전 질문 용어 정규화 (동의어/약어 사전)
+
+사용자가 쓰는 비공식 표현(법카, 출장비, 숙박료 등)은 규정 문구와 임베딩이 잘 맞지 않으므로,
+검색 직전에 질문에 규정 용어를 덧붙인다. 사전은 기본 항목에 더해 벡터DB 생성 시 코퍼스에서
+정의 조항("이하 ○○이라 한다")과 비용 용어의 접미사 변형(숙박료 → 숙박비)을 추출해 만든다.
+조회는 질문 단어별 접두사 사전 검색이므로 수 마이크로초 안에 끝난다.
+"""
+import os
+import re
+import json
+from collections import Counter
+
+SYNONYMS_FILE = "synonyms.json"
+SYNONYMS_FORMAT_VERSION = 1
+
+# 기본 항목: 비공식 표현 → 규정 용어
+SEED_SYNONYMS = {
+    "법카": ("법인카드",),
+    "출장비": ("여비",),
+    "출장경비": ("여비",),
+    "숙박료": ("숙박비",),
+    "호텔비": ("숙박비",),
+    "식대": ("식비",),
+    "밥값": ("식비",),
+    "택시비": ("교통비", "운임"),
+    "차비": ("교통비", "운임"),
+    "회식비": ("업무추진비",),
+    "영수증": ("증빙서류",),
+    "강사료": ("강의료",),
+    "가불": ("선급금",),
+    "선결제": ("선급금", "선지급"),
+    "연구비": ("연구개발비",),
+}
+
+# 정의 조항: 한국과학기술원(이하 "학교"라 한다)
+DEFINITION_RE = re.compile(
+    r"([가-힣A-Za-z0-9·]{2,30})\s*\(\s*이하\s*[\"“'‘「]?([가-힣A-Za-z0-9·\s]{1,20}?)[\"”'’」]?\s*(?:이?라|으로)\s*한다\s*\)"
+)
+WORD_RE = re.compile(r"[가-힣A-Za-z0-9]+")
+# 비용 용어 접미사 (서로 바꿔 쓰이는 경우가 많음, '대'는 대상/대학 등과 겹쳐 기본 항목으로만 처리)
+COST_SUFFIXES = ("비", "료", "금", "값")
+# 단어 끝의 조사 (긴 것부터 제거 시도)
+JOSA = sorted(
+    ("은", "는", "이", "가", "을", "를", "의", "에", "에서", "으로", "로", "와", "과", "도", "만",
+     "까지", "부터", "에게", "이나", "나", "및", "으로써", "로써"),
+    key=len, reverse=True,
+)
+_WORD_ENDINGS = set(JOSA) | {""}
+# 코퍼스에서 이 횟수 이상 나온 비용 용어만 변형을 만듦
+MIN_TERM_FREQ = 2
+
+
+def strip_josa(word):
+    for josa in JOSA:
+        if word.endswith(josa) and len(word) - len(josa) >= 2:
+            return word[:-len(josa)]
+    return word
+
+
+def mine_definitions(texts):
+    """정의 조항에서 (정식 명칭, 약칭) 쌍을 추출"""
+    pairs = set()
+    for text in texts:
+        for formal, alias in DEFINITION_RE.findall(text):
+            alias = alias.strip()
+            if alias and alias != formal:
+                pairs.add((formal, alias))
+    return pairs
+
+
+def mine_cost_variants(texts):
+    """코퍼스의 비용 용어(숙박비 등)에 대해 접미사만 다른 변형(숙박료, 숙박값 등) → 용어 사전을 만든다"""
+    counts = Counter()
+    for text in texts:
+        for word in WORD_RE.findall(text):
+            counts[strip_josa(word)] += 1
+    variants = {}
+    for term, count in counts.items():
+        if count < MIN_TERM_FREQ or not term.endswith(COST_SUFFIXES):
+            continue
+        stem = term[:-1]
+        # 한 글자 어간(경비, 여비 등)은 변형이 다른 단어가 되기 쉬워 제외
+        if len(stem) < 2:
+            continue
+        for suffix in COST_SUFFIXES:
+            variant = stem + suffix
+            # 코퍼스에 이미 쓰이는 표현은 그 자체로 검색되므로 추가하지 않음
+            if variant != term and counts[variant] < MIN_TERM_FREQ:
+                variants.setdefault(variant, set()).add(term)
+    return variants
+
+
+class SynonymIndex:
+    """표현 → 덧붙일 규정 용어 사전 (질문 단어의 가장 긴 접두사로 조회)"""
+
+    def __init__(self, entries):
+        self.entries = {key: tuple(values) for key, values in entries.items()}
+        self.max_len = max((len(key) for key in self.entries), default=0)
+
+    @classmethod
+    def build(cls, docs, seeds=SEED_SYNONYMS):
+        """조각 문서 목록과 기본 항목으로 사전을 생성"""
+        texts = [doc.page_content for doc in docs]
+        entries = {key: set(values) for key, values in seeds.items()}
+        for formal, alias in mine_definitions(texts):
+            entries.setdefault(alias, set()).add(formal)
+            entries.setdefault(formal, set()).add(alias)
+        for variant, terms in mine_cost_variants(texts).items():
+            entries.setdefault(variant, set()).update(terms)
+        return cls({key: sorted(values) for key, values in entries.items()})
+
+    def save(self, directory):
+        with open(os.path.join(directory, SYNONYMS_FILE), "w", encoding="utf-8") as f:
+            json.dump({"version": SYNONYMS_FORMAT_VERSION, "entries": self.entries},
+                      f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, directory):
+        """저장된 사전을 로드 (없거나 형식이 다르면 기본 항목만 사용)"""
+        path = os.path.join(directory, SYNONYMS_FILE)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == SYNONYMS_FORMAT_VERSION:
+                return cls(data["entries"])
+        except (OSError, ValueError, KeyError):
+            pass
+        return cls(SEED_SYNONYMS)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, word):
+        """단어(뒤에 조사가 붙어도 됨)와 일치하는 항목의 용어 목록"""
+        for n in range(min(len(word), self.max_len), 1, -1):
+            # 접두사 뒤가 조사일 때만 일치로 봄 (지원대상 ≠ 지원대 + 상)
+            if word[n:] not in _WORD_ENDINGS:
+                continue
+            terms = self.entries.get(word[:n])
+            if terms:
+                return terms
+        return ()
+
+    def expand(self, query):
+        """질문에 없는 규정 용어를 뒤에 덧붙여 (확장된 질문, 추가된 용어 목록)을 반환"""
+        added = []
+        for word in WORD_RE.findall(query):
+            for term in self.lookup(word):
+                if term not in query and term not in added:
+                    added.append(term)
+        if not added:
+            return query, []
+        return f"{query} ({' '.join(added)})", added
@@ -0,0 +1,720 @@
+"""
+RAG 파이프라인 구성 (벡터DB 로드/생성, 리트리버, condense → retrieve → generate 답변 경로)
+
+UI 코드와 분리되어 있어 Streamlit 스크립트 밖에서도 사용할 수 있다.
+LangChain 등 무거운 모듈은 이 모듈을 import할 때 로드되므로, 앱은 백그라운드 스레드에서 import한다.
+"""
+import sys
+import time
+import shutil
+import platform
+import threading
+from collections import OrderedDict
+
+# SQLite 버전 문제 해결 (Streamlit Cloud용) - chromadb import 전에 적용해야 함
+# 앱(Streamlit)에서 로드될 때만 교체하고, 답변 서비스/배치 도구는 시스템 sqlite3를 사용
+if "streamlit" in sys.modules and platform.system() == "Linux" and "pysqlite3" not in sys.modules:
+    try:
+        __import__('pysqlite3')
+        sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+    except ImportError:
+        pass
+
+import ssl
+import httpx
+import urllib3
+from tenacity import retry, stop_after_attempt, wait_fixed
+
+from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_community.vectorstores import Chroma
+from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+
+from embedding_index import (
+    TruncatedEmbeddings, QuantizedIndex, QuantizedRetriever, ChromaRetriever, load_embedding_info,
+    SUPPORTED_QUANTIZATIONS,
+)
+from regulation_meta import RegulationClassifier
+from query_expansion import SynonymIndex
+from grounding import ArticleIndex, verify_answer
+from telemetry import get_telemetry
+from structured_output import AnswerStreamParser, parse_response
+import model_router
+from prefetch import RetrievalPrefetcher
+from cassette import transport_from_settings
+import index_versions
+
+# SSL 검증 비활성화
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+ssl._create_default_https_context = ssl._create_unverified_context
+
+# 검색할 문서 조각 수
+RETRIEVER_K = 3
+
+# 청크 ID → 본문 조회 캐시 크기 (세션 간 공유)
+CHUNK_CACHE_SIZE = 512
+
+# 프롬프트는 고정 지침(시스템 메시지)을 앞에, 요청마다 달라지는 부분(이전 대화 → 맥락 → 질문)을 뒤에 둔다.
+# 모델 제공자의 프롬프트 캐시는 요청 간 동일한 앞부분(prefix)만 재사용하며 1024토큰 이상부터 적용되므로,
+# 고정 지침(인용 규칙과 응답 작성 규칙 포함)에는 변수를 넣지 않고 그 자체로 1024토큰을 넘도록 유지한다
+# (현재 약 2,400자, 한국어 기준 대략 2글자당 1토큰. 지침을 1024토큰 미만으로 줄이면 첫 질문은 캐시에 적중하지 않음).
+SYSTEM_PROMPT = (
+    "너는 KAIST 회계규정에 대한 질문 및 답변을 전문적으로 처리하는 챗봇이야. 항상 친절하고 정확하게 답변해줘. "
+    "답변할 때는 반드시 참고한 규정 내용이나 조항을 명시적으로 언급하고, 가능한 경우 규정명이나 조항 번호도 함께 언급해줘. "
+    "확실하지 않거나 규정에 명시되지 않은 내용에 대해서는 '이 부분은 규정에 명확히 명시되어 있지 않습니다'라고 솔직하게 답변해줘. 추측하지 말고 알고 있는 내용만 답변해. "
+    "답변은 마크다운을 활용해 다음과 같이 구성해줘:\n\n"
+    "질문에 대한 직접적인 답변을 여기에 작성해줘. 핵심을 간결하고 명확하게 설명해.\n\n"
+    "관련 규정 설명과 출처를 여기에 간결하게 명시해줘. 규정명, 조항 번호 등을 구체적으로 포함해. 이 부분은 작게 작성하고 너무 길지 않게 해.\n\n"
+    "사용자 메시지의 맥락 정보를 바탕으로 질문에 답변해주세요. 맥락 정보에서 참고한 규정 출처를 반드시 답변에 포함해주세요.\n\n"
+    "참고: \n"
+    "- 답변은 마크다운을 활용해 만드세요. 중요 내용은 **볼드체**로 강조하세요.\n"
+    "- 답변에 규정 출처(규정명, 조항 등)를 반드시 포함하세요.\n"
+    "- 답변에 규정 출처(규정명, 조항 등)는 기울임채로, 작은 글씨로 답변하세요.\n"
+    "- 확실하지 않은 내용은 추측하지 말고 명확히 모른다고 답변하세요.\n"
+    "- 응답은 다음 키를 가진 JSON 객체 하나로만 작성하세요:\n"
+    '  "answer": 위 지침에 따른 마크다운 답변 (문자열)\n'
+    '  "citations": 답변에서 인용한 규정 출처 목록 (예: [{{"regulation": "규정명", "article": "제N조"}}])\n'
+    '  "follow_up_questions": 질문과 답변 내용과 관련해 사용자가 이어서 물어볼 만한 후속 질문 3개 (문자열 목록). '
+    '각 질문은 이전 대화 없이도 이해되도록 규정 용어를 포함한 완결된 문장으로 작성하세요.\n\n'
+    "인용 규칙:\n"
+    "- 맥락 정보의 각 조각 앞에 대괄호로 붙은 출처 표기([규정명 제N조(제목)])를 그대로 사용해 인용하세요.\n"
+    "- 맥락 정보에 없는 조항 번호는 인용하지 마세요. 다른 조항을 참조하는 문장(예: '제5조에 따라')이 있어도 "
+    "그 조항의 내용이 맥락에 없으면 내용을 추측하지 말고 해당 조항을 확인하라고 안내하세요.\n"
+    "- 조항의 하위 조항은 '제N조의M' 형식으로, 항과 호는 '제N조 제M항 제K호' 형식으로 표기하세요.\n"
+    '- "citations"에는 답변 본문에서 실제로 인용한 조항만 나열하고, 본문과 같은 규정명과 조항 번호를 사용하세요. '
+    "규정명을 알 수 없으면 regulation을 null로 두세요.\n"
+    "- 여러 규정이 함께 적용되면 각 규정의 조항을 모두 밝히고, 규정 간 내용이 다르면 차이를 설명하세요.\n"
+    "- 금액, 기한, 비율 등 숫자는 맥락 정보의 표기를 그대로 옮기고 임의로 계산하거나 반올림하지 마세요.\n"
+    "- 질문이 규정 해석이 아닌 개인 사정에 대한 판단을 요구하면, 규정 내용을 설명한 뒤 담당 부서 확인이 필요하다고 안내하세요.\n"
+    "- 같은 용어가 규정마다 다르게 정의되어 있으면 질문과 관련된 규정의 정의 조항을 기준으로 설명하세요.\n"
+    "- 질문이 KAIST 규정과 무관하면(일상 대화, 다른 기관의 제도 등) KAIST 규정에 대한 질문에만 답할 수 있다고 "
+    "짧게 안내하고 citations는 빈 목록으로 두세요.\n\n"
+    "응답 작성 규칙:\n"
+    "- JSON 객체만 출력하고 코드 블록(```)이나 JSON 앞뒤의 설명 문장은 붙이지 마세요. "
+    "문자열 안의 줄바꿈은 \\n으로, 큰따옴표는 \\\"로 이스케이프하세요.\n"
+    '- "answer"는 첫 문단에 질문에 대한 결론을 한두 문장으로 쓰고, 필요하면 다음 문단에 조건과 예외를 설명한 뒤, '
+    "마지막 줄에 기울임체로 출처를 '*출처: 규정명 제N조(제목)*' 형식으로 쓰세요.\n"
+    "- 지급 조건, 제출 서류, 처리 절차처럼 항목이 여러 개이면 글머리 기호 목록으로, "
+    "구분별 금액이나 기한을 비교할 때는 마크다운 표로 정리하세요.\n"
+    "- 규정 문구를 길게 그대로 옮기지 말고 질문에 필요한 부분만 요약하되, 요건(해야 한다/할 수 없다)의 의미는 바꾸지 마세요.\n"
+    "- 사용자가 비공식 표현(예: 법카, 출장비)을 쓰면 답변에서는 규정 용어를 쓰고 처음 한 번만 괄호로 사용자의 표현을 함께 적으세요.\n"
+    "- 맥락 정보에 같은 조항의 개정 전후 내용이 함께 있으면 시행일이 늦은 내용을 기준으로 답하고 시행일을 밝히세요.\n"
+    "- 질문이 모호해 여러 규정이 해당될 수 있으면 가장 관련 있는 경우를 먼저 답하고, 다른 경우는 짧게 덧붙이세요.\n"
+    "- 맥락 정보로 답할 수 없으면 \"answer\"에 그 사실과 확인할 수 있는 담당 부서나 추가로 필요한 정보를 쓰고, "
+    "근거 없는 조항은 citations에 넣지 마세요.\n"
+    '- "follow_up_questions"의 각 질문은 50자 이내의 한국어 의문문으로 쓰고, 원래 질문을 반복하지 말고 '
+    "서로 다른 측면(조건, 절차, 예외 등)을 다루세요. 맥락 정보로 답할 수 있는 질문을 우선하세요.\n"
+    "- 답변은 존댓말(합니다체)로 일관되게 작성하세요."
+)
+
+# 같은 세션의 이어지는 질문끼리는 이전 대화까지 앞부분이 같으므로 맥락보다 앞에 둔다
+HUMAN_TEMPLATE = (
+    "이전 대화: {chat_history}\n\n"
+    "맥락: {context}\n\n"
+    "질문: {question}"
+)
+
+
+# 후속 질문을 독립적인 질문으로 바꾸는 프롬프트 (ConversationalRetrievalChain 기본값과 동일)
+CONDENSE_TEMPLATE = (
+    "Given the following conversation and a follow up question, rephrase the follow up question "
+    "to be a standalone question, in its original language.\n\n"
+    "Chat History:\n{chat_history}\n"
+    "Follow Up Input: {question}\n"
+    "Standalone question:"
+)
+
+
+class PipelineError(Exception):
+    """사용자에게 그대로 보여줄 수 있는 파이프라인 초기화 오류"""
+
+
+def should_rebuild_vectordb(settings):
+    """벡터DB 재생성이 필요한지 확인하는 함수"""
+    # Streamlit Cloud 환경에서는 기존 DB 사용 (읽기 전용 환경)
+    if settings["READ_ONLY_INDEX"]:
+        return False
+    return index_versions.active_version(settings["CHROMA_DIR"]) is None
+
+
+def make_http_client(settings):
+    """모델 API용 HTTP 클라이언트 (LLM_CASSETTE가 설정되면 호출을 카세트에 기록하거나 카세트에서 재생)"""
+    return httpx.Client(verify=False, transport=transport_from_settings(settings))
+
+
+def make_embeddings(settings, dimensions=None):
+    """OpenAI 임베딩 클라이언트 생성 (dimensions가 있으면 Matryoshka 방식으로 축소)"""
+    return TruncatedEmbeddings(
+        OpenAIEmbeddings(
+            openai_api_key=settings["OPENAI_API_KEY"],
+            openai_api_base=settings["OPENAI_API_BASE"],
+            model=settings["OPENAI_EMBEDDING_MODEL"],
+            http_client=make_http_client(settings),
+        ),
+        dimensions=dimensions
+    )
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
+def create_llm(settings, model=None):
+    return ChatOpenAI(
+        temperature=0,
+        openai_api_key=settings["OPENAI_API_KEY"],
+        openai_api_base=settings["OPENAI_API_BASE"],
+        model_name=model or settings["OPENAI_MODEL"],
+        request_timeout=60,
+        # 스트리밍 응답에서도 마지막 조각으로 토큰 사용량(캐시 적중 토큰 포함)을 받음
+        stream_usage=True,
+        http_client=make_http_client(settings),
+    )
+
+
+def build_prompt():
+    return ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(SYSTEM_PROMPT),
+        HumanMessagePromptTemplate.from_template(HUMAN_TEMPLATE),
+    ])
+
+
+def create_vectordb(settings, index_dir, notices, progress=None):
+    """
+    HWP 문서로 index_dir에 벡터DB를 새로 생성 (ingest 모듈은 이때만 import).
+    progress(단계, **값)가 주어지면 parse → split → embed → finalize 단계별 진행 상황을 알린다.
+    """
+    import ingest
+
+    docs, errors = ingest.load_hwp_documents(settings["HWP_DIR"], progress=progress)
+    notices.extend(("error", message) for message in errors)
+    if not docs:
+        raise PipelineError("로드된 문서가 없습니다. HWP 파일이 올바른지 확인하세요.")
+
+    try:
+        splits = ingest.split_documents(docs)
+    except Exception as e:
+        raise PipelineError(f"문서 분할 실패: {str(e)}") from e
+    if progress:
+        progress("split", chunks=len(splits))
+
+    quantization = settings["EMBEDDING_QUANTIZATION"]
+    if quantization not in SUPPORTED_QUANTIZATIONS:
+        notices.append(("warning", f"지원하지 않는 EMBEDDING_QUANTIZATION 값입니다: {quantization}. float32를 사용합니다."))
+        quantization = "float32"
+    embedding_info = {
+        "type": "openai",
+        "provider": "standard",
+        "model": settings["OPENAI_EMBEDDING_MODEL"],
+        "dimensions": settings["OPENAI_EMBEDDING_DIMENSIONS"],
+        "quantization": quantization,
+        "rescore_k": settings["EMBEDDING_RESCORE_K"],
+    }
+    try:
+        embeddings = make_embeddings(settings, embedding_info["dimensions"])
+        db = ingest.build_vectordb(splits, index_dir, embeddings, embedding_info, progress=progress)
+    except Exception as e:
+        raise PipelineError(f"벡터DB 생성 실패: {str(e)}") from e
+    notices.append(("success", f"벡터DB 생성 완료! 총 {len(splits)}개 문서 조각이 임베딩되었습니다."))
+    return db, embeddings, embedding_info
+
+
+def build_index_version(settings, notices, progress=None):
+    """
+    새 버전 디렉토리에 벡터DB를 생성하고, 완료되면 활성 버전으로 전환한다.
+    생성 중에는 기존 활성 버전이 그대로 사용되며, 실패하면 새 디렉토리만 삭제된다.
+    여러 프로세스가 동시에 생성하지 않도록 잠금 파일을 사용한다.
+    (버전, (db, embeddings, embedding_info))를 반환
+    """
+    root = settings["CHROMA_DIR"]
+    if not index_versions.acquire_build_lock(root):
+        raise PipelineError("다른 벡터DB 생성 작업이 진행 중입니다. 완료된 후 다시 시도하세요.")
+    try:
+        version, index_dir = index_versions.create_version(root)
+        try:
+            built = create_vectordb(settings, index_dir, notices, progress)
+            index_versions.finalize_version(index_dir, {
+                "chunks": built[0]._collection.count(),
+                "embedding_info": built[2],
+            })
+            index_versions.activate(root, version)
+        except Exception:
+            shutil.rmtree(index_dir, ignore_errors=True)
+            raise
+    finally:
+        index_versions.release_build_lock(root)
+    return version, built
+
+
+def open_vectordb(settings, index_dir, notices):
+    """기존 벡터DB를 로드"""
+    # 이전에 사용한 임베딩 정보 로드
+    try:
+        embedding_info = load_embedding_info(index_dir)
+        if embedding_info is None:
+            notices.append(("warning", "임베딩 정보 파일을 찾을 수 없습니다. 벡터DB를 재생성하는 것이 좋습니다."))
+        # 사용자에게 저장된 임베딩 정보 안내
+        elif embedding_info["type"] != "openai":
+            notices.append(("warning", f"주의: 벡터DB는 {embedding_info['type']} 임베딩으로 생성되었으나, 현재 openai 임베딩을 선택하셨습니다. 검색 결과가 정확하지 않을 수 있습니다."))
+    except Exception as e:
+        notices.append(("warning", f"임베딩 정보 로드 실패: {e}. 기본 임베딩을 사용합니다."))
+        embedding_info = None
+    try:
+        # 쿼리 임베딩은 벡터DB 생성 시 사용한 차원에 맞춰야 함
+        embeddings = make_embeddings(settings, (embedding_info or {}).get("dimensions"))
+        db = Chroma(persist_directory=index_dir, embedding_function=embeddings)
+    except Exception as e:
+        raise PipelineError(f"벡터DB 로드 실패: {str(e)}") from e
+    return db, embeddings, embedding_info
+
+
+def build_retriever(settings, index_dir, db, embeddings, embedding_info):
+    """양자화 인덱스가 있으면 1차 검색은 양자화 벡터로, 상위 후보는 float32로 재점수화"""
+    quantization = (embedding_info or {}).get("quantization", "float32")
+    if quantization != "float32" and QuantizedIndex.exists(index_dir):
+        return QuantizedRetriever(
+            index=QuantizedIndex.load(index_dir),
+            embeddings=embeddings,
+            collection=db._collection,
+            k=RETRIEVER_K,
+            rescore_k=(embedding_info or {}).get("rescore_k", settings["EMBEDDING_RESCORE_K"]),
+        )
+    return ChromaRetriever(embeddings=embeddings, collection=db._collection, k=RETRIEVER_K)
+
+
+def init_pipeline(settings, force_rebuild=False, version=None):
+    """
+    벡터DB를 로드(또는 생성)하고 리트리버와 LLM을 구성한다.
+    version을 지정하면 해당 버전을, 아니면 활성 버전을 로드하며 활성 버전이 없으면 새로 생성한다.
+    Streamlit 명령을 호출하지 않으므로 백그라운드 스레드에서 실행할 수 있으며,
+    UI에 표시할 안내 메시지는 notices 목록으로 반환한다.
+    """
+    notices = []
+    root = settings["CHROMA_DIR"]
+    if force_rebuild or (version is None and should_rebuild_vectordb(settings)):
+        version, (db, embeddings, embedding_info) = build_index_version(settings, notices)
+        index_dir = index_versions.version_dir(root, version)
+    else:
+        version = version or index_versions.active_version(root)
+        index_dir = index_versions.version_dir(root, version)
+        db, embeddings, embedding_info = open_vectordb(settings, index_dir, notices)
+
+    try:
+        retriever = build_retriever(settings, index_dir, db, embeddings, embedding_info)
+        llm = create_llm(settings)
+        # 단순 조회 질문용 빠른 모델 (라우팅을 끄거나 모델을 지정하지 않으면 사용하지 않음)
+        fast_llm = None
+        if settings["MODEL_ROUTING"] and settings["OPENAI_FAST_MODEL"]:
+            fast_llm = create_llm(settings, settings["OPENAI_FAST_MODEL"])
+    except Exception as e:
+        raise PipelineError(f"RAG 파이프라인 생성 실패: {str(e)}") from e
+
+    # 규정 메타데이터 없이 생성된 기존 벡터DB에는 분류기가 없으며, 이 경우 규정 필터를 사용하지 않음
+    classifier = RegulationClassifier.load(index_dir)
+    # 동의어 사전이 없는 기존 벡터DB는 기본 항목만 사용
+    synonyms = SynonymIndex.load(index_dir)
+    # 조항 색인이 없으면 인용 검증은 참고 조각 기준으로만 수행
+    article_index = ArticleIndex.load(index_dir)
+
+    pipeline = {
+        "db": db,
+        "retriever": retriever,
+        "llm": llm,
+        # 생성 단계는 JSON 모드로 답변/인용/추천 질문을 한 번에 받음 (condense 단계는 일반 텍스트)
+        "answer_llm": llm.bind(response_format={"type": "json_object"}),
+        "fast_llm": fast_llm.bind(response_format={"type": "json_object"}) if fast_llm else None,
+        "prompt": build_prompt(),
+        "embedding_info": embedding_info,
+        "classifier": classifier,
+        "synonyms": synonyms,
+        "article_index": article_index,
+        "model": settings["OPENAI_MODEL"],
+        "fast_model": settings["OPENAI_FAST_MODEL"] if fast_llm else None,
+        "routing": settings["MODEL_ROUTING"],
+        "router_min_score": settings["ROUTER_MIN_SCORE"],
+        "index_version": version,
+        "notices": notices,
+    }
+    # 추천 질문 검색 결과 미리 계산 (PREFETCH_FOLLOW_UPS가 0이면 사용하지 않음)
+    if settings["PREFETCH_FOLLOW_UPS"] > 0:
+        pipeline["prefetcher"] = RetrievalPrefetcher(
+            pipeline, max_questions=settings["PREFETCH_FOLLOW_UPS"], ttl=settings["PREFETCH_TTL"]
+        )
+    return pipeline
+
+
+def close_pipeline(pipeline):
+    """
+    교체된 파이프라인의 자원을 해제 (추천 질문 미리 검색 스레드, 모델 API HTTP 클라이언트, Chroma 클라이언트).
+    해제한 뒤에는 이 파이프라인으로 답변할 수 없다.
+    """
+    prefetcher = pipeline.get("prefetcher")
+    if prefetcher is not None:
+        prefetcher.close()
+    embeddings = getattr(pipeline["retriever"], "embeddings", None)
+    models = [pipeline["llm"], getattr(pipeline.get("fast_llm"), "bound", None), getattr(embeddings, "base", None)]
+    for model in models:
+        client = getattr(model, "http_client", None)
+        if client is not None:
+            client.close()
+    # chromadb는 경로별 System(SQLite 연결, 백그라운드 스레드)을 공유 캐시에 보관하므로,
+    # 캐시에서 제거한 뒤 멈춰야 같은 버전을 다시 열 때(롤백) 멈춘 System을 재사용하지 않음
+    client = getattr(pipeline["db"], "_client", None)
+    system = getattr(client, "_system", None)
+    if system is not None:
+        getattr(type(client), "_identifier_to_system", {}).pop(getattr(client, "_identifier", None), None)
+        system.stop()
+
+
+def format_chat_history(chat_history):
+    """(질문, 답변) 목록을 프롬프트용 문자열로 변환"""
+    buffer = ""
+    for human, ai in chat_history:
+        buffer += f"\nHuman: {human}\nAssistant: {ai}"
+    return buffer
+
+
+def source_label(metadata):
+    """메타데이터로 '규정명 제N조(제목)' 형식의 출처 표기를 만든다 (정보가 없으면 빈 문자열)"""
+    label = metadata.get("regulation", "")
+    if metadata.get("article"):
+        label += f" {metadata['article']}"
+        if metadata.get("article_title"):
+            label += f"({metadata['article_title']})"
+    return label.strip()
+
+
+def format_context(docs):
+    # 조각마다 출처를 붙여 답변에서 규정명/조항을 정확히 인용하도록 함
+    parts = []
+    for doc in docs:
+        label = source_label(doc.metadata or {})
+        parts.append(f"[{label}]\n{doc.page_content}" if label else doc.page_content)
+    return "\n\n".join(parts)
+
+
+def list_regulations(pipeline):
+    """필터로 선택할 수 있는 규정명 목록"""
+    classifier = pipeline.get("classifier")
+    return classifier.regulations if classifier else []
+
+
+def serialize_document(doc):
+    """문서를 UI/HTTP 응답에 쓰는 딕셔너리 형식으로 변환"""
+    return {"id": doc.id, "content": doc.page_content, "metadata": doc.metadata or {}}
+
+
+def get_chunks(pipeline, chunk_ids):
+    """
+    청크 ID 목록을 본문/메타데이터로 변환 (세션에는 ID만 저장하고 화면에 표시할 때 조회).
+    같은 청크는 여러 세션이 공유하므로 파이프라인 단위 LRU 캐시를 사용한다.
+    """
+    cache = pipeline.setdefault("chunk_cache", OrderedDict())
+    lock = pipeline.setdefault("chunk_cache_lock", threading.Lock())
+    with lock:
+        missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in cache]
+    if missing:
+        result = pipeline["db"]._collection.get(ids=missing, include=["documents", "metadatas"])
+        with lock:
+            for chunk_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"]):
+                cache[chunk_id] = {"id": chunk_id, "content": text, "metadata": metadata or {}}
+            while len(cache) > CHUNK_CACHE_SIZE:
+                cache.popitem(last=False)
+    chunks = []
+    with lock:
+        for chunk_id in chunk_ids:
+            if chunk_id in cache:
+                cache.move_to_end(chunk_id)
+                chunks.append(cache[chunk_id])
+    return chunks
+
+
+def message_usage(message):
+    """
+    LLM 응답 메시지의 토큰 사용량 {"prompt_tokens", "cached_tokens", "completion_tokens"} (정보가 없으면 None).
+    cached_tokens는 제공자의 프롬프트 캐시에서 재사용된 입력 토큰 수
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return {
+            "prompt_tokens": usage.get("input_tokens", 0),
+            "cached_tokens": (usage.get("input_token_details") or {}).get("cache_read", 0) or 0,
+            "completion_tokens": usage.get("output_tokens", 0),
+        }
+    # usage_metadata가 없는 이전 langchain-openai 버전
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage")
+    if token_usage:
+        return {
+            "prompt_tokens": token_usage.get("prompt_tokens", 0),
+            "cached_tokens": (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0,
+            "completion_tokens": token_usage.get("completion_tokens", 0),
+        }
+    return None
+
+
+def track_usage(pipeline, usage, total=None, first_token_ms=None, model=None):
+    """LLM 호출 1회의 토큰 사용량을 모델별 통계에 기록하고 total(답변 단위 합계)에 더함"""
+    if usage is None:
+        return
+    cost = get_telemetry().record_usage(model or pipeline.get("model", "unknown"), usage, first_token_ms)
+    if total is None:
+        return
+    for key, value in usage.items():
+        total[key] = total.get(key, 0) + value
+    if cost is not None:
+        total["cost_usd"] = total.get("cost_usd", 0.0) + cost
+
+
+def condense_question(pipeline, question, chat_history, usage=None):
+    """이전 대화가 있으면 후속 질문을 독립적인 검색용 질문으로 변환"""
+    if not chat_history:
+        return question
+    prompt = CONDENSE_TEMPLATE.format(chat_history=format_chat_history(chat_history), question=question)
+    message = pipeline["llm"].invoke(prompt)
+    track_usage(pipeline, message_usage(message), usage)
+    return message.content.strip()
+
+
+def expand_query(pipeline, query):
+    """검색용 질문에 동의어 사전의 규정 용어를 덧붙임 (생성 단계에는 원래 질문을 사용)"""
+    synonyms = pipeline.get("synonyms")
+    if synonyms is None:
+        return query
+    return synonyms.expand(query)[0]
+
+
+def resolve_regulations(pipeline, query, regulations=None):
+    """
+    검색에 적용할 규정 필터를 결정하여 (규정 목록, 자동 추론 여부)를 반환.
+    regulations가 None이면 질문에서 추론하고, 빈 목록이면 필터를 사용하지 않는다.
+    """
+    if regulations is not None:
+        return list(regulations), False
+    classifier = pipeline.get("classifier")
+    if classifier is None:
+        return [], False
+    return classifier.infer(query), True
+
+
+def retrieve_documents(pipeline, query, regulations=None):
+    """규정 필터를 적용해 (문서, 유사도) 목록을 검색 (필터 없이 검색하면 regulations는 빈 목록)"""
+    return pipeline["retriever"].search_with_scores(query, regulations=regulations or None)
+
+
+def _filtered_search(pipeline, search_query, regulations, search):
+    """
+    규정 필터를 결정해 search(규정 목록 또는 None → (문서, 유사도) 목록)로 검색하고 (문서 목록, 필터 정보)를 반환.
+    추론한 규정에서 찾지 못하면 전체 규정에서 다시 검색한다. 유사도는 생성 경로 선택에 쓰도록 필터 정보에 포함한다.
+    """
+    regulations, inferred = resolve_regulations(pipeline, search_query, regulations)
+    scored = search(regulations or None)
+    if inferred and regulations and not scored:
+        regulations = []
+        scored = search(None)
+    return [doc for doc, _ in scored], {
+        "regulations": regulations,
+        "inferred": inferred,
+        "search_query": search_query,
+        "scores": [round(score, 4) for _, score in scored],
+    }
+
+
+def build_inputs(question, docs, chat_history=()):
+    """생성 단계 프롬프트 입력"""
+    return {
+        "context": format_context(docs),
+        "question": question,
+        "chat_history": format_chat_history(chat_history),
+    }
+
+
+def prefetch_follow_ups(pipeline, questions, regulations=None):
+    """
+    표시할 추천 질문들의 검색을 백그라운드에서 미리 시작하고 시작한 질문 수를 반환.
+    regulations는 클릭 시 answer_question에 전달할 값과 같아야 미리 계산한 결과가 사용된다.
+    """
+    prefetcher = pipeline.get("prefetcher")
+    if prefetcher is None or not questions:
+        return 0
+    return prefetcher.submit(questions, regulations)
+
+
+def _prepare(pipeline, question, chat_history, timings, usage, regulations=None, follow_up=False):
+    """
+    condense → retrieve 단계를 실행하고 생성 단계 입력을 반환.
+    follow_up(클릭한 추천 질문)이고 미리 계산한 검색 결과가 있으면 두 단계를 건너뛴다.
+    """
+    prefetcher = pipeline.get("prefetcher")
+    if follow_up and prefetcher is not None:
+        started = time.perf_counter()
+        prefetched = prefetcher.take(question, regulations)
+        if prefetched is not None:
+            docs, filters = prefetched
+            # 추천 질문은 독립적인 질문으로 생성되므로 condense 없이 그대로 사용
+            timings["condense_ms"] = 0.0
+            timings["retrieve_ms"] = (time.perf_counter() - started) * 1000
+            return question, docs, build_inputs(question, docs, chat_history), dict(filters, prefetched=True)
+
+    started = time.perf_counter()
+    generated_question = condense_question(pipeline, question, chat_history, usage)
+    timings["condense_ms"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    search_query = expand_query(pipeline, generated_question)
+    docs, filters = _filtered_search(
+        pipeline, search_query, regulations, lambda regs: retrieve_documents(pipeline, search_query, regs)
+    )
+    timings["retrieve_ms"] = (time.perf_counter() - started) * 1000
+
+    inputs = build_inputs(generated_question, docs, chat_history)
+    return generated_question, docs, inputs, filters
+
+
+def retrieve_batch(pipeline, questions, regulations=None):
+    """
+    이전 대화가 없는 여러 질문을 한 번에 검색하여 질문별 (문서 목록, 필터 정보)를 반환.
+    질문 임베딩은 질문마다 요청하지 않고 embed_documents 한 번으로 계산한다.
+    """
+    retriever = pipeline["retriever"]
+    search_queries = [expand_query(pipeline, question) for question in questions]
+    vectors = retriever.embeddings.embed_documents(search_queries)
+    results = []
+    for search_query, vector in zip(search_queries, vectors):
+        results.append(_filtered_search(
+            pipeline, search_query, regulations,
+            lambda regs, vector=vector: retriever.search_by_vector(vector, regs),
+        ))
+    return results
+
+
+def choose_route(pipeline, question, docs, filters, chat_history=()):
+    """생성 경로 선택 (model_router.route, 라우팅을 끄면 항상 기본 모델)"""
+    if not pipeline.get("routing"):
+        return {"target": model_router.LARGE, "reason": "라우팅 사용 안 함", "features": {}}
+    return model_router.route(
+        question, docs, filters["scores"], chat_history,
+        min_score=pipeline["router_min_score"], fast_available=pipeline.get("fast_llm") is not None,
+    )
+
+
+def _route_model(pipeline, route):
+    """경로의 (모델 이름, JSON 모드 LLM)"""
+    if route is not None and route["target"] == model_router.FAST:
+        return pipeline["fast_model"], pipeline["fast_llm"]
+    return pipeline["model"], pipeline["answer_llm"]
+
+
+def _direct_output(route, docs):
+    doc = next(doc for doc in docs if doc.id == route["features"]["direct_chunk"])
+    return model_router.direct_answer(doc)
+
+
+def generate(pipeline, inputs, usage=None, route=None, docs=()):
+    """
+    생성 단계, {"answer", "citations", "follow_up_questions", "model", "usage"}를 반환.
+    route(choose_route 결과)가 direct면 LLM 없이 조항 원문으로 답하고, 아니면 경로의 모델로 LLM을 1회 호출한다.
+    usage가 주어지면 이 호출의 사용량을 더해 답변 단위 합계로 반환한다.
+    """
+    usage = {} if usage is None else usage
+    started = time.perf_counter()
+    if route is not None and route["target"] == model_router.DIRECT:
+        model = model_router.DIRECT_MODEL
+        output = _direct_output(route, docs)
+    else:
+        model, llm = _route_model(pipeline, route)
+        message = (pipeline["prompt"] | llm).invoke(inputs)
+        track_usage(pipeline, message_usage(message), usage, model=model)
+        output = parse_response(message.content)
+        get_telemetry().record_structured(model, output.pop("parse_error"))
+    get_telemetry().record_latency(model, (time.perf_counter() - started) * 1000)
+    output.update(model=model, usage=usage)
+    return output
+
+
+def check_grounding(pipeline, output, docs):
+    """
+    답변의 조항 인용(본문 인용과 모델이 citations로 밝힌 인용)을 참고 조각/조항 색인과 대조하고
+    모델별 통계에 기록
+    """
+    report = verify_answer(
+        output["answer"], docs, pipeline.get("article_index"),
+        declared=[(item["regulation"], item["article"]) for item in output["citations"]],
+    )
+    get_telemetry().record_grounding(output.get("model") or pipeline.get("model", "unknown"), report)
+    return report
+
+
+def answer_question(pipeline, question, chat_history=(), regulations=None, follow_up=False):
+    """
+    condense → retrieve → generate 경로로 답변을 생성.
+    regulations: 검색할 규정명 목록 (None이면 질문에서 자동 추론, 빈 목록이면 전체 검색)
+    follow_up: 사용자가 표시된 추천 질문을 클릭한 경우 (미리 계산한 검색 결과 사용)
+    """
+    timings, usage = {}, {}
+    generated_question, docs, inputs, filters = _prepare(
+        pipeline, question, chat_history, timings, usage, regulations, follow_up
+    )
+
+    route = choose_route(pipeline, generated_question, docs, filters, chat_history)
+    started = time.perf_counter()
+    output = generate(pipeline, inputs, usage, route, docs)
+    timings["generate_ms"] = (time.perf_counter() - started) * 1000
+    grounding = check_grounding(pipeline, output, docs)
+
+    return {
+        **output,
+        "generated_question": generated_question,
+        "source_documents": [serialize_document(doc) for doc in docs],
+        "filters": filters,
+        "route": route,
+        "grounding": grounding,
+        "timings": timings,
+    }
+
+
+def stream_answer(pipeline, question, chat_history=(), regulations=None, follow_up=False):
+    """
+    answer_question의 스트리밍 버전.
+    ("sources", 참고 문서 목록) → ("token", 텍스트 조각)... → ("done", 전체 결과) 순서로 이벤트를 반환.
+    token 이벤트는 JSON 응답에서 디코딩한 답변 텍스트이며, 인용과 추천 질문은 done 이벤트에 포함된다.
+    """
+    timings, usage = {}, {}
+    generated_question, docs, inputs, filters = _prepare(
+        pipeline, question, chat_history, timings, usage, regulations, follow_up
+    )
+    source_documents = [serialize_document(doc) for doc in docs]
+    yield "sources", source_documents
+
+    route = choose_route(pipeline, generated_question, docs, filters, chat_history)
+    started = time.perf_counter()
+    if route["target"] == model_router.DIRECT:
+        output = generate(pipeline, inputs, usage, route, docs)
+        timings["first_token_ms"] = (time.perf_counter() - started) * 1000
+        yield "token", output["answer"]
+    else:
+        model, llm = _route_model(pipeline, route)
+        parser = AnswerStreamParser()
+        call_usage = None
+        for chunk in (pipeline["prompt"] | llm).stream(inputs):
+            # 사용량은 스트림의 마지막 조각에 포함됨
+            call_usage = message_usage(chunk) or call_usage
+            if not chunk.content:
+                continue
+            text = parser.feed(chunk.content)
+            if not text:
+                continue
+            if "first_token_ms" not in timings:
+                timings["first_token_ms"] = (time.perf_counter() - started) * 1000
+            yield "token", text
+        track_usage(pipeline, call_usage, usage, timings.get("first_token_ms"), model=model)
+        output = parser.result()
+        get_telemetry().record_structured(model, output.pop("parse_error"))
+        get_telemetry().record_latency(model, (time.perf_counter() - started) * 1000)
+        output.update(model=model, usage=usage)
+    timings["generate_ms"] = (time.perf_counter() - started) * 1000
+
+    yield "done", {
+        **output,
+        "generated_question": generated_question,
+        "source_documents": source_documents,
+        "filters": filters,
+        "route": route,
+        "grounding": check_grounding(pipeline, output, docs),
+        "timings": timings,
+    }
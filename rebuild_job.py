@@ -0,0 +1,129 @@
+"""
+백그라운드 벡터DB 재생성 작업과 진행 상황
+
+설정 패널의 재생성 버튼은 이 작업을 시작만 하고 바로 반환한다. 작업은 별도 스레드에서
+새 인덱스 버전을 생성하며(index_versions), 파일 파싱 → 조각 분할 → 임베딩 → 마무리 단계의
+진행 상황을 기록한다. UI는 snapshot()을 주기적으로 읽어 표시하므로 다른 세션을 막지 않는다.
+프로세스당 작업은 하나만 실행되며, 다른 프로세스와는 잠금 파일로 조정된다.
+"""
+import time
+import threading
+
+STAGES = ("parse", "split", "embed", "finalize")
+STAGE_LABELS = {
+    "parse": "HWP 파일 파싱",
+    "split": "조각 분할",
+    "embed": "임베딩",
+    "finalize": "인덱스 마무리",
+}
+
+
+class RebuildJob:
+    """프로세스 전체에서 공유하는 재생성 작업 (동시에 하나만 실행)"""
+
+    def __init__(self):
+        self._run_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._state = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, settings):
+        """작업을 시작하면 True, 이미 실행 중이면 False"""
+        if not self._run_lock.acquire(blocking=False):
+            return False
+        with self._state_lock:
+            self._state = {
+                "status": "running",
+                "stage": "parse",
+                "started_at": time.time(),
+                "stage_started_at": time.time(),
+                "finished_at": None,
+                "files_done": 0,
+                "files_total": 0,
+                "current_file": None,
+                "cache_hits": 0,
+                "chunks": 0,
+                "embedded": 0,
+                "version": None,
+                "error": None,
+                "notices": [],
+            }
+        self._thread = threading.Thread(target=self._run, args=(settings,), name="index-rebuild", daemon=True)
+        self._thread.start()
+        return True
+
+    def _progress(self, stage, **values):
+        with self._state_lock:
+            state = self._state
+            if state["stage"] != stage:
+                state["stage"] = stage
+                state["stage_started_at"] = time.time()
+            if values.pop("cache_hit", False):
+                state["cache_hits"] += 1
+            state.update(values)
+
+    def _run(self, settings):
+        from rag_pipeline import build_index_version
+
+        notices = []
+        try:
+            version, _ = build_index_version(settings, notices, progress=self._progress)
+            result = {"status": "succeeded", "version": version}
+        except Exception as e:
+            result = {"status": "failed", "error": str(e)}
+        try:
+            with self._state_lock:
+                self._state.update(result, notices=notices, finished_at=time.time())
+        finally:
+            self._run_lock.release()
+
+    def snapshot(self):
+        """현재 진행 상황 복사본 (작업을 실행한 적이 없으면 None), 진행률과 남은 시간 추정 포함"""
+        with self._state_lock:
+            if self._state is None:
+                return None
+            state = dict(self._state)
+        state["fraction"], state["eta_seconds"] = estimate(state)
+        return state
+
+
+def estimate(state, now=None):
+    """
+    (전체 진행률 0~1, 남은 시간 초 또는 None).
+    단계별 비중은 파싱 30%, 임베딩 65%, 나머지 5%로 보고, 남은 시간은 현재 단계의 처리 속도로 추정한다.
+    """
+    now = now or time.time()
+    if state["status"] != "running":
+        return 1.0, 0.0
+    elapsed = now - state["stage_started_at"]
+    stage = state["stage"]
+    if stage == "parse":
+        done, total = state["files_done"], state["files_total"]
+        fraction = 0.3 * (done / total if total else 0)
+    elif stage == "embed":
+        done, total = state["embedded"], state["chunks"]
+        fraction = 0.3 + 0.65 * (done / total if total else 0)
+    else:
+        done, total = 0, 0
+        fraction = 0.3 if stage == "split" else 0.95
+    # 파싱 중에는 아직 시작하지 않은 임베딩 시간을 알 수 없으므로 현재 단계의 남은 시간만 추정
+    eta = None
+    if done and total:
+        eta = elapsed / done * (total - done)
+    return fraction, eta
+
+
+_job = None
+_job_lock = threading.Lock()
+
+
+def get_job():
+    global _job
+    with _job_lock:
+        if _job is None:
+            _job = RebuildJob()
+        return _job
@@ -0,0 +1,189 @@
+"""
+규정 문서 구조 메타데이터 추출 및 규정 분류기
+
+벡터DB 생성 시 문서를 조항 단위로 나누어 규정명, 장, 조항, 시행일을 메타데이터로 붙이고,
+질문에서 관련 규정을 추론하는 가벼운 로컬 분류기(글자 바이그램 + IDF)를 만든다.
+분류기는 규정명과 장/조 제목만 사용하므로 수 마이크로초~수백 마이크로초 안에 동작한다.
+"""
+import os
+import re
+import json
+import math
+
+from langchain_core.documents import Document
+
+CLASSIFIER_FILE = "regulation_profiles.json"
+
+# 조항 제목: "제12조(지출의 증빙)", "제12조의2(예외)" - 본문 중 "제5조에 따라" 같은 참조와 구분하기 위해 괄호 제목 필수
+ARTICLE_RE = re.compile(r"^\s*제\s*(\d+)\s*조(?:\s*의\s*(\d+))?\s*\(([^)\n]{1,60})\)")
+# 장 제목: "제3장 여비"
+CHAPTER_RE = re.compile(r"^\s*제\s*(\d+)\s*장\s*(\S[^\n]{0,40})?$")
+# 시행일: "이 규정은 2023년 3월 1일부터 시행한다", "시행 2023. 3. 1."
+EFFECTIVE_RES = [
+    re.compile(r"(\d{4})\s*년\s*(\d{1,2})\s*월\s*(\d{1,2})\s*일\s*부터\s*시행"),
+    re.compile(r"시행\s*[:：]?\s*(\d{4})\s*\.\s*(\d{1,2})\s*\.\s*(\d{1,2})"),
+]
+REGULATION_TITLE_RE = re.compile(r"^[\w\s·()]{2,40}(규정|규칙|세칙|지침|요령|기준)$")
+
+# 분류기 판정 기준
+MIN_SCORE = 0.15
+RELATIVE_SCORE = 0.6
+MAX_INFERRED = 2
+
+
+def regulation_name(file_path, text):
+    """문서 앞부분의 제목 줄에서 규정명을 찾고, 없으면 파일명을 사용"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in lines[:10]:
+        if REGULATION_TITLE_RE.match(line):
+            return re.sub(r"\s+", " ", line)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return re.sub(r"^[\d_\-\s\[\]().]+", "", stem).replace("_", " ").strip() or stem
+
+
+def effective_date(text):
+    """문서에서 찾은 가장 늦은 시행일을 'YYYY-MM-DD'로 반환 (없으면 빈 문자열)"""
+    dates = []
+    for pattern in EFFECTIVE_RES:
+        for year, month, day in pattern.findall(text):
+            dates.append((int(year), int(month), int(day)))
+    if not dates:
+        return ""
+    year, month, day = max(dates)
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def split_by_article(doc, file_path):
+    """
+    문서 하나를 조항 단위 문서 목록으로 나눈다.
+    각 문서에는 regulation, chapter, article, article_title, effective_date 메타데이터가 붙으며
+    (Chroma 메타데이터는 None을 허용하지 않으므로 값이 없으면 빈 문자열/0)
+    """
+    text = doc.page_content
+    base = {
+        **doc.metadata,
+        "regulation": regulation_name(file_path, text),
+        "effective_date": effective_date(text),
+    }
+    base["effective_date_int"] = int(base["effective_date"].replace("-", "") or 0)
+
+    sections = []
+    chapter = ""
+    current = {"chapter": "", "article": "", "article_no": 0, "article_title": "", "lines": []}
+    for line in text.splitlines():
+        chapter_match = CHAPTER_RE.match(line)
+        if chapter_match:
+            chapter = f"제{chapter_match.group(1)}장 {(chapter_match.group(2) or '').strip()}".strip()
+        article_match = ARTICLE_RE.match(line)
+        if article_match:
+            if any(part.strip() for part in current["lines"]):
+                sections.append(current)
+            number, sub, title = article_match.groups()
+            current = {
+                "chapter": chapter,
+                "article": f"제{number}조" + (f"의{sub}" if sub else ""),
+                "article_no": int(number),
+                "article_title": title.strip(),
+                "lines": [],
+            }
+        current["lines"].append(line)
+    if any(part.strip() for part in current["lines"]):
+        sections.append(current)
+
+    docs = []
+    for section in sections:
+        content = "\n".join(section.pop("lines")).strip()
+        docs.append(Document(page_content=content, metadata={**base, **section}))
+    return docs
+
+
+def char_bigrams(text):
+    """공백/기호를 제거한 글자 바이그램 집합 (형태소 분석기 없이 한국어 부분 일치)"""
+    compact = re.sub(r"[^0-9A-Za-z가-힣]", "", text)
+    return {compact[i:i + 2] for i in range(len(compact) - 1)}
+
+
+class RegulationClassifier:
+    """질문과 규정별 제목 프로필의 바이그램 유사도로 관련 규정을 추론"""
+
+    def __init__(self, profiles, idf):
+        self.profiles = profiles
+        self.idf = idf
+        self.regulations = sorted(profiles)
+        self.norms = {
+            name: math.sqrt(sum(weight * weight for weight in profile.values())) or 1.0
+            for name, profile in profiles.items()
+        }
+
+    @classmethod
+    def from_documents(cls, docs):
+        """조항 메타데이터(규정명, 장/조 제목)로 규정별 프로필을 생성"""
+        titles = {}
+        for doc in docs:
+            name = doc.metadata.get("regulation")
+            if not name:
+                continue
+            entry = titles.setdefault(name, set())
+            entry.add(name)
+            for key in ("chapter", "article_title"):
+                if doc.metadata.get(key):
+                    entry.add(doc.metadata[key])
+
+        counts = {}
+        for name, texts in titles.items():
+            counts[name] = {}
+            for text in texts:
+                for bigram in char_bigrams(text):
+                    counts[name][bigram] = counts[name].get(bigram, 0) + 1
+
+        n = len(counts)
+        df = {}
+        for profile in counts.values():
+            for bigram in profile:
+                df[bigram] = df.get(bigram, 0) + 1
+        idf = {bigram: math.log((n + 1) / (freq + 0.5)) for bigram, freq in df.items()}
+        profiles = {
+            name: {bigram: round(count * idf[bigram], 4) for bigram, count in profile.items()}
+            for name, profile in counts.items()
+        }
+        return cls(profiles, idf)
+
+    def save(self, directory):
+        with open(os.path.join(directory, CLASSIFIER_FILE), "w", encoding="utf-8") as f:
+            json.dump({"profiles": self.profiles, "idf": self.idf}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        """저장된 분류기를 로드 (없으면 None)"""
+        path = os.path.join(directory, CLASSIFIER_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["profiles"], data["idf"])
+
+    def scores(self, query):
+        bigrams = [b for b in char_bigrams(query) if b in self.idf]
+        if not bigrams:
+            return {}
+        query_norm = math.sqrt(sum(self.idf[b] ** 2 for b in bigrams)) or 1.0
+        result = {}
+        for name, profile in self.profiles.items():
+            dot = sum(profile.get(b, 0.0) * self.idf[b] for b in bigrams)
+            if dot:
+                result[name] = dot / (query_norm * self.norms[name])
+        return result
+
+    def infer(self, query):
+        """
+        질문과 관련된 규정 목록을 반환.
+        확신할 수 없거나 모든 규정이 해당되면 빈 목록(필터 없음)을 반환한다.
+        """
+        if len(self.regulations) < 2:
+            return []
+        ranked = sorted(self.scores(query).items(), key=lambda item: -item[1])
+        if not ranked or ranked[0][1] < MIN_SCORE:
+            return []
+        cutoff = max(MIN_SCORE, ranked[0][1] * RELATIVE_SCORE)
+        selected = [name for name, score in ranked[:MAX_INFERRED] if score >= cutoff]
+        return selected if len(selected) < len(self.regulations) else []
@@ -0,0 +1,316 @@
+"""
+Streamlit 스크립트 재실행(rerun) 프로파일링 (APP_PROFILE=true일 때만 동작)
+
+app.py는 재실행마다 start_rerun()을 호출하고, 최상위 구간(CSS 주입, 메시지 표시, 답변 생성 등)이
+시작될 때 mark("구간 이름")를 호출한다. 프로파일링이 꺼져 있으면 아무 일도 하지 않는 객체를 돌려주므로
+스레드, tracemalloc, 파일 기록이 전혀 없다.
+
+켜져 있으면 재실행마다
+- 샘플링 스레드가 일정 간격으로 스크립트 스레드의 호출 스택을 수집하여 구간 이름을 루트로 한
+  folded stack 파일(<시각>_<ID>.cpu.folded, flamegraph.pl / speedscope에서 열 수 있음)을 쓰고
+- 구간 경계마다 찍은 tracemalloc 스냅샷의 차이로 구간별 할당 위치와 바이트 수를 같은 형식
+  (<시각>_<ID>.alloc.folded, 구간 이름이 루트)으로 쓰며
+- 구간별 경과 시간, 스크립트 스레드 CPU 시간, 할당량/최대 사용량 요약을 reruns.jsonl에 추가한다.
+folded 파일은 최근 APP_PROFILE_KEEP회 재실행분만 남기고, reruns.jsonl은 REPORT_MAX_BYTES를 넘으면
+reruns.jsonl.1로 교체한다.
+
+st.rerun()/st.stop()으로 스크립트가 중간에 끝나면 finish()가 호출되지 않으므로, 샘플링 스레드가
+스크립트 스레드에서 app.py 프레임이 사라진 것을 보고 (또는 같은 스레드의 다음 재실행이 시작될 때) 마무리한다.
+tracemalloc은 프로세스 전체를 추적하므로 여러 세션이 동시에 재실행되면 할당량이 섞일 수 있고,
+구간 경계마다 스냅샷을 찍으므로 추적 중인 메모리 블록 수에 비례하는 지연(측정값에는 포함되지 않음)이 더해진다.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import tracemalloc
+from collections import Counter, deque
+
+# 할당 위치를 추적할 스택 깊이
+ALLOC_FRAMES = 16
+# 구간마다 할당 folded 파일에 쓰는 최대 위치 수
+ALLOC_TOP = 50
+# reruns.jsonl이 이 크기를 넘으면 reruns.jsonl.1로 교체
+REPORT_MAX_BYTES = 10 * 1024 * 1024
+REPORT_FILE = "reruns.jsonl"
+# 관리자 화면에서 볼 수 있도록 메모리에 보관하는 최근 재실행 요약 수
+SUMMARY_WINDOW = 500
+
+
+class _NullRun:
+    """프로파일링이 꺼져 있을 때 사용 (모든 호출이 아무 일도 하지 않음)"""
+
+    enabled = False
+
+    def mark(self, name):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_RUN = _NullRun()
+
+
+def _thread_cpu_seconds(thread_id):
+    """스레드의 CPU 시간 (알 수 없으면 None)"""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError):
+        return time.thread_time() if thread_id == threading.get_ident() else None
+
+
+def _frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(";", ",").replace(" ", "_")
+
+
+def _traced_sizes():
+    """
+    현재 추적 중인 할당량을 호출 스택(루트 → 할당 위치의 (파일, 줄) 튜플)별로 합산.
+    Snapshot.statistics()/compare_to()는 블록마다 객체를 만들어 구간 경계마다 호출하기에는 느리므로
+    스냅샷의 원시 trace 튜플을 직접 합산한다 (없는 버전에서는 statistics()로 대체).
+    """
+    snapshot = tracemalloc.take_snapshot()
+    sizes = Counter()
+    traces = getattr(snapshot.traces, "_traces", None)
+    if traces is None:
+        for stat in snapshot.statistics("traceback"):
+            sizes[tuple((frame.filename, frame.lineno) for frame in stat.traceback)] += stat.size
+        return sizes
+    for trace in traces:
+        # 원시 trace: (domain, 크기, 할당 위치부터의 프레임 튜플, ...)
+        sizes[trace[2][::-1]] += trace[1]
+    return sizes
+
+
+# 프로파일러 자신과 tracemalloc의 할당은 제외
+_EXCLUDED_FILES = {tracemalloc.__file__, __file__}
+
+
+def _alloc_stacks(sizes, previous):
+    """previous 이후 늘어난 할당량의 (folded stack, 바이트) 목록 (큰 순서로 최대 ALLOC_TOP개)"""
+    grown = []
+    for frames, size in sizes.items():
+        diff = size - previous.get(frames, 0)
+        if diff > 0 and not any(filename in _EXCLUDED_FILES for filename, _ in frames):
+            grown.append((diff, frames))
+    grown.sort(key=lambda item: -item[0])
+    return [
+        (";".join(f"{os.path.basename(filename)}:{lineno}".replace(";", ",").replace(" ", "_")
+                  for filename, lineno in frames), diff)
+        for diff, frames in grown[:ALLOC_TOP]
+    ]
+
+
+class RerunProfile:
+    """재실행 1회의 프로파일"""
+
+    enabled = True
+
+    def __init__(self, profiler, script_file, session_id=None):
+        self.profiler = profiler
+        self.script_file = script_file
+        self.session_id = session_id
+        self.run_id = uuid.uuid4().hex[:8]
+        self.thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.last_seen = self.started
+        self.samples = Counter()
+        self.allocations = Counter()
+        self.sections = []
+        self.section = None
+        self.finished = False
+        self._lock = threading.Lock()
+        self._sizes = _traced_sizes()
+        self.mark("start")
+
+    def mark(self, name):
+        """현재 구간을 닫고 새 구간을 시작"""
+        with self._lock:
+            if self.finished:
+                return
+            self._close_section(time.perf_counter())
+            current, _ = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            self.section = {
+                "name": name,
+                "started": time.perf_counter(),
+                "cpu_started": _thread_cpu_seconds(self.thread_id),
+                "memory_started": current,
+                "samples": 0,
+            }
+
+    def _close_section(self, ended):
+        section = self.section
+        if section is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        cpu = _thread_cpu_seconds(self.thread_id)
+        self.sections.append({
+            "name": section["name"],
+            "wall_ms": round((ended - section["started"]) * 1000, 2),
+            "cpu_ms": round((cpu - section["cpu_started"]) * 1000, 2)
+            if cpu is not None and section["cpu_started"] is not None else None,
+            "alloc_bytes": current - section["memory_started"],
+            "peak_bytes": max(0, peak - section["memory_started"]),
+            "samples": section["samples"],
+        })
+        self.section = None
+        # 구간 경계의 스냅샷 차이로 이 구간의 할당 위치를 기록 (다음 구간의 기준이 됨)
+        sizes = _traced_sizes()
+        for stack, size in _alloc_stacks(sizes, self._sizes):
+            self.allocations[f"section:{section['name']};{stack}"] += size
+        self._sizes = sizes
+
+    def sample(self, frame):
+        """샘플링 스레드가 호출: 스크립트 스레드의 현재 스택을 현재 구간 아래에 기록 (스크립트가 끝났으면 False)"""
+        stack = []
+        in_script = False
+        while frame is not None:
+            if frame.f_code.co_filename == self.script_file:
+                in_script = True
+            stack.append(_frame_name(frame.f_code))
+            frame = frame.f_back
+        if not in_script:
+            return False
+        with self._lock:
+            if self.finished or self.section is None:
+                return True
+            self.section["samples"] += 1
+            self.samples[";".join([f"section:{self.section['name']}"] + stack[::-1])] += 1
+            self.last_seen = time.perf_counter()
+        return True
+
+    def finish(self, ended=None):
+        """재실행을 마무리하고 결과 파일과 요약을 기록 (여러 번 호출해도 한 번만 기록)"""
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            ended = ended or time.perf_counter()
+            self._close_section(ended)
+        self.profiler.completed(self, ended)
+
+
+class RerunProfiler:
+    """프로세스 전체에서 공유하는 프로파일러 (샘플링 스레드와 최근 요약 보관)"""
+
+    def __init__(self, output_dir, interval_ms=5.0, keep=200):
+        self.output_dir = output_dir
+        self.interval = interval_ms / 1000
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._active = {}
+        self.summaries = deque(maxlen=SUMMARY_WINDOW)
+        os.makedirs(output_dir, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(ALLOC_FRAMES)
+        self._thread = threading.Thread(target=self._sample_loop, name="rerun-profiler", daemon=True)
+        self._thread.start()
+
+    def start(self, script_file, session_id=None):
+        thread_id = threading.get_ident()
+        with self._lock:
+            previous = self._active.pop(thread_id, None)
+        # 같은 스레드의 이전 재실행이 st.rerun() 등으로 중단되었으면 여기서 마무리
+        if previous is not None:
+            previous.finish()
+        run = RerunProfile(self, script_file, session_id)
+        with self._lock:
+            self._active[thread_id] = run
+        return run
+
+    def _sample_loop(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                runs = list(self._active.values())
+            if not runs:
+                continue
+            frames = sys._current_frames()
+            for run in runs:
+                frame = frames.get(run.thread_id)
+                if frame is None or not run.sample(frame):
+                    # 스크립트 스레드가 app.py를 벗어남 (중간에 끝난 재실행): 마지막 샘플 시각을 종료 시각으로 봄
+                    run.finish(run.last_seen if run.samples else None)
+            # 다음 재실행까지 대기하는 동안 스크립트 프레임(과 그 전역 변수)을 붙잡지 않도록 참조를 해제
+            del frames, frame, runs, run
+
+    def completed(self, run, ended):
+        with self._lock:
+            if self._active.get(run.thread_id) is run:
+                del self._active[run.thread_id]
+        prefix = os.path.join(
+            self.output_dir, time.strftime("%Y%m%d-%H%M%S", time.localtime(run.started_at)) + f"_{run.run_id}"
+        )
+        with open(f"{prefix}.cpu.folded", "w", encoding="utf-8") as f:
+            for stack, count in run.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(f"{prefix}.alloc.folded", "w", encoding="utf-8") as f:
+            for stack, size in run.allocations.most_common():
+                f.write(f"{stack} {size}\n")
+        summary = {
+            "run_id": run.run_id,
+            "session_id": run.session_id,
+            "started_at": run.started_at,
+            "wall_ms": round((ended - run.started) * 1000, 2),
+            "samples": sum(run.samples.values()),
+            "sections": run.sections,
+            "cpu_profile": f"{prefix}.cpu.folded",
+            "alloc_profile": f"{prefix}.alloc.folded",
+        }
+        with self._lock:
+            report_path = os.path.join(self.output_dir, REPORT_FILE)
+            if os.path.exists(report_path) and os.path.getsize(report_path) > REPORT_MAX_BYTES:
+                os.replace(report_path, f"{report_path}.1")
+            with open(report_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+            self.summaries.append(summary)
+            self._prune()
+
+    def _prune(self):
+        """최근 keep회 재실행의 folded 파일만 남김 (파일 이름이 시각으로 시작하므로 이름순이 오래된 순)"""
+        runs = sorted({name.split(".", 1)[0] for name in os.listdir(self.output_dir) if name.endswith(".folded")})
+        for run in runs[:-self.keep] if self.keep > 0 else runs:
+            for kind in ("cpu", "alloc"):
+                try:
+                    os.remove(os.path.join(self.output_dir, f"{run}.{kind}.folded"))
+                except FileNotFoundError:
+                    pass
+
+    def slowest(self, limit=10):
+        """최근 재실행 중 경과 시간이 가장 긴 순서로 요약 목록"""
+        with self._lock:
+            summaries = list(self.summaries)
+        return sorted(summaries, key=lambda summary: -summary["wall_ms"])[:limit]
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler(settings=None):
+    """프로파일러 (APP_PROFILE이 꺼져 있으면 None, 한 번 만들면 프로세스에서 공유)"""
+    global _profiler
+    if _profiler is None and settings is not None and settings["APP_PROFILE"]:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = RerunProfiler(
+                    settings["APP_PROFILE_DIR"], settings["APP_PROFILE_INTERVAL_MS"], settings["APP_PROFILE_KEEP"]
+                )
+    return _profiler
+
+
+def start_rerun(settings, session_id=None):
+    """
+    재실행 프로파일 시작 (app.py 최상위에서 호출).
+    프로파일링이 꺼져 있으면 아무 일도 하지 않는 NULL_RUN을 반환한다.
+    """
+    if not settings["APP_PROFILE"]:
+        return NULL_RUN
+    script_file = sys._getframe(1).f_code.co_filename
+    return get_profiler(settings).start(script_file, session_id)
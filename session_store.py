@@ -0,0 +1,190 @@
+"""
+세션별 대화 상태 저장소 (프로세스 공유)
+
+st.session_state에는 세션 ID만 두고 메시지와 대화 히스토리는 이 저장소에 보관한다.
+참고 문서는 본문 대신 인덱스의 청크 ID만 저장하며, 오랫동안 사용하지 않은 세션은 제거한다.
+영구 저장소(ConversationStore)가 주어지면 메시지를 기록하고, 메모리에 없는 세션은 최근 대화부터 복원한다.
+"""
+import os
+import sys
+import time
+import threading
+
+WELCOME_MESSAGE = "안녕하세요! KAIST 규정에 대해 궁금한 점이 있으시면 무엇이든 물어보세요. 어떤 도움이 필요하신가요?"
+
+# 기본 설정: 30분 동안 사용하지 않은 세션 제거, 프롬프트에는 최근 5턴만 전달
+DEFAULT_IDLE_TTL = 30 * 60
+DEFAULT_HISTORY_TURNS = 5
+# 유휴 세션 정리 주기 (초)
+EVICT_INTERVAL = 60
+# 세션 복원/이전 대화 불러오기 시 한 번에 읽는 메시지 수
+PAGE_SIZE = 20
+
+
+def welcome_messages():
+    return [{"role": "assistant", "content": WELCOME_MESSAGE, "welcome": True}]
+
+
+class SessionData:
+    """한 세션의 대화 상태"""
+
+    __slots__ = ("messages", "chat_history", "last_seen", "next_seq", "has_older")
+
+    def __init__(self):
+        self.messages = welcome_messages()
+        self.chat_history = []
+        self.last_seen = time.time()
+        # 영구 저장소에 기록할 다음 메시지 번호와, 아직 불러오지 않은 이전 메시지 존재 여부
+        self.next_seq = 0
+        self.has_older = False
+
+    def oldest_seq(self):
+        for message in self.messages:
+            if "seq" in message:
+                return message["seq"]
+        return None
+
+
+def deep_sizeof(obj, seen=None):
+    """컨테이너 내부까지 포함한 대략적인 객체 크기 (바이트)"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+
+def process_rss():
+    """현재 프로세스의 RSS (바이트, 리눅스 외 환경에서는 최대 RSS로 대체)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS는 바이트, 리눅스는 KB 단위
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SessionStore:
+    """세션 ID별 SessionData를 보관하고 유휴 세션을 제거하는 저장소"""
+
+    def __init__(self, idle_ttl=DEFAULT_IDLE_TTL, history_turns=DEFAULT_HISTORY_TURNS, persistence=None):
+        self.persistence = persistence
+        self.idle_ttl = idle_ttl
+        self.history_turns = history_turns
+        self.sessions = {}
+        self.evicted = 0
+        self._last_evict = time.time()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """세션 상태를 반환 (메모리에 없으면 영구 저장소에서 복원하거나 새로 생성)"""
+        with self._lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            session = self._restore(session_id)
+            with self._lock:
+                session = self.sessions.setdefault(session_id, session)
+        session.last_seen = time.time()
+        self.maybe_evict()
+        return session
+
+    def _restore(self, session_id):
+        """영구 저장소에서 최근 PAGE_SIZE개 메시지만 읽어 세션을 복원"""
+        session = SessionData()
+        if self.persistence is None:
+            return session
+        messages = self.persistence.load_messages(session_id, PAGE_SIZE)
+        if messages:
+            # 환영 메시지는 저장하지 않으므로 복원한 대화 앞에 다시 둠
+            session.messages.extend(messages)
+            session.next_seq = messages[-1]["seq"] + 1
+            session.has_older = messages[0]["seq"] > 0
+            session.chat_history = self._history_from(messages)
+        return session
+
+    def _history_from(self, messages):
+        """메시지 목록에서 (질문, 답변) 쌍을 만들어 최근 history_turns 턴만 반환"""
+        pairs = []
+        for previous, message in zip(messages, messages[1:]):
+            if previous["role"] == "user" and message["role"] == "assistant":
+                pairs.append((previous["content"], message["content"]))
+        return pairs[-self.history_turns:]
+
+    def load_older(self, session_id, session):
+        """
+        화면 위쪽(환영 메시지 다음)에 이전 대화 한 페이지를 추가.
+        메시지 목록은 잠금 안에서만 바꾸며, 저장소 조회는 다른 세션을 막지 않도록 잠금 밖에서 한다.
+        """
+        with self._lock:
+            oldest = session.oldest_seq()
+            if self.persistence is None or oldest is None:
+                session.has_older = False
+                return 0
+        older = self.persistence.load_messages(session_id, PAGE_SIZE, before_seq=oldest)
+        with self._lock:
+            if session.oldest_seq() != oldest:
+                # 같은 세션의 다른 탭이 먼저 이 페이지를 불러옴
+                return 0
+            position = next(i for i, message in enumerate(session.messages) if "seq" in message)
+            session.messages[position:position] = older
+            session.has_older = bool(older) and older[0]["seq"] > 0
+        return len(older)
+
+    def add_message(self, session_id, session, message):
+        """
+        메시지를 세션에 추가하고 영구 저장소에 기록.
+        같은 세션 ID를 여는 여러 브라우저 탭이 같은 SessionData를 공유하므로 순번은 잠금 안에서 할당한다.
+        """
+        with self._lock:
+            seq = session.next_seq
+            session.next_seq += 1
+            if self.persistence is not None:
+                message["seq"] = seq
+            session.messages.append(message)
+        if self.persistence is not None:
+            self.persistence.append_message(session_id, seq, message)
+
+    def append_turn(self, session, question, answer):
+        """대화 히스토리에 질문-답변 쌍을 추가하고 최근 history_turns 턴만 유지"""
+        session.chat_history.append((question, answer))
+        del session.chat_history[:-self.history_turns]
+
+    def maybe_evict(self):
+        """정리 주기가 지났으면 유휴 세션을 제거"""
+        if time.time() - self._last_evict >= EVICT_INTERVAL:
+            self.evict_idle()
+
+    def evict_idle(self, now=None):
+        """idle_ttl 동안 사용하지 않은 세션을 제거하고 제거한 수를 반환"""
+        now = now or time.time()
+        with self._lock:
+            self._last_evict = now
+            expired = [sid for sid, session in self.sessions.items() if now - session.last_seen > self.idle_ttl]
+            for sid in expired:
+                del self.sessions[sid]
+            self.evicted += len(expired)
+        return len(expired)
+
+    def memory_report(self):
+        """프로세스/세션 메모리 사용량 요약"""
+        with self._lock:
+            sizes = [deep_sizeof(session) for session in self.sessions.values()]
+        total = sum(sizes)
+        return {
+            "sessions": len(sizes),
+            "evicted": self.evicted,
+            "session_bytes": total,
+            "avg_session_bytes": total / len(sizes) if sizes else 0,
+            "max_session_bytes": max(sizes) if sizes else 0,
+            "rss_bytes": process_rss(),
+        }
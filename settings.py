@@ -0,0 +1,83 @@
+"""
+앱 설정 로드
+
+Streamlit Cloud에서는 st.secrets, 로컬에서는 환경변수(.env)에서 설정을 읽는다.
+UI 없이 실행되는 모듈도 같은 설정을 쓰도록 가벼운 표준 라이브러리만 사용한다.
+"""
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 디렉토리 설정
+HWP_DIR = os.path.join(BASE_DIR, 'data')
+CHROMA_DIR = os.path.join(BASE_DIR, 'chroma_db')
+CONVERSATION_DB = os.path.join(BASE_DIR, 'conversations.db')
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+
+def load_settings(secrets=None):
+    """설정 딕셔너리를 반환 (secrets가 주어지면 Streamlit Cloud 환경으로 간주)"""
+    if secrets is not None:
+        get = secrets.get
+        defaults = {
+            "OPENAI_API_BASE": "https://api.openai.com/v1",
+            "OPENAI_MODEL": "gpt-4.1-mini",
+            "OPENAI_FAST_MODEL": "gpt-4.1-nano",
+            "OPENAI_EMBEDDING_MODEL": "text-embedding-ada-002",
+        }
+    else:
+        try:
+            from dotenv import load_dotenv
+            # .env 파일 로드
+            load_dotenv()
+        except ImportError:
+            pass
+        get = os.environ.get
+        defaults = {
+            "OPENAI_API_BASE": "https://api.openai.com/v1",
+            "OPENAI_MODEL": "openai.gpt-4.1-mini-2025-04-14",
+            "OPENAI_FAST_MODEL": "openai.gpt-4.1-nano-2025-04-14",
+            "OPENAI_EMBEDDING_MODEL": "azure.text-embedding-3-large",
+        }
+
+    # 임베딩 차원 축소(Matryoshka) 설정 - 빈 값이면 모델 원본 차원 사용
+    dimensions = str(get("OPENAI_EMBEDDING_DIMENSIONS", "") or "").strip()
+
+    return {
+        "OPENAI_API_KEY": get("OPENAI_API_KEY", ""),
+        "OPENAI_API_BASE": get("OPENAI_API_BASE", defaults["OPENAI_API_BASE"]),
+        "OPENAI_MODEL": get("OPENAI_MODEL", defaults["OPENAI_MODEL"]),
+        # 단순 조회 질문용 작은 모델 (빈 값이면 모든 질문을 OPENAI_MODEL로 생성)
+        "OPENAI_FAST_MODEL": get("OPENAI_FAST_MODEL", defaults["OPENAI_FAST_MODEL"]),
+        # 질문별 생성 경로 선택 (조항 발췌 / 빠른 모델 / 기본 모델), false면 항상 기본 모델
+        "MODEL_ROUTING": str(get("MODEL_ROUTING", "true")).lower() not in ("0", "false", "no", "off"),
+        # 빠른 모델로 보낼 최소 검색 유사도 (임베딩 모델마다 점수 분포가 다르므로 조정)
+        "ROUTER_MIN_SCORE": float(get("ROUTER_MIN_SCORE", "0.5")),
+        # 답변마다 미리 검색해 둘 추천 질문 수 (0이면 사용하지 않음)와 결과 보관 시간(초)
+        "PREFETCH_FOLLOW_UPS": int(get("PREFETCH_FOLLOW_UPS", "3")),
+        "PREFETCH_TTL": float(get("PREFETCH_TTL", "300")),
+        "OPENAI_EMBEDDING_MODEL": get("OPENAI_EMBEDDING_MODEL", defaults["OPENAI_EMBEDDING_MODEL"]),
+        "OPENAI_EMBEDDING_DIMENSIONS": int(dimensions) if dimensions else None,
+        "EMBEDDING_QUANTIZATION": get("EMBEDDING_QUANTIZATION", "float32"),
+        "EMBEDDING_RESCORE_K": int(get("EMBEDDING_RESCORE_K", "20")),
+        # 설정되어 있으면 UI는 답변 생성을 별도 HTTP 서비스(answer_service.py)에 요청
+        "ANSWER_SERVICE_URL": get("ANSWER_SERVICE_URL", ""),
+        # 모델 API 호출 기록/재생 카세트 파일 (빈 값이면 사용하지 않음, cassette.py 참고)
+        "LLM_CASSETTE": get("LLM_CASSETTE", ""),
+        # replay: 기록된 응답만 사용 / record: 실제 호출 후 기록 / auto: 없는 요청만 실제 호출 후 기록
+        "LLM_CASSETTE_MODE": get("LLM_CASSETTE_MODE", "replay"),
+        # 재생 지연: zero(지연 없음) 또는 recorded(기록된 응답 시각 재현)
+        "LLM_CASSETTE_LATENCY": get("LLM_CASSETTE_LATENCY", "zero"),
+        # 앱 재실행 프로파일링 (rerun_profiler.py 참고, 기본값은 꺼짐)
+        "APP_PROFILE": str(get("APP_PROFILE", "false")).lower() in ("1", "true", "yes", "on"),
+        "APP_PROFILE_DIR": get("APP_PROFILE_DIR", PROFILE_DIR),
+        "APP_PROFILE_INTERVAL_MS": float(get("APP_PROFILE_INTERVAL_MS", "5")),
+        # folded 프로파일 파일을 남길 최근 재실행 수 (오래된 파일부터 삭제)
+        "APP_PROFILE_KEEP": int(get("APP_PROFILE_KEEP", "200")),
+        # Streamlit Cloud 환경에서는 기존 DB 사용 (읽기 전용 환경)
+        "READ_ONLY_INDEX": secrets is not None,
+        "HWP_DIR": HWP_DIR,
+        "CHROMA_DIR": CHROMA_DIR,
+        # 대화 내용 영구 저장소 (SQLite)
+        "CONVERSATION_DB": get("CONVERSATION_DB", CONVERSATION_DB),
+    }
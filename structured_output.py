@@ -0,0 +1,161 @@
+"""
+구조화된 답변 출력 (JSON 모드)
+
+생성 단계는 LLM 호출 1회로 다음 JSON 객체를 받는다:
+    {"answer": 마크다운 답변, "citations": [{"regulation", "article"}], "follow_up_questions": [질문, ...]}
+
+스트리밍 중에는 AnswerStreamParser가 도착한 조각을 순서대로 읽어 "answer" 문자열 값만
+디코딩해 내보내므로, 화면에는 JSON 문법 없이 답변 텍스트가 바로 표시된다.
+전체 응답이 끝나면 json.loads로 나머지 필드까지 읽는다.
+"""
+import json
+
+# 추천 질문 최대 개수
+MAX_FOLLOW_UPS = 3
+
+ANSWER_FIELD = "answer"
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def normalize(data, fallback_answer=""):
+    """파싱한 JSON 객체를 {"answer", "citations", "follow_up_questions"} 형식으로 정리"""
+    if not isinstance(data, dict):
+        data = {}
+    answer = data.get(ANSWER_FIELD)
+    if not isinstance(answer, str):
+        answer = fallback_answer
+    citations = []
+    for item in data.get("citations") or []:
+        if not isinstance(item, dict):
+            continue
+        regulation = str(item.get("regulation") or "").strip() or None
+        article = str(item.get("article") or "").strip()
+        if article and (regulation, article) not in citations:
+            citations.append((regulation, article))
+    follow_ups = []
+    for question in data.get("follow_up_questions") or []:
+        if isinstance(question, str) and question.strip() and question.strip() not in follow_ups:
+            follow_ups.append(question.strip())
+    return {
+        "answer": answer.strip(),
+        "citations": [{"regulation": regulation, "article": article} for regulation, article in citations],
+        "follow_up_questions": follow_ups[:MAX_FOLLOW_UPS],
+    }
+
+
+def parse_response(content):
+    """
+    전체 응답 문자열을 파싱 (스트리밍하지 않는 경로).
+    JSON이 아니면(모델이 형식을 지키지 않은 경우) 응답 전체를 답변으로 보고 추천 질문은 비운다.
+    """
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return dict(normalize(None, content), parse_error=True)
+    return dict(normalize(data, content), parse_error=not isinstance(data, dict))
+
+
+class AnswerStreamParser:
+    """
+    JSON 응답 조각을 받아 최상위 "answer" 문자열 값을 점진적으로 디코딩한다.
+    feed()는 이번 조각으로 새로 확정된 답변 텍스트를 반환하며, 조각 경계에서 잘린
+    이스케이프 시퀀스(\\n, \\uXXXX 등)는 다음 조각이 올 때까지 보류한다.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.string_start = 0
+        self.escaped = False
+        self.key = None
+        self.expect_value = False
+        self.capturing = False
+        self.answer_parts = []
+
+    @property
+    def answer(self):
+        return "".join(self.answer_parts)
+
+    def feed(self, text):
+        self.buffer += text
+        emitted = []
+        buffer = self.buffer
+        while self.pos < len(buffer):
+            char = buffer[self.pos]
+            if self.capturing:
+                if char == "\\":
+                    decoded, length = self._decode_escape(self.pos)
+                    if decoded is None:
+                        # 이스케이프가 조각 경계에서 잘림
+                        break
+                    emitted.append(decoded)
+                    self.pos += length
+                    continue
+                if char == '"':
+                    self.capturing = False
+                    self.in_string = False
+                else:
+                    emitted.append(char)
+            elif self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and not self.expect_value:
+                        # 최상위 객체의 키
+                        self.key = json.loads(buffer[self.string_start:self.pos + 1])
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.pos
+                if self.depth == 1 and self.expect_value and self.key == ANSWER_FIELD:
+                    self.capturing = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+            elif self.depth == 1 and char == ":":
+                self.expect_value = True
+            elif self.depth == 1 and char == ",":
+                self.expect_value = False
+                self.key = None
+            self.pos += 1
+        text = "".join(emitted)
+        if text:
+            self.answer_parts.append(text)
+        return text
+
+    def _decode_escape(self, start):
+        """start 위치의 이스케이프 시퀀스를 (문자, 길이)로 디코딩 (아직 다 도착하지 않았으면 (None, 0))"""
+        buffer = self.buffer
+        if start + 1 >= len(buffer):
+            return None, 0
+        kind = buffer[start + 1]
+        if kind != "u":
+            return _ESCAPES.get(kind, kind), 2
+        if start + 6 > len(buffer):
+            return None, 0
+        try:
+            code = int(buffer[start + 2:start + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                # 서로게이트 쌍은 뒤따르는 \uXXXX와 합쳐 한 문자로 만듦
+                if start + 12 > len(buffer):
+                    return None, 0
+                low = int(buffer[start + 8:start + 12], 16)
+                return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), 12
+            return chr(code), 6
+        except ValueError:
+            # 잘못된 이스케이프는 그대로 표시 (최종 결과는 result()에서 다시 판단)
+            return buffer[start:start + 2], 2
+
+    def result(self):
+        """스트림이 끝난 후 전체 응답을 파싱 (JSON이 깨졌으면 지금까지 디코딩한 답변을 사용)"""
+        try:
+            data = json.loads(self.buffer)
+        except ValueError:
+            return dict(normalize(None, self.answer or self.buffer), parse_error=True)
+        return dict(normalize(data, self.answer), parse_error=not isinstance(data, dict))
@@ -0,0 +1,161 @@
+"""
+모델별 답변 품질/성능 통계 (프로세스 공유)
+
+답변마다 생성에 사용한 모델 이름(조항 발췌 답변은 model_router.DIRECT_MODEL)으로 기록하며,
+관리자 화면과 답변 서비스의 /v1/telemetry에서 조회한다.
+"""
+import threading
+from collections import deque
+
+# 모델별로 보관하는 최근 측정값 수
+SAMPLE_WINDOW = 1000
+
+# 모델별 토큰 단가 (USD / 100만 토큰): (입력, 캐시 적중 입력, 출력)
+# 게이트웨이 모델명(예: openai.gpt-4.1-mini-2025-04-14)은 포함된 가장 긴 이름으로 찾는다.
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+
+def price_for(model):
+    matches = [name for name in MODEL_PRICES if name in (model or "")]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def usage_cost(model, usage):
+    """토큰 사용량의 비용 (USD, 단가를 모르는 모델이면 None)"""
+    price = price_for(model)
+    if price is None:
+        return None
+    input_price, cached_price, output_price = price
+    uncached = usage["prompt_tokens"] - usage["cached_tokens"]
+    return (
+        uncached * input_price + usage["cached_tokens"] * cached_price + usage["completion_tokens"] * output_price
+    ) / 1_000_000
+
+
+def _percentile(samples, ratio):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def _optional_percentile(samples, ratio):
+    """측정값이 없으면 None (0 ms로 표시되지 않도록)"""
+    return _percentile(samples, ratio) if samples else None
+
+
+class ModelStats:
+    """한 모델의 누적 통계"""
+
+    def __init__(self):
+        self.answers = 0
+        self.citations = 0
+        self.flagged_citations = 0
+        self.flagged_answers = 0
+        # JSON 형식을 지키지 않아 답변 전체를 텍스트로 처리한 응답 수
+        self.parse_errors = 0
+        self.verify_ms = deque(maxlen=SAMPLE_WINDOW)
+        # 생성 단계 소요 시간 (스트리밍은 마지막 토큰까지)
+        self.latency_ms = deque(maxlen=SAMPLE_WINDOW)
+        # LLM 호출 토큰 사용량과 비용 (condense/생성 호출 모두 포함)
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        # 스트리밍 첫 토큰 시간: 프롬프트 캐시 적중 여부별
+        self.first_token_cached_ms = deque(maxlen=SAMPLE_WINDOW)
+        self.first_token_uncached_ms = deque(maxlen=SAMPLE_WINDOW)
+
+    def summary(self):
+        return {
+            "answers": self.answers,
+            "citations": self.citations,
+            "flagged_citations": self.flagged_citations,
+            "flagged_answers": self.flagged_answers,
+            "parse_errors": self.parse_errors,
+            # 인용이 하나라도 표시된 답변 비율 / 전체 인용 중 표시된 비율
+            "answer_flag_rate": self.flagged_answers / self.answers if self.answers else 0.0,
+            "citation_flag_rate": self.flagged_citations / self.citations if self.citations else 0.0,
+            "verify_p95_ms": _percentile(self.verify_ms, 0.95),
+            "latency_p50_ms": _percentile(self.latency_ms, 0.5),
+            "latency_p95_ms": _percentile(self.latency_ms, 0.95),
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "completion_tokens": self.completion_tokens,
+            # 입력 토큰 중 프롬프트 캐시에서 재사용된 비율
+            "cache_hit_rate": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+            "cost_usd": self.cost_usd,
+            "cost_per_answer_usd": self.cost_usd / self.answers if self.answers else 0.0,
+            # 스트리밍 답변이 없었으면 None
+            "first_token_p50_cached_ms": _optional_percentile(self.first_token_cached_ms, 0.5),
+            "first_token_p50_uncached_ms": _optional_percentile(self.first_token_uncached_ms, 0.5),
+        }
+
+
+class Telemetry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.models = {}
+
+    def _stats(self, model):
+        stats = self.models.get(model)
+        if stats is None:
+            stats = self.models[model] = ModelStats()
+        return stats
+
+    def record_grounding(self, model, report):
+        """인용 검증 결과(grounding.verify_answer)를 기록"""
+        with self._lock:
+            stats = self._stats(model)
+            stats.answers += 1
+            stats.citations += len(report["citations"])
+            stats.flagged_citations += len(report["flagged"])
+            stats.flagged_answers += 1 if report["flagged"] else 0
+            stats.verify_ms.append(report["elapsed_ms"])
+
+    def record_usage(self, model, usage, first_token_ms=None):
+        """LLM 호출 1회의 토큰 사용량(rag_pipeline.message_usage)을 기록하고 비용(USD 또는 None)을 반환"""
+        cost = usage_cost(model, usage)
+        with self._lock:
+            stats = self._stats(model)
+            stats.llm_calls += 1
+            stats.prompt_tokens += usage["prompt_tokens"]
+            stats.cached_tokens += usage["cached_tokens"]
+            stats.completion_tokens += usage["completion_tokens"]
+            stats.cost_usd += cost or 0.0
+            if first_token_ms is not None:
+                samples = stats.first_token_cached_ms if usage["cached_tokens"] else stats.first_token_uncached_ms
+                samples.append(first_token_ms)
+        return cost
+
+    def record_latency(self, model, elapsed_ms):
+        """생성 단계 소요 시간을 기록"""
+        with self._lock:
+            self._stats(model).latency_ms.append(elapsed_ms)
+
+    def record_structured(self, model, parse_error):
+        """구조화된 응답(JSON) 파싱 결과를 기록"""
+        if not parse_error:
+            return
+        with self._lock:
+            self._stats(model).parse_errors += 1
+
+    def snapshot(self):
+        """모델별 요약 통계"""
+        with self._lock:
+            return {model: stats.summary() for model, stats in self.models.items()}
+
+
+_telemetry = Telemetry()
+
+
+def get_telemetry():
+    return _telemetry
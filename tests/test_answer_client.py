@@ -0,0 +1,55 @@
+import json
+
+import httpx
+import pytest
+
+import answer_client
+from answer_client import AnswerServiceError, request_answer, stream_answer
+
+
+def sse(*events):
+    return "".join(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n" for event, data in events)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """answer_client의 공유 클라이언트를 요청을 기록하고 정해진 응답을 돌려주는 전송 계층으로 교체"""
+    state = {"requests": [], "body": "", "json": {}}
+
+    def handler(request):
+        state["requests"].append(json.loads(request.content))
+        if request.url.path.endswith("/stream"):
+            return httpx.Response(200, text=state["body"], headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json=state["json"])
+
+    monkeypatch.setattr(answer_client, "_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    return state
+
+
+def test_stream_yields_events_and_sends_follow_up(service):
+    service["body"] = sse(("sources", []), ("token", "출장비는 "), ("token", "실비입니다."),
+                          ("done", {"answer": "출장비는 실비입니다.", "follow_up_questions": ["숙박비는?"]}))
+    events = list(stream_answer("http://svc/", "출장비는?", [("q", "a")], ["여비규정"], follow_up=True))
+    assert [event for event, _ in events] == ["sources", "token", "token", "done"]
+    assert events[-1][1]["follow_up_questions"] == ["숙박비는?"]
+    assert service["requests"] == [{
+        "question": "출장비는?", "chat_history": [["q", "a"]], "regulations": ["여비규정"], "follow_up": True,
+    }]
+
+
+def test_stream_error_event_raises(service):
+    service["body"] = sse(("sources", []), ("error", {"detail": "검색 및 답변 생성 중 오류가 발생했습니다: 시간 초과"}))
+    with pytest.raises(AnswerServiceError, match="시간 초과"):
+        list(stream_answer("http://svc", "출장비는?"))
+
+
+def test_stream_without_done_raises(service):
+    service["body"] = sse(("sources", []), ("token", "출장비는"))
+    with pytest.raises(AnswerServiceError):
+        list(stream_answer("http://svc", "출장비는?"))
+
+
+def test_request_answer_omits_defaults(service):
+    service["json"] = {"answer": "a"}
+    assert request_answer("http://svc", "출장비는?") == {"answer": "a"}
+    assert service["requests"] == [{"question": "출장비는?", "chat_history": []}]
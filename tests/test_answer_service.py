@@ -0,0 +1,49 @@
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient  # noqa: E402
+
+import answer_service  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """파이프라인 초기화(lifespan) 없이 rag_pipeline 답변 함수를 기록용 함수로 바꾼 서비스"""
+    calls = {"answer": [], "prefetch": []}
+
+    def answer_question(pipeline, question, chat_history, regulations, follow_up=False):
+        calls["answer"].append((question, follow_up))
+        return {"answer": "답", "follow_up_questions": ["숙박비는?"]}
+
+    def stream_answer(pipeline, question, chat_history, regulations, follow_up=False):
+        calls["answer"].append((question, follow_up))
+        yield "token", "답"
+        yield "done", {"answer": "답", "follow_up_questions": ["숙박비는?"]}
+
+    def prefetch_follow_ups(pipeline, questions, regulations=None):
+        calls["prefetch"].append(list(questions))
+
+    monkeypatch.setitem(sys.modules, "rag_pipeline", types.SimpleNamespace(
+        answer_question=answer_question, stream_answer=stream_answer, prefetch_follow_ups=prefetch_follow_ups,
+    ))
+    answer_service.app.state.swapper = types.SimpleNamespace(poll=lambda: {"index_version": "v1"})
+    yield TestClient(answer_service.app), calls
+    answer_service.app.state.swapper = None
+
+
+def test_answer_passes_follow_up_and_prefetches(client):
+    http, calls = client
+    response = http.post("/v1/answer", json={"question": "출장비는?", "follow_up": True})
+    assert response.status_code == 200
+    assert calls == {"answer": [("출장비는?", True)], "prefetch": [["숙박비는?"]]}
+
+
+def test_stream_prefetches_after_done(client):
+    http, calls = client
+    response = http.post("/v1/answer/stream", json={"question": "출장비는?"})
+    assert "event: done" in response.text
+    assert calls == {"answer": [("출장비는?", False)], "prefetch": [["숙박비는?"]]}
@@ -0,0 +1,77 @@
+import json
+import sys
+import types
+
+import pytest
+
+from batch_qa import completed_ids, read_questions, run
+
+
+def write_lines(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write((record if isinstance(record, str) else json.dumps(record, ensure_ascii=False)) + "\n")
+
+
+def test_completed_ids_skips_errors_and_truncated_lines(tmp_path):
+    path = tmp_path / "answers.jsonl"
+    write_lines(path, [
+        {"id": "1", "answer": "a"},
+        {"id": "2", "error": "시간 초과"},
+        {"id": "3", "error": "시간 초과"},
+        {"id": "3", "answer": "재시도 성공"},
+        '{"id": "4", "ans',
+    ])
+    assert completed_ids(str(path)) == {"1", "3"}
+    assert completed_ids(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_read_questions_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "questions.csv"
+    csv_path.write_text("id,question\na,출장비는?\nb,\n,숙박비는?\n", encoding="utf-8")
+    assert read_questions(str(csv_path)) == [("a", "출장비는?"), ("2", "숙박비는?")]
+    jsonl_path = tmp_path / "questions.jsonl"
+    write_lines(jsonl_path, [{"id": 7, "question": " 식비는? "}, {"question": "교통비는?"}])
+    assert read_questions(str(jsonl_path)) == [("7", "식비는?"), ("1", "교통비는?")]
+
+
+@pytest.fixture
+def pipeline_module(monkeypatch):
+    """rag_pipeline 대신 검색/생성을 흉내 내는 모듈 (fail_batches에 든 배치 번호의 검색은 실패)"""
+    state = types.SimpleNamespace(batches=0, fail_batches=set())
+
+    def retrieve_batch(pipeline, questions, regulations):
+        state.batches += 1
+        if state.batches in state.fail_batches:
+            raise RuntimeError("임베딩 API 오류")
+        return [([], {"regulations": regulations}) for _ in questions]
+
+    module = types.SimpleNamespace(
+        retrieve_batch=retrieve_batch,
+        build_inputs=lambda question, docs: {"question": question},
+        choose_route=lambda pipeline, question, docs, filters: "full",
+        generate=lambda pipeline, inputs, route, docs: {
+            "model": "mock", "answer": f"답: {inputs['question']}", "follow_up_questions": [], "usage": {},
+        },
+        check_grounding=lambda pipeline, output, docs: {"citations": [], "flagged": []},
+        source_label=lambda metadata: "",
+    )
+    monkeypatch.setitem(sys.modules, "rag_pipeline", module)
+    return state
+
+
+def test_failed_retrieval_batch_is_recorded_and_retried(tmp_path, pipeline_module):
+    output = str(tmp_path / "answers.jsonl")
+    items = [(str(i), f"질문 {i}") for i in range(5)]
+    pipeline_module.fail_batches = {2}
+    succeeded, failed, _ = run({}, items, output, batch_size=2, concurrency=2, log=lambda message: None)
+    assert (succeeded, failed) == (3, 2)
+    done = completed_ids(output)
+    assert done == {"0", "1", "4"}
+
+    # 같은 출력 파일로 다시 실행하면 실패한 항목만 처리
+    pending = [item for item in items if item[0] not in done]
+    pipeline_module.fail_batches = set()
+    succeeded, failed, _ = run({}, pending, output, batch_size=2, concurrency=2, log=lambda message: None)
+    assert (succeeded, failed) == (2, 0)
+    assert completed_ids(output) == {"0", "1", "2", "3", "4"}
@@ -0,0 +1,103 @@
+import json
+
+import httpx
+import pytest
+
+from cassette import Cassette, CassetteTransport, request_key
+
+SSE_CHUNKS = [b'data: {"delta": "\xec\x88\x99', b'\xeb\xb0\x95\xeb\xb9\x84"}\n\n', b"data: [DONE]\n\n"]
+
+
+class Upstream:
+    """호출 횟수를 세는 가짜 모델 API"""
+
+    def __init__(self, status=200):
+        self.calls = 0
+        self.status = status
+
+    def __call__(self, request):
+        self.calls += 1
+        body = json.loads(request.content)
+        if body.get("stream"):
+            return httpx.Response(self.status, headers={"content-type": "text/event-stream"}, content=iter(SSE_CHUNKS))
+        return httpx.Response(self.status, json={"answer": f"응답 {self.calls}"})
+
+
+def client(cassette, mode, upstream=None):
+    inner = httpx.MockTransport(upstream) if upstream else None
+    return httpx.Client(base_url="https://gateway.test/v1", transport=CassetteTransport(cassette, mode=mode, inner=inner))
+
+
+def chat(http, **body):
+    return http.post("/chat/completions", json={"model": "gpt-4.1-mini", **body},
+                     headers={"authorization": "Bearer secret"})
+
+
+def test_replay_returns_recorded_body(tmp_path):
+    path, upstream = str(tmp_path / "run.cassette"), Upstream()
+    cassette = Cassette(path)
+    with client(cassette, "record", upstream) as http:
+        assert chat(http, question="숙박비").json() == {"answer": "응답 1"}
+    cassette.save()
+
+    with client(Cassette(path), "replay") as http:
+        response = chat(http, question="숙박비")
+    assert response.status_code == 200 and response.json() == {"answer": "응답 1"}
+    assert upstream.calls == 1
+    with open(path, "rb") as f:
+        assert b"secret" not in f.read()
+
+
+def test_replay_miss_is_client_error(tmp_path):
+    with client(Cassette(str(tmp_path / "empty.cassette")), "replay") as http:
+        response = chat(http, question="기록 안 됨")
+    assert response.status_code == 400
+    error = response.json()["error"]
+    assert error["type"] == "cassette_miss" and "gpt-4.1-mini" in error["message"]
+
+
+def test_repeated_requests_replay_in_order(tmp_path):
+    cassette, upstream = Cassette(str(tmp_path / "run.cassette")), Upstream()
+    with client(cassette, "record", upstream) as http:
+        chat(http, question="q")
+        chat(http, question="q")
+    with client(cassette, "replay") as http:
+        answers = [chat(http, question="q").json()["answer"] for _ in range(3)]
+    # 다 쓰면 마지막 응답 반복
+    assert answers == ["응답 1", "응답 2", "응답 2"]
+
+
+def test_streaming_chunks_replayed(tmp_path):
+    cassette = Cassette(str(tmp_path / "run.cassette"))
+    with client(cassette, "record", Upstream()) as http:
+        recorded = chat(http, stream=True).content
+    with client(cassette, "replay") as http:
+        with http.stream("POST", "/chat/completions", json={"stream": True, "model": "gpt-4.1-mini"}) as response:
+            assert response.headers["content-type"] == "text/event-stream"
+            replayed = b"".join(response.iter_raw())
+    assert replayed == recorded == b"".join(SSE_CHUNKS)
+
+
+def test_auto_records_only_misses_and_skips_server_errors(tmp_path):
+    cassette, upstream = Cassette(str(tmp_path / "run.cassette")), Upstream()
+    with client(cassette, "auto", upstream) as http:
+        chat(http, question="q")
+        chat(http, question="q")
+    assert upstream.calls == 1 and len(cassette) == 1
+
+    failing = Upstream(status=503)
+    with client(cassette, "record", failing) as http:
+        assert chat(http, question="다른 질문").status_code == 503
+    assert len(cassette) == 1
+
+
+def test_request_key_ignores_json_key_order():
+    first = httpx.Request("POST", "https://a/v1/embeddings", content=b'{"model": "m", "input": ["x"]}')
+    second = httpx.Request("POST", "https://b/v1/embeddings", content=b'{"input":["x"],"model":"m"}')
+    assert request_key(first) == request_key(second)
+    assert request_key(first) != request_key(httpx.Request("POST", "https://a/v1/chat/completions", content=first.content))
+
+
+def test_invalid_mode(tmp_path):
+    with pytest.raises(ValueError):
+        CassetteTransport(Cassette(str(tmp_path / "x.cassette")), mode="play")
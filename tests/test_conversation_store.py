@@ -0,0 +1,57 @@
+import sqlite3
+import threading
+
+import pytest
+
+from conversation_store import ConversationStore
+
+
+def test_messages_persist_across_store_instances(tmp_path):
+    path = str(tmp_path / "conversations.db")
+    store = ConversationStore(path)
+    store.append_message("s1", 1, {"role": "user", "content": "출장비는?"})
+    store.append_message("s1", 2, {"role": "assistant", "content": "여비규정에 따릅니다.",
+                                   "reference_ids": ["a", "b"], "follow_up_questions": ["숙박비는?"]})
+    reopened = ConversationStore(path)
+    assert reopened.load_messages("s1", limit=10) == [
+        {"role": "user", "content": "출장비는?", "seq": 1},
+        {"role": "assistant", "content": "여비규정에 따릅니다.", "seq": 2,
+         "reference_ids": ["a", "b"], "follow_up_questions": ["숙박비는?"]},
+    ]
+    assert reopened.load_messages("other", limit=10) == []
+
+
+def test_load_messages_pages_backwards(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.db"))
+    for seq in range(1, 8):
+        store.append_message("s1", seq, {"role": "user", "content": str(seq)})
+    recent = store.load_messages("s1", limit=3)
+    assert [m["seq"] for m in recent] == [5, 6, 7]
+    older = store.load_messages("s1", limit=3, before_seq=recent[0]["seq"])
+    assert [m["seq"] for m in older] == [2, 3, 4]
+    assert [m["seq"] for m in store.load_messages("s1", limit=3, before_seq=2)] == [1]
+
+
+def test_duplicate_seq_is_rejected(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.db"))
+    store.append_message("s1", 1, {"role": "user", "content": "a"})
+    with pytest.raises(sqlite3.IntegrityError):
+        store.append_message("s1", 1, {"role": "user", "content": "b"})
+
+
+def test_concurrent_writers_and_stats(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.db"))
+
+    def write(session_id):
+        for seq in range(50):
+            store.append_message(session_id, seq, {"role": "user", "content": "질문"})
+
+    threads = [threading.Thread(target=write, args=(f"s{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = store.stats()
+    assert stats["writes"] == 200
+    assert 0 < stats["p50_ms"] <= stats["p95_ms"] <= stats["max_ms"]
+    assert len(store.load_messages("s3", limit=100)) == 50
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+from embedding_index import QuantizedIndex, quantize, truncate_and_normalize  # noqa: E402
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    vectors = truncate_and_normalize(rng.normal(size=(2000, 256)))
+    queries = truncate_and_normalize(vectors[:50] + rng.normal(scale=0.05, size=(50, 256)))
+    return [f"c{i}" for i in range(len(vectors))], vectors, queries
+
+
+def brute_force(vectors, ids, query, k):
+    scores = vectors @ query
+    return [ids[i] for i in np.argsort(-scores)[:k]]
+
+
+@pytest.mark.parametrize("method", ["int8", "float16"])
+def test_rescored_top_k_matches_float32(corpus, method):
+    ids, vectors, queries = corpus
+    index = QuantizedIndex.build(ids, vectors, method)
+    for query in queries:
+        hits = index.search(query, k=5)
+        assert [hit for hit, _ in hits] == brute_force(vectors, ids, query, 5)
+        # 재점수화한 점수는 float32 원본 내적과 같음
+        expected = {ids[i]: score for i, score in enumerate(vectors @ query)}
+        assert all(score == pytest.approx(float(expected[hit]), abs=1e-5) for hit, score in hits)
+
+
+def test_int8_codes_within_one_step(corpus):
+    _, vectors, _ = corpus
+    codes, scales = quantize(vectors, "int8")
+    assert codes.dtype == np.int8 and np.abs(codes).max() == 127
+    assert np.abs(codes * scales[:, None] - vectors).max() <= scales.max() / 2 + 1e-7
+
+
+def test_unknown_quantization():
+    with pytest.raises(ValueError):
+        quantize(np.ones((1, 4)), "int4")
+
+
+def test_truncated_dimensions_renormalized():
+    vector = truncate_and_normalize(np.arange(1, 9, dtype=np.float32), 4)
+    assert vector.shape == (4,)
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+
+
+def test_save_load_round_trip(tmp_path, corpus):
+    ids, vectors, queries = corpus
+    regulations = ["여비규정" if i % 2 else "회계규정" for i in range(len(ids))]
+    index = QuantizedIndex.build(ids, vectors, "int8", regulations=regulations)
+    index.save(str(tmp_path))
+    assert QuantizedIndex.exists(str(tmp_path))
+
+    loaded = QuantizedIndex.load(str(tmp_path))
+    assert isinstance(loaded.full_vectors, np.memmap)
+    assert len(loaded) == len(index) and loaded.memory_bytes == index.memory_bytes
+    for query in queries[:10]:
+        assert loaded.search(query, k=3) == index.search(query, k=3)
+        assert loaded.search(query, k=3, regulations=["여비규정"]) == index.search(query, k=3, regulations=["여비규정"])
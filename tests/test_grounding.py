@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from grounding import ArticleIndex, NOT_RETRIEVED, SUPPORTED, verify_answer
+
+
+def chunk(content, **metadata):
+    return SimpleNamespace(page_content=content, metadata=metadata)
+
+
+def statuses(report):
+    return {item["article"]: item["status"] for item in report["citations"]}
+
+
+def test_article_in_metadata_is_supported():
+    docs = [chunk("제3조(출장비) 출장비는 실비로 지급한다.", regulation="여비규정", article="제3조")]
+    report = verify_answer("여비규정 제3조에 따라 실비로 지급됩니다.", docs)
+    assert statuses(report) == {"제3조": SUPPORTED}
+
+
+def test_cross_reference_does_not_support_cited_article():
+    docs = [chunk("제3조(출장비) 출장비는 제5조에 따라 정산한다.", regulation="여비규정", article="제3조")]
+    index = ArticleIndex({"여비규정": ["제3조", "제5조"]})
+    report = verify_answer("여비규정 제5조에 따라 정산합니다.", docs, index)
+    assert statuses(report) == {"제5조": NOT_RETRIEVED}
+    assert report["flagged"]
+
+
+def test_heading_in_legacy_chunk_is_supported():
+    # 조항 메타데이터가 없는 기존 벡터DB 조각은 본문의 조항 제목으로 판단
+    docs = [chunk("제4조(숙박비) 숙박비는 제7조의 기준에 따른다.\n제4조의2(식비) 식비는 정액으로 지급한다.")]
+    report = verify_answer("제4조의2에 따라 정액으로 지급되며 제7조를 참고하세요.", docs)
+    assert statuses(report) == {"제4조의2": SUPPORTED, "제7조": NOT_RETRIEVED}
+
+
+def test_criteria_noun_is_not_a_regulation_name():
+    docs = [chunk("제3조(숙박비) 숙박비는 실비로 지급한다.", regulation="여비규정", article="제3조")]
+    index = ArticleIndex({"여비규정": ["제3조"]})
+    report = verify_answer("숙박비 지급기준은 제3조에 정해져 있습니다.", docs, index)
+    assert report["citations"] == [{"regulation": None, "article": "제3조", "status": SUPPORTED}]
+    assert not report["flagged"]
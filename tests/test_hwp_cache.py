@@ -0,0 +1,98 @@
+import os
+import json
+
+import pytest
+
+pytest.importorskip("langchain_core")
+from langchain_core.documents import Document  # noqa: E402
+
+import hwp_cache  # noqa: E402
+from hwp_cache import HwpCache  # noqa: E402
+
+
+class Parser:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(path)
+        with open(path, encoding="utf-8") as f:
+            return [Document(page_content=f.read(), metadata={"source": path, "page": 0})]
+
+
+@pytest.fixture
+def hwp(tmp_path):
+    path = tmp_path / "여비규정.hwp"
+    path.write_text("제1조(목적) 여비 지급", encoding="utf-8")
+    return str(path)
+
+
+def test_hit_skips_parsing(tmp_path, hwp):
+    cache, parse = HwpCache(str(tmp_path / "cache")), Parser()
+    docs, hit = cache.load_documents(hwp, parse)
+    assert not hit
+    cached, hit = cache.load_documents(hwp, parse)
+    assert hit and len(parse.calls) == 1
+    assert [(doc.page_content, doc.metadata) for doc in cached] == [(doc.page_content, doc.metadata) for doc in docs]
+    assert cache.stats()["hits"] == 1
+
+
+def test_same_content_elsewhere_uses_current_path(tmp_path, hwp):
+    cache, parse = HwpCache(str(tmp_path / "cache")), Parser()
+    cache.load_documents(hwp, parse)
+    copy = tmp_path / "copy.hwp"
+    copy.write_bytes(open(hwp, "rb").read())
+    docs, hit = cache.load_documents(str(copy), parse)
+    assert hit and docs[0].metadata["source"] == str(copy)
+
+
+def test_content_change_invalidates(tmp_path, hwp):
+    cache, parse = HwpCache(str(tmp_path / "cache")), Parser()
+    cache.load_documents(hwp, parse)
+    with open(hwp, "w", encoding="utf-8") as f:
+        f.write("제1조(목적) 개정된 여비 지급")
+    docs, hit = cache.load_documents(hwp, parse)
+    assert not hit and len(parse.calls) == 2
+    assert docs[0].page_content == "제1조(목적) 개정된 여비 지급"
+
+
+def test_loader_version_change_invalidates(tmp_path, hwp, monkeypatch):
+    cache_dir, parse = str(tmp_path / "cache"), Parser()
+    HwpCache(cache_dir).load_documents(hwp, parse)
+
+    monkeypatch.setattr(hwp_cache, "CACHE_FORMAT_VERSION", hwp_cache.CACHE_FORMAT_VERSION + 1)
+    cache = HwpCache(cache_dir)
+    assert cache.stats()["stale"] == 1
+    _, hit = cache.load_documents(hwp, parse)
+    assert not hit and len(parse.calls) == 2
+
+
+def test_corrupted_entry_is_reparsed(tmp_path, hwp):
+    cache, parse = HwpCache(str(tmp_path / "cache")), Parser()
+    cache.load_documents(hwp, parse)
+    _, data_path = cache._paths(cache.key_for(hwp))
+    with open(data_path, "w", encoding="utf-8") as f:
+        f.write("{")
+    docs, hit = cache.load_documents(hwp, parse)
+    assert not hit and docs[0].page_content.startswith("제1조")
+    with open(data_path, encoding="utf-8") as f:
+        assert json.load(f)[0]["page_content"] == docs[0].page_content
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache, parse = HwpCache(str(tmp_path / "cache")), Parser()
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"{i}.hwp"
+        path.write_text(f"제{i}조 " + "가" * 100, encoding="utf-8")
+        paths.append(str(path))
+        cache.load_documents(paths[-1], parse)
+    # 첫 번째 파일을 다시 사용하면 두 번째 파일이 가장 오래된 항목
+    cache.load_documents(paths[0], parse)
+    size = max(meta["size"] for _, meta in cache.entries())
+    assert cache.evict(max_bytes=size * 2) == 1
+    sources = {meta["source"] for _, meta in cache.entries()}
+    assert sources == {os.path.basename(paths[0]), os.path.basename(paths[2])}
+
+    cache.clear()
+    assert cache.entries() == []
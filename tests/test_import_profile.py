@@ -0,0 +1,53 @@
+import os
+import sys
+import json
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+from import_profile import ROOT, STAGES, profile_imports, top_level_imports  # noqa: E402
+
+# 세션 시작 경로에서 import되면 안 되는 무거운 패키지 (백그라운드 초기화/재생성 시에만 로드)
+HEAVY_PACKAGES = {
+    "rag_pipeline", "ingest", "embedding_index", "langchain", "langchain_core", "langchain_openai",
+    "langchain_community", "langchain_teddynote", "chromadb", "openai", "numpy", "httpx",
+}
+
+
+def test_top_level_imports_skips_lazy_imports(tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(
+        "import os, sys\n"
+        "from json import dumps\n"
+        "from . import sibling\n"
+        "import os\n"
+        "def load():\n"
+        "    import numpy\n",
+        encoding="utf-8",
+    )
+    assert top_level_imports(str(script)) == ["os", "sys", "json"]
+
+
+def test_startup_stage_excludes_heavy_packages():
+    assert not HEAVY_PACKAGES & set(STAGES["startup"])
+    assert STAGES["pipeline"] == ["rag_pipeline"]
+
+
+def test_startup_modules_do_not_pull_heavy_packages():
+    # streamlit 자체를 제외한 로컬 시작 모듈을 새 프로세스에서 import하고 로드된 패키지를 확인
+    local = [name for name in STAGES["startup"] if os.path.exists(os.path.join(ROOT, f"{name}.py"))]
+    code = (
+        "import sys, json;"
+        + "".join(f"import {name};" for name in local)
+        + "print(json.dumps(sorted({name.split('.')[0] for name in sys.modules})))"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert not HEAVY_PACKAGES & set(json.loads(proc.stdout))
+
+
+def test_profile_imports_reports_top_level_packages():
+    total, packages = profile_imports(["json"])
+    assert total > 0 and set(packages) == {"json"}
+    # 이미 로드된 모듈은 측정에서 제외
+    total, packages = profile_imports(["json"], already_loaded=["json"])
+    assert (total, packages) == (0, {})
@@ -0,0 +1,106 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import index_versions
+from index_versions import (
+    PipelineSwapper, acquire_build_lock, activate, active_version, create_version, finalize_version,
+    prune, release_build_lock, rollback,
+)
+
+
+def build(root):
+    version, directory = create_version(str(root))
+    finalize_version(directory, {"chunks": 1})
+    return version
+
+
+def test_activate_and_rollback(tmp_path):
+    first, second = build(tmp_path), build(tmp_path)
+    assert activate(str(tmp_path), first) is None
+    assert activate(str(tmp_path), second) == first
+    assert active_version(str(tmp_path)) == second
+    assert rollback(str(tmp_path)) == first
+    assert active_version(str(tmp_path)) == first
+
+
+def test_incomplete_version_cannot_be_activated(tmp_path):
+    version, _ = create_version(str(tmp_path))
+    with pytest.raises(ValueError):
+        activate(str(tmp_path), version)
+
+
+def test_prune_keeps_active_and_in_progress(tmp_path):
+    versions = sorted(build(tmp_path) for _ in range(4))
+    activate(str(tmp_path), versions[0])
+    in_progress, _ = create_version(str(tmp_path))
+    removed = prune(str(tmp_path), keep=2)
+    assert removed == [versions[1]]
+    remaining = set(os.listdir(tmp_path / index_versions.VERSIONS_DIR))
+    assert remaining == {versions[0], versions[2], versions[3], in_progress}
+
+
+def test_build_lock_is_exclusive_across_processes(tmp_path):
+    assert acquire_build_lock(str(tmp_path))
+    # 같은 프로세스의 두 번째 생성도 막음
+    assert not acquire_build_lock(str(tmp_path))
+    code = f"import index_versions, sys; sys.exit(0 if index_versions.acquire_build_lock({str(tmp_path)!r}) else 1)"
+    env = {**os.environ, "PYTHONPATH": os.path.dirname(index_versions.__file__)}
+    assert subprocess.run([sys.executable, "-c", code], env=env).returncode == 1
+    release_build_lock(str(tmp_path))
+    assert subprocess.run([sys.executable, "-c", code], env=env).returncode == 0
+
+
+def test_swapper_keeps_serving_until_new_version_loads(tmp_path):
+    first, second = build(tmp_path), build(tmp_path)
+    activate(str(tmp_path), first)
+    gate = threading.Event()
+    closed = []
+
+    def loader(version):
+        if version == second:
+            gate.wait(5)
+        return {"index_version": version}
+
+    swapper = PipelineSwapper(str(tmp_path), loader, closer=closed.append)
+    assert swapper.wait()["index_version"] == first
+
+    activate(str(tmp_path), second)
+    # 새 버전을 불러오는 동안에는 이전 버전으로 응답
+    assert swapper.poll()["index_version"] == first
+    assert swapper.loading
+    gate.set()
+    swapper._pending[1].result(5)
+    assert swapper.poll()["index_version"] == second
+    assert closed == []
+
+
+def test_swapper_does_not_reload_failed_version_until_retry(tmp_path):
+    first, second = build(tmp_path), build(tmp_path)
+    activate(str(tmp_path), first)
+    calls = []
+
+    def loader(version):
+        calls.append(version)
+        if version == second and calls.count(second) == 1:
+            raise RuntimeError("로드 실패")
+        return {"index_version": version}
+
+    swapper = PipelineSwapper(str(tmp_path), loader)
+    swapper.wait()
+    activate(str(tmp_path), second)
+    swapper.poll()
+    swapper._pending[1].exception(5)
+    assert swapper.poll()["index_version"] == first
+    assert swapper.failed_version == second
+    swapper.poll()
+    assert calls.count(second) == 1
+
+    swapper.retry()
+    swapper.poll()
+    swapper._pending[1].result(5)
+    assert swapper.poll()["index_version"] == second
+    assert swapper.error is None
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+import loadtest  # noqa: E402
+from loadtest import ServiceTarget, percentile, run_level  # noqa: E402
+
+
+class FakeTarget:
+    """추천 질문을 돌려주고 follow_up 요청이면 미리 검색을 쓴 것으로 응답"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def ask(self, question, chat_history, follow_up=False):
+        self.calls.append((question, len(chat_history), follow_up))
+        await asyncio.sleep(0)
+        result = {
+            "answer": f"{question}에 대한 답변 " * 20,
+            "source_documents": [{"id": "chunk-1"}],
+            "follow_up_questions": [f"추천 {len(self.calls)}"],
+            "filters": {"prefetched": follow_up},
+        }
+        return result, 0.01
+
+
+def options(**overrides):
+    values = dict(turns=3, follow_up_prob=1.0, think_time=0.0, duration=0.05, seed=0)
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+def test_follow_up_clicks_are_sent_as_follow_up():
+    target = FakeTarget()
+    result = asyncio.run(run_level(target, 2, options(), os.getpid()))
+
+    assert result["requests"] == len(target.calls) and result["error_rate"] == 0.0
+    # 첫 턴은 예시 질문, 이후 턴은 추천 질문 클릭 (대화 히스토리와 함께)
+    for question, history, follow_up in target.calls:
+        assert follow_up == question.startswith("추천")
+        assert follow_up == (history > 0)
+    assert result["prefetch_hit_rate"] == 1.0
+    assert result["session_avg_kb"] > 0 and result["session_max_kb"] >= result["session_avg_kb"]
+    assert result["ttft_p95_ms"] == 10.0
+
+
+def test_no_follow_ups_means_no_hit_rate():
+    result = asyncio.run(run_level(FakeTarget(), 1, options(follow_up_prob=0.0), os.getpid()))
+    assert result["prefetch_hit_rate"] is None
+
+
+def test_errors_end_session_and_are_counted():
+    class Failing(FakeTarget):
+        async def ask(self, question, chat_history, follow_up=False):
+            raise TimeoutError()
+
+    result = asyncio.run(run_level(Failing(), 1, options(), os.getpid()))
+    assert result["error_rate"] == 1.0 and result["error_types"] == {"TimeoutError": result["requests"]}
+
+
+def test_service_target_stream_sends_follow_up():
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        body = ('event: token\ndata: {"text": "숙박비"}\n\n'
+                'event: done\ndata: {"answer": "숙박비", "follow_up_questions": []}\n\n')
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body.encode())
+
+    async def ask():
+        target = ServiceTarget("http://service", stream=True, timeout=5)
+        await target.client.aclose()
+        target.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await target.ask("숙박비는?", [("q", "a")], follow_up=True)
+        finally:
+            await target.close()
+
+    result, first_token = asyncio.run(ask())
+    assert result["answer"] == "숙박비" and first_token is not None
+    assert payloads == [{"question": "숙박비는?", "chat_history": [["q", "a"]], "follow_up": True}]
+
+
+def test_percentile():
+    assert percentile([], 95) == 0.0
+    assert percentile(list(range(101)), 95) == 95
+    assert loadtest.read_rss(os.getpid()) > 0
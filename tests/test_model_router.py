@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from model_router import DIRECT, FAST, LARGE, direct_answer, route
+
+
+def chunk(id, regulation, article, content="", title=""):
+    return SimpleNamespace(id=id, page_content=content,
+                           metadata={"regulation": regulation, "article": article, "article_title": title})
+
+
+TRAVEL_7 = chunk("a", "여비규정", "제7조", "숙박비는 실비로 지급한다.\n\n상한액은 별표와 같다.", "숙박비")
+TRAVEL_9 = chunk("b", "여비규정", "제9조")
+ACCOUNTING_7 = chunk("c", "회계규정", "제7조")
+
+
+def test_cited_article_answered_directly():
+    decision = route("여비규정 제7조 내용 알려줘", [ACCOUNTING_7, TRAVEL_7], [0.8, 0.79])
+    assert decision["target"] == DIRECT
+    # 같은 번호의 조항이 여러 규정에서 검색되면 질문에 나온 규정을 선택
+    assert decision["features"]["direct_chunk"] == "a"
+
+
+def test_cited_article_not_retrieved_is_not_direct():
+    decision = route("제12조 내용은?", [TRAVEL_7], [0.8])
+    assert decision["target"] == FAST and "direct_chunk" not in decision["features"]
+
+
+def test_short_single_article_question_goes_fast():
+    decision = route("숙박비 상한은 얼마인가요?", [TRAVEL_7, TRAVEL_9], [0.82, 0.70])
+    assert decision == {
+        "target": FAST,
+        "reason": "단일 조항 사실 확인",
+        "features": {"top_score": 0.82, "chars": 14, "articles": 1, "follow_up": False, "reasoning": False},
+    }
+    assert route("숙박비 상한은 얼마인가요?", [TRAVEL_7], [0.82], fast_available=False)["target"] == LARGE
+
+
+def test_large_model_cases():
+    docs, scores = [TRAVEL_7, TRAVEL_9], [0.82, 0.80]
+    cases = {
+        "검색 결과 없음": route("숙박비는?", [], []),
+        "이어지는 대화": route("그럼 제7조는?", [TRAVEL_7], [0.9], chat_history=[("q", "a")]),
+        "복합 추론 표현": route("국내와 국외 숙박비 차이", [TRAVEL_7], [0.9]),
+        "검색 신뢰도 낮음": route("숙박비는?", [TRAVEL_7], [0.3]),
+        "여러 조항 관련": route("숙박비는?", docs, scores),
+        "긴 질문": route("출장 중 숙박비를 법인카드로 결제하고 영수증을 분실한 경우에는 어떻게 처리하면 되는지 알려주세요", [TRAVEL_7], [0.9]),
+    }
+    for reason, decision in cases.items():
+        assert (decision["target"], decision["reason"]) == (LARGE, reason)
+
+
+def test_chunks_without_article_metadata_counted_separately():
+    docs = [chunk("x", None, ""), chunk("y", None, "")]
+    assert route("숙박비는?", docs, [0.9, 0.88])["features"]["articles"] == 2
+
+
+def test_direct_answer_quotes_article():
+    result = direct_answer(TRAVEL_7)
+    assert result["answer"].endswith("*출처: 여비규정 제7조(숙박비)*")
+    assert "> 숙박비는 실비로 지급한다.\n>\n> 상한액은 별표와 같다." in result["answer"]
+    assert result["citations"] == [{"regulation": "여비규정", "article": "제7조"}]
+    assert result["follow_up_questions"] == []
@@ -0,0 +1,57 @@
+import sys
+import types
+
+import pytest
+
+import prefetch
+from prefetch import RetrievalPrefetcher
+
+
+@pytest.fixture
+def retrieved(monkeypatch):
+    """rag_pipeline.retrieve_batch 대신 질문별 (문서, 필터)를 돌려주는 검색 (호출된 질문 목록 기록)"""
+    calls = []
+
+    def retrieve_batch(pipeline, questions, regulations):
+        calls.append(list(questions))
+        return [([f"doc:{question}"], {"regulations": regulations}) for question in questions]
+
+    monkeypatch.setitem(sys.modules, "rag_pipeline", types.SimpleNamespace(retrieve_batch=retrieve_batch))
+    return calls
+
+
+def test_clicked_follow_up_uses_prefetched_result(retrieved):
+    prefetcher = RetrievalPrefetcher(pipeline={}, max_questions=2)
+    assert prefetcher.submit(["질문 A", "질문 B", "질문 C"], ["여비규정"]) == 2
+    assert prefetcher.take("질문 B", ["여비규정"], timeout=5) == (["doc:질문 B"], {"regulations": ["여비규정"]})
+    assert retrieved == [["질문 A", "질문 B"]]
+    # 규정 필터가 다르면 같은 질문이어도 쓰지 않음
+    assert prefetcher.take("질문 A", None) is None
+    stats = prefetcher.snapshot()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    prefetcher.close()
+
+
+def test_unused_entries_expire_as_waste(retrieved, monkeypatch):
+    prefetcher = RetrievalPrefetcher(pipeline={}, ttl=10.0)
+    now = [1000.0]
+    monkeypatch.setattr(prefetch.time, "monotonic", lambda: now[0])
+    prefetcher.submit(["질문 A"])
+    now[0] += 11
+    assert prefetcher.take("질문 A", timeout=5) is None
+    stats = prefetcher.snapshot()
+    assert stats["wasted"] == 1
+    assert stats["waste_rate"] == 1.0
+    prefetcher.close()
+
+
+def test_failed_prefetch_is_a_miss(monkeypatch):
+    def retrieve_batch(pipeline, questions, regulations):
+        raise RuntimeError("검색 실패")
+
+    monkeypatch.setitem(sys.modules, "rag_pipeline", types.SimpleNamespace(retrieve_batch=retrieve_batch))
+    prefetcher = RetrievalPrefetcher(pipeline={})
+    prefetcher.submit(["질문 A"])
+    assert prefetcher.take("질문 A", timeout=5) is None
+    assert prefetcher.snapshot()["misses"] == 1
+    prefetcher.close()
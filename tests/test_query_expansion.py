@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+from query_expansion import SEED_SYNONYMS, SynonymIndex, mine_cost_variants, mine_definitions
+
+
+def doc(text):
+    return SimpleNamespace(page_content=text)
+
+
+CORPUS = [
+    doc('제1조(목적) 이 규정은 한국과학기술원(이하 "학교"라 한다)의 여비 지급에 관한 사항을 정한다.'),
+    doc("제7조(숙박비) 숙박비는 실비로 지급한다. 숙박비가 상한액을 넘으면 초과분은 본인이 부담한다."),
+    doc("제8조(교통비) 교통비는 운임으로 지급하며 교통비 증빙서류를 제출한다."),
+]
+
+
+def test_mined_entries_extend_seed_dictionary():
+    index = SynonymIndex.build(CORPUS)
+    # 정의 조항의 약칭과 비용 용어의 접미사 변형은 기본 항목에 없음
+    assert "숙박값" not in SEED_SYNONYMS and "학교" not in SEED_SYNONYMS
+    assert index.lookup("숙박값은") == ("숙박비",)
+    assert index.lookup("학교의") == ("한국과학기술원",)
+    assert SynonymIndex(SEED_SYNONYMS).lookup("숙박값은") == ()
+
+
+def test_corpus_terms_are_not_rewritten():
+    variants = mine_cost_variants([d.page_content for d in CORPUS])
+    # 코퍼스에 이미 쓰이는 표현(숙박비, 교통비)은 변형으로 추가하지 않음
+    assert "숙박비" not in variants and "교통비" not in variants
+    assert variants["교통료"] == {"교통비"}
+    assert mine_definitions([CORPUS[0].page_content]) == {("한국과학기술원", "학교")}
+
+
+def test_expand_appends_missing_terms_only():
+    index = SynonymIndex(SEED_SYNONYMS)
+    assert index.expand("법카로 택시비 내도 돼요?") == ("법카로 택시비 내도 돼요? (법인카드 교통비 운임)",
+                                                   ["법인카드", "교통비", "운임"])
+    assert index.expand("법카와 법인카드 차이") == ("법카와 법인카드 차이", [])
+    # 접두사 뒤가 조사가 아니면 일치로 보지 않음
+    assert index.lookup("법카드") == ()
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = SynonymIndex.build(CORPUS)
+    index.save(str(tmp_path))
+    assert SynonymIndex.load(str(tmp_path)).entries == index.entries
+    # 사전 파일이 없으면 기본 항목만 사용
+    assert SynonymIndex.load(str(tmp_path / "missing")).entries == SynonymIndex(SEED_SYNONYMS).entries
@@ -0,0 +1,88 @@
+import sys
+import types
+import threading
+
+import pytest
+
+from rebuild_job import RebuildJob, estimate
+
+
+@pytest.fixture
+def build(monkeypatch):
+    """진행 상황을 기록한 뒤 release가 설정될 때까지 기다리는 가짜 build_index_version"""
+    control = types.SimpleNamespace(started=threading.Event(), release=threading.Event(), error=None, calls=0)
+
+    def build_index_version(settings, notices, progress):
+        control.calls += 1
+        progress("parse", files_total=4, files_done=2, current_file="여비규정.hwp", cache_hit=True)
+        progress("embed", chunks=100, embedded=40)
+        control.started.set()
+        control.release.wait(5)
+        if control.error:
+            raise RuntimeError(control.error)
+        notices.append("파일 1개 건너뜀")
+        return "20260101-000000-abcd", None
+
+    monkeypatch.setitem(sys.modules, "rag_pipeline", types.SimpleNamespace(build_index_version=build_index_version))
+    return control
+
+
+def finish(job, build):
+    build.release.set()
+    job._thread.join(5)
+
+
+def test_only_one_run_at_a_time(build):
+    job = RebuildJob()
+    assert job.snapshot() is None
+    assert job.start({})
+    assert build.started.wait(5)
+    assert job.running and not job.start({})
+    finish(job, build)
+    assert not job.running and build.calls == 1
+
+    # 끝난 뒤에는 다시 시작할 수 있음
+    build.release.clear()
+    assert job.start({})
+    finish(job, build)
+    assert build.calls == 2
+
+
+def test_snapshot_reports_progress(build):
+    job = RebuildJob()
+    job.start({})
+    assert build.started.wait(5)
+    state = job.snapshot()
+    assert state["status"] == "running" and state["stage"] == "embed"
+    assert (state["files_done"], state["files_total"], state["cache_hits"]) == (2, 4, 1)
+    assert state["fraction"] == pytest.approx(0.3 + 0.65 * 0.4)
+    # 복사본이므로 수정해도 작업 상태에 영향 없음
+    state["stage"] = "finalize"
+    assert job.snapshot()["stage"] == "embed"
+
+    finish(job, build)
+    state = job.snapshot()
+    assert state["status"] == "succeeded" and state["version"] == "20260101-000000-abcd"
+    assert state["notices"] == ["파일 1개 건너뜀"] and state["finished_at"]
+    assert (state["fraction"], state["eta_seconds"]) == (1.0, 0.0)
+
+
+def test_failure_is_recorded_and_releases_lock(build):
+    job = RebuildJob()
+    build.error = "임베딩 API 오류"
+    job.start({})
+    finish(job, build)
+    state = job.snapshot()
+    assert state["status"] == "failed" and state["error"] == "임베딩 API 오류"
+    assert job.start({})
+    finish(job, build)
+
+
+def test_estimate_uses_current_stage_rate():
+    state = {"status": "running", "stage": "parse", "stage_started_at": 100.0,
+             "files_done": 5, "files_total": 20, "embedded": 0, "chunks": 0}
+    fraction, eta = estimate(state, now=110.0)
+    assert fraction == pytest.approx(0.3 * 0.25) and eta == pytest.approx(30.0)
+    # 아직 처리한 항목이 없으면 남은 시간을 모름
+    assert estimate({**state, "files_done": 0}, now=110.0) == (0.0, None)
+    assert estimate({**state, "stage": "finalize"}, now=110.0) == (0.95, None)
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain_core")
+from regulation_meta import RegulationClassifier, effective_date, split_by_article  # noqa: E402
+
+TRAVEL = """여비규정
+제1장 총칙
+제1조(목적) 이 규정은 여비 지급에 관한 사항을 정한다.
+제2장 국내여비
+제7조(숙박비) 숙박비는 제9조에 따라 실비로 지급한다.
+제7조의2(숙박비의 상한) 숙박비 상한액은 별표와 같다.
+부칙
+이 규정은 2023년 3월 1일부터 시행한다.
+이 규정은 2024년 9월 1일부터 시행한다."""
+
+
+def test_split_by_article_attaches_structure_metadata():
+    docs = split_by_article(SimpleNamespace(page_content=TRAVEL, metadata={"source": "/data/travel.hwp"}), "/data/travel.hwp")
+    articles = [(doc.metadata["chapter"], doc.metadata["article"], doc.metadata["article_title"]) for doc in docs]
+    # 본문 중 "제9조에 따라" 같은 참조는 조항으로 나누지 않음
+    assert articles == [
+        ("", "", ""),
+        ("제1장 총칙", "제1조", "목적"),
+        ("제2장 국내여비", "제7조", "숙박비"),
+        ("제2장 국내여비", "제7조의2", "숙박비의 상한"),
+    ]
+    assert all(doc.metadata["regulation"] == "여비규정" for doc in docs)
+    assert docs[-1].metadata["effective_date"] == "2024-09-01"
+    assert docs[-1].metadata["effective_date_int"] == 20240901
+    assert docs[-1].metadata["source"] == "/data/travel.hwp"
+
+
+def test_effective_date_missing():
+    assert effective_date("시행일 없음") == ""
+
+
+def chunk(regulation, chapter, title):
+    return SimpleNamespace(metadata={"regulation": regulation, "chapter": chapter, "article_title": title})
+
+
+@pytest.fixture
+def classifier():
+    return RegulationClassifier.from_documents([
+        chunk("여비규정", "제2장 국내여비", "숙박비"),
+        chunk("여비규정", "제3장 국외여비", "항공운임"),
+        chunk("회계규정", "제4장 지출", "법인카드의 사용"),
+        chunk("회계규정", "제5장 결산", "회계연도"),
+        chunk("연구관리규정", "제2장 연구비", "연구비의 집행"),
+    ])
+
+
+def test_classifier_infers_related_regulation(classifier):
+    assert classifier.infer("국외여비 항공운임은 어떻게 지급되나요?") == ["여비규정"]
+    assert classifier.infer("법인카드 사용 후 증빙은?") == ["회계규정"]
+
+
+def test_classifier_returns_no_filter_when_unsure(classifier):
+    assert classifier.infer("안녕하세요") == []
+
+
+def test_classifier_round_trip(tmp_path, classifier):
+    classifier.save(str(tmp_path))
+    loaded = RegulationClassifier.load(str(tmp_path))
+    assert loaded.infer("국외여비 항공운임") == classifier.infer("국외여비 항공운임")
+    assert RegulationClassifier.load(str(tmp_path / "missing")) is None
+
+
+def test_quantized_index_regulation_filter():
+    import numpy as np
+    from embedding_index import QuantizedIndex
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(60, 32)).astype(np.float32)
+    regulations = ["여비규정", "회계규정", ""] * 20
+    index = QuantizedIndex.build([str(i) for i in range(60)], vectors, "int8", regulations=regulations)
+
+    # 회계규정 조각과 가장 가까운 쿼리라도 여비규정 필터면 여비규정 조각만 반환
+    hits = index.search(vectors[1], k=5, regulations=["여비규정"])
+    assert len(hits) == 5 and all(int(hit) % 3 == 0 for hit, _ in hits)
+    assert index.search(vectors[1], k=1)[0][0] == "1"
+    assert index.rows_for(["없는규정"]).size == 0 and index.search(vectors[1], regulations=["없는규정"]) == []
+    assert index.rows_for([]) is None
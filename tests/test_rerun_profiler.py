@@ -0,0 +1,89 @@
+import os
+import json
+import time
+import threading
+import tracemalloc
+
+import pytest
+
+import rerun_profiler
+from rerun_profiler import NULL_RUN, REPORT_FILE, start_rerun
+
+
+def settings(tmp_path, enabled=True, keep=2):
+    return {"APP_PROFILE": enabled, "APP_PROFILE_DIR": str(tmp_path),
+            "APP_PROFILE_INTERVAL_MS": 1.0, "APP_PROFILE_KEEP": keep}
+
+
+@pytest.fixture
+def fresh_profiler(monkeypatch):
+    # 프로세스 공유 프로파일러를 테스트마다 새로 만들고 tracemalloc은 원래 상태로 되돌림
+    monkeypatch.setattr(rerun_profiler, "_profiler", None)
+    tracing = tracemalloc.is_tracing()
+    yield
+    if not tracing:
+        tracemalloc.stop()
+
+
+def busy(ms):
+    ended = time.perf_counter() + ms / 1000
+    data = []
+    while time.perf_counter() < ended:
+        data.append(bytearray(1024))
+    return data
+
+
+def folded_runs(directory):
+    return sorted({name.split(".", 1)[0] for name in os.listdir(directory) if name.endswith(".folded")})
+
+
+def test_disabled_does_nothing(tmp_path, fresh_profiler):
+    threads = threading.active_count()
+    run = start_rerun(settings(tmp_path / "profile", enabled=False))
+    assert run is NULL_RUN and not run.enabled
+    run.mark("messages")
+    run.finish()
+    assert rerun_profiler.get_profiler(settings(tmp_path, enabled=False)) is None
+    assert threading.active_count() == threads and not (tmp_path / "profile").exists()
+
+
+def test_sections_and_report(tmp_path, fresh_profiler):
+    run = start_rerun(settings(tmp_path), session_id="s1")
+    run.mark("messages")
+    kept = busy(30)
+    run.mark("answer")
+    busy(10)
+    run.finish()
+    run.finish()
+
+    lines = (tmp_path / REPORT_FILE).read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    summary = json.loads(lines[0])
+    assert summary["session_id"] == "s1"
+    assert [section["name"] for section in summary["sections"]] == ["start", "messages", "answer"]
+    messages = summary["sections"][1]
+    assert messages["wall_ms"] >= 30 and messages["alloc_bytes"] >= len(kept) * 1024
+    with open(summary["cpu_profile"], encoding="utf-8") as f:
+        stacks = f.read()
+    assert "section:messages;" in stacks and "test_rerun_profiler.py:busy" in stacks
+    with open(summary["alloc_profile"], encoding="utf-8") as f:
+        assert "section:messages;" in f.read()
+    assert rerun_profiler.get_profiler().slowest(1)[0]["run_id"] == summary["run_id"]
+
+
+def test_interrupted_rerun_finished_by_next_start(tmp_path, fresh_profiler):
+    first = start_rerun(settings(tmp_path))
+    first.mark("messages")
+    # st.rerun()으로 finish() 없이 끝난 재실행
+    second = start_rerun(settings(tmp_path))
+    assert first.finished and not second.finished
+    second.finish()
+    summaries = rerun_profiler.get_profiler().summaries
+    assert [summary["run_id"] for summary in summaries] == [first.run_id, second.run_id]
+
+
+def test_keeps_recent_folded_files(tmp_path, fresh_profiler):
+    for _ in range(4):
+        start_rerun(settings(tmp_path, keep=2)).finish()
+    assert len(folded_runs(tmp_path)) == 2
+    assert len((tmp_path / REPORT_FILE).read_text(encoding="utf-8").splitlines()) == 4
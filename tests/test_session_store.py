@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+
+import session_store
+from conversation_store import ConversationStore
+from session_store import SessionStore
+
+
+def contents(session):
+    return [message["content"] for message in session.messages]
+
+
+def test_idle_sessions_are_evicted():
+    store = SessionStore(idle_ttl=60)
+    active, idle = store.get("active"), store.get("idle")
+    idle.last_seen -= 120
+    assert store.evict_idle(now=active.last_seen + 1) == 1
+    assert set(store.sessions) == {"active"}
+    assert store.memory_report()["evicted"] == 1
+
+
+def test_history_keeps_recent_turns():
+    store = SessionStore(history_turns=2)
+    session = store.get("s1")
+    for turn in range(3):
+        store.append_turn(session, f"질문 {turn}", f"답변 {turn}")
+    assert session.chat_history == [("질문 1", "답변 1"), ("질문 2", "답변 2")]
+
+
+def test_restored_session_keeps_welcome_and_pages_older(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_store, "PAGE_SIZE", 4)
+    persistence = ConversationStore(str(tmp_path / "conversations.db"))
+    writer = SessionStore(persistence=persistence)
+    session = writer.get("s1")
+    for turn in range(5):
+        writer.add_message("s1", session, {"role": "user", "content": f"질문 {turn}"})
+        writer.add_message("s1", session, {"role": "assistant", "content": f"답변 {turn}"})
+
+    # 메모리에 없는 세션은 최근 PAGE_SIZE개만 복원
+    restored = SessionStore(persistence=persistence).get("s1")
+    assert restored.messages[0].get("welcome")
+    assert contents(restored)[1:] == ["질문 3", "답변 3", "질문 4", "답변 4"]
+    assert restored.chat_history[-1] == ("질문 4", "답변 4")
+    assert restored.has_older
+
+    reader = SessionStore(persistence=persistence)
+    restored = reader.get("s1")
+    assert reader.load_older("s1", restored) == 4
+    assert reader.load_older("s1", restored) == 2
+    assert not restored.has_older
+    assert contents(restored)[1:] == [f"{role} {turn}" for turn in range(5) for role in ("질문", "답변")]
+    assert restored.messages[0].get("welcome")
+
+    # 복원한 세션에 이어서 기록하면 순번이 이어짐
+    reader.add_message("s1", restored, {"role": "user", "content": "질문 5"})
+    assert restored.messages[-1]["seq"] == 10
+
+
+def test_chunk_ids_are_stable_across_rebuilds():
+    pytest.importorskip("langchain_teddynote")
+    pytest.importorskip("langchain_community")
+    from ingest import chunk_ids
+
+    def split(content, article):
+        return SimpleNamespace(page_content=content, metadata={
+            "source": "/data/여비규정.hwp", "regulation": "여비규정", "article": article,
+        })
+
+    first = chunk_ids([split("숙박비는 실비", "제3조"), split("식비는 정액", "제4조"), split("식비는 정액", "제4조")])
+    # 다른 조항이 추가되거나 바뀌어도 나머지 조각의 ID는 그대로
+    second = chunk_ids([split("새 조항", "제2조"), split("숙박비는 실비", "제3조"),
+                        split("식비는 정액", "제4조"), split("식비는 정액", "제4조")])
+    assert len(set(first)) == 3
+    assert second[1:] == first
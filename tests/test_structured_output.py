@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from structured_output import MAX_FOLLOW_UPS, AnswerStreamParser, parse_response
+
+ANSWER = '숙박비는 "실비"로 지급합니다.\n- 상한: 7만원\t(서울)\\ 😀 é'
+RESPONSE = {
+    # 중첩 객체의 "answer" 키는 답변이 아님
+    "citations": [{"regulation": "여비규정", "article": "제7조", "answer": "무시"}],
+    "answer": ANSWER,
+    "follow_up_questions": ["국외 출장은?", "국외 출장은?", "  "],
+}
+
+
+def stream(chunks):
+    parser = AnswerStreamParser()
+    emitted = [parser.feed(chunk) for chunk in chunks]
+    return parser, "".join(emitted)
+
+
+@pytest.mark.parametrize("ensure_ascii", [False, True])
+def test_answer_decoded_across_every_split(ensure_ascii):
+    content = json.dumps(RESPONSE, ensure_ascii=ensure_ascii)
+    for split in range(1, len(content)):
+        parser, emitted = stream([content[:split], content[split:]])
+        assert emitted == ANSWER, split
+        assert parser.answer == ANSWER
+
+
+def test_answer_decoded_one_char_at_a_time():
+    content = json.dumps(RESPONSE, ensure_ascii=True)
+    parser, emitted = stream(list(content))
+    assert emitted == ANSWER
+    result = parser.result()
+    assert result == {
+        "answer": ANSWER.strip(),
+        "citations": [{"regulation": "여비규정", "article": "제7조"}],
+        "follow_up_questions": ["국외 출장은?"],
+        "parse_error": False,
+    }
+
+
+def test_truncated_stream_keeps_decoded_answer():
+    content = json.dumps({"answer": "숙박비는 실비로", "citations": []}, ensure_ascii=False)
+    parser, emitted = stream([content[:-8]])
+    assert emitted == "숙박비는 실비로"
+    result = parser.result()
+    assert result["parse_error"] and result["answer"] == "숙박비는 실비로"
+    assert result["follow_up_questions"] == []
+
+
+def test_parse_response_plain_text_fallback():
+    result = parse_response("규정에 따르면 숙박비는 실비입니다.")
+    assert result == {
+        "answer": "규정에 따르면 숙박비는 실비입니다.",
+        "citations": [],
+        "follow_up_questions": [],
+        "parse_error": True,
+    }
+    assert parse_response("[1, 2]")["parse_error"]
+
+
+def test_parse_response_normalizes_fields():
+    result = parse_response(json.dumps({
+        "answer": " 답변 ",
+        "citations": [{"regulation": "", "article": "제3조"}, {"article": "제3조"}, "제4조", {"regulation": "회계규정"}],
+        "follow_up_questions": [f"질문{i}" for i in range(5)],
+    }))
+    assert result["answer"] == "답변" and not result["parse_error"]
+    assert result["citations"] == [{"regulation": None, "article": "제3조"}]
+    assert len(result["follow_up_questions"]) == MAX_FOLLOW_UPS
@@ -0,0 +1,39 @@
+import pytest
+
+from telemetry import Telemetry, usage_cost
+
+
+def usage(prompt, cached, completion):
+    return {"prompt_tokens": prompt, "cached_tokens": cached, "completion_tokens": completion}
+
+
+def test_cost_uses_cached_input_price_and_longest_model_name():
+    # gpt-4.1-mini 단가: 입력 0.40, 캐시 0.10, 출력 1.60 (USD / 100만 토큰)
+    cost = usage_cost("openai.gpt-4.1-mini-2025-04-14", usage(2000, 1024, 100))
+    assert cost == pytest.approx((976 * 0.40 + 1024 * 0.10 + 100 * 1.60) / 1_000_000)
+    assert usage_cost("unknown-model", usage(10, 0, 10)) is None
+
+
+def test_first_token_is_split_by_cache_hit_and_missing_without_samples():
+    telemetry = Telemetry()
+    telemetry.record_usage("gpt-4.1-mini", usage(2000, 0, 100))
+    summary = telemetry.snapshot()["gpt-4.1-mini"]
+    # 스트리밍이 아닌 답변만 있으면 첫 토큰 시간은 측정값 없음
+    assert summary["first_token_p50_cached_ms"] is None
+    assert summary["first_token_p50_uncached_ms"] is None
+
+    telemetry.record_usage("gpt-4.1-mini", usage(2000, 1024, 100), first_token_ms=300.0)
+    telemetry.record_usage("gpt-4.1-mini", usage(2000, 0, 100), first_token_ms=900.0)
+    summary = telemetry.snapshot()["gpt-4.1-mini"]
+    assert summary["first_token_p50_cached_ms"] == 300.0
+    assert summary["first_token_p50_uncached_ms"] == 900.0
+    assert summary["cache_hit_rate"] == pytest.approx(1024 / 6000)
+
+
+def test_grounding_flag_rates():
+    telemetry = Telemetry()
+    telemetry.record_grounding("m", {"citations": [1, 2], "flagged": [2], "elapsed_ms": 0.1})
+    telemetry.record_grounding("m", {"citations": [1], "flagged": [], "elapsed_ms": 0.2})
+    summary = telemetry.snapshot()["m"]
+    assert summary["answer_flag_rate"] == 0.5
+    assert summary["citation_flag_rate"] == pytest.approx(1 / 3)
@@ -0,0 +1,112 @@
+"""
+임베딩 차원 축소/양자화 설정별 recall과 메모리 비교 벤치마크
+
+사용 예:
+    python tools/bench_embedding_index.py --chroma-dir chroma_db
+    python tools/bench_embedding_index.py --synthetic 5000 --dims 3072
+
+기준(정답)은 원본 차원 float32 전수 검색의 top-k이며, 각 설정에 대해
+재점수화 없이/있을 때의 recall@k, 상주 메모리, 쿼리당 검색 시간을 출력한다.
+무작위 합성 벡터는 Matryoshka 특성이 없으므로 차원 축소 결과는 실제 인덱스로 확인해야 한다.
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_index import QuantizedIndex, truncate_and_normalize, SUPPORTED_QUANTIZATIONS
+
+
+def load_chroma_vectors(chroma_dir):
+    """Chroma 벡터DB에 저장된 모든 임베딩을 읽어옴"""
+    import chromadb
+    client = chromadb.PersistentClient(path=chroma_dir)
+    vectors = []
+    for collection in client.list_collections():
+        if isinstance(collection, str):
+            collection = client.get_collection(collection)
+        data = collection.get(include=["embeddings"])
+        vectors.extend(data["embeddings"])
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def make_queries(vectors, n_queries, noise, seed):
+    """저장된 벡터에 잡음을 더해 쿼리로 사용 (실제 질문 임베딩의 대용)"""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+    queries = vectors[picks] + rng.normal(scale=noise, size=(len(picks), vectors.shape[1])).astype(np.float32)
+    return truncate_and_normalize(queries)
+
+
+def recall_at_k(found, truth):
+    return len(set(found) & set(truth)) / max(len(truth), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 차원/양자화 설정별 recall 및 메모리 벤치마크")
+    parser.add_argument("--chroma-dir", default=None, help="실제 벡터DB 디렉토리")
+    parser.add_argument("--synthetic", type=int, default=0, help="합성 벡터 개수 (벡터DB 대신 사용)")
+    parser.add_argument("--dims", type=int, default=3072, help="합성 벡터 차원")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--rescore-k", type=int, default=20)
+    parser.add_argument("--truncate", default="full,1536,1024,512,256", help="비교할 차원 목록 (full=원본)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.chroma_dir:
+        vectors = load_chroma_vectors(args.chroma_dir)
+    elif args.synthetic:
+        rng = np.random.default_rng(args.seed)
+        vectors = rng.normal(size=(args.synthetic, args.dims)).astype(np.float32)
+    else:
+        parser.error("--chroma-dir 또는 --synthetic 중 하나를 지정하세요")
+    if len(vectors) == 0:
+        print("벡터가 없습니다.")
+        return
+
+    full = truncate_and_normalize(vectors)
+    queries = make_queries(full, args.queries, args.noise, args.seed)
+    ids = [str(i) for i in range(len(full))]
+
+    # 정답: 원본 차원 float32 전수 검색
+    exact_scores = queries @ full.T
+    truth = [set(np.argsort(-row)[:args.k].astype(str)) for row in exact_scores]
+    baseline_bytes = full.nbytes
+
+    print(f"벡터 {len(full)}개 x {full.shape[1]}차원, 쿼리 {len(queries)}개, k={args.k}, rescore_k={args.rescore_k}")
+    print(f"{'차원':>6} {'정밀도':>8} {'상주 메모리':>12} {'비율':>6} {'recall':>8} {'재점수화 recall':>16} {'ms/쿼리':>8}")
+
+    for spec in args.truncate.split(","):
+        spec = spec.strip()
+        dims = None if spec == "full" else int(spec)
+        if dims and dims > full.shape[1]:
+            continue
+        for method in SUPPORTED_QUANTIZATIONS:
+            index = QuantizedIndex.build(ids, full, method, dimensions=dims)
+            truncated_queries = truncate_and_normalize(queries, dims)
+
+            plain, rescored = [], []
+            started = time.perf_counter()
+            for q, expected in zip(truncated_queries, truth):
+                hits = index.search(q, k=args.k, rescore_k=args.rescore_k)
+                rescored.append(recall_at_k([h[0] for h in hits], expected))
+            elapsed_ms = (time.perf_counter() - started) * 1000 / len(truncated_queries)
+            for q, expected in zip(truncated_queries, truth):
+                hits = index.search(q, k=args.k, rescore=False)
+                plain.append(recall_at_k([h[0] for h in hits], expected))
+
+            print(
+                f"{dims or full.shape[1]:>6} {method:>8} {index.memory_bytes / 1024:>10.1f}KB "
+                f"{index.memory_bytes / baseline_bytes:>6.2f} {np.mean(plain):>8.3f} "
+                f"{np.mean(rescored):>16.3f} {elapsed_ms:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
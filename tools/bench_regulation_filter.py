@@ -0,0 +1,140 @@
+"""
+규정 필터 검색과 전체 검색의 후보 수, 정밀도, 검색 시간 비교 벤치마크
+
+사용 예:
+    python tools/bench_regulation_filter.py --chroma-dir chroma_db/versions/<버전>
+    python tools/bench_regulation_filter.py --synthetic 20000 --regulations 40
+
+각 쿼리는 한 조각의 벡터에 잡음을 더해 만들고 그 조각의 규정을 쿼리의 규정으로 본다.
+정답은 해당 규정 안에서 float32 전수 검색한 top-k이며, 양자화 인덱스(QuantizedIndex)로
+필터 없이/규정 필터로 검색했을 때의 후보(점수를 계산한 행) 수, recall@k, 같은 규정 비율(precision@k), 쿼리당 시간을 출력한다.
+--chroma-dir이면 Chroma where 필터 검색 시간과 저장된 규정 분류기의 추론 정확도(조항 제목을 질문으로 사용)도 함께 측정한다.
+합성 벡터는 규정별 중심 벡터 주변에 조각을 흩어 만든다.
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_index import QuantizedIndex, truncate_and_normalize
+
+
+def load_chroma(chroma_dir):
+    """Chroma 벡터DB의 (컬렉션, ID, 벡터, 메타데이터)"""
+    import chromadb
+    client = chromadb.PersistentClient(path=chroma_dir)
+    collections = client.list_collections()
+    collection = collections[0]
+    if isinstance(collection, str):
+        collection = client.get_collection(collection)
+    data = collection.get(include=["embeddings", "metadatas"])
+    metadatas = [metadata or {} for metadata in data["metadatas"]]
+    return collection, data["ids"], np.asarray(data["embeddings"], dtype=np.float32), metadatas
+
+
+def synthetic(n, dims, n_regulations, spread, seed):
+    """규정별 중심 벡터 주변의 합성 조각 (ID, 벡터, 메타데이터)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_regulations, dims)).astype(np.float32)
+    labels = rng.integers(0, n_regulations, size=n)
+    vectors = centers[labels] + rng.normal(scale=spread, size=(n, dims)).astype(np.float32)
+    metadatas = [{"regulation": f"규정{label:03d}"} for label in labels]
+    return [str(i) for i in range(n)], vectors, metadatas
+
+
+def timed(fn, items):
+    started = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, (time.perf_counter() - started) * 1000 / max(len(items), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규정 필터 검색 벤치마크")
+    parser.add_argument("--chroma-dir", default=None, help="실제 벡터DB 디렉토리 (버전 디렉토리)")
+    parser.add_argument("--synthetic", type=int, default=0, help="합성 조각 개수 (벡터DB 대신 사용)")
+    parser.add_argument("--dims", type=int, default=1536, help="합성 벡터 차원")
+    parser.add_argument("--regulations", type=int, default=40, help="합성 규정 수")
+    parser.add_argument("--spread", type=float, default=3.0, help="합성 조각의 규정 중심으로부터 흩어진 정도")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.2)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--method", default="int8")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    collection = None
+    if args.chroma_dir:
+        collection, ids, vectors, metadatas = load_chroma(args.chroma_dir)
+    elif args.synthetic:
+        ids, vectors, metadatas = synthetic(args.synthetic, args.dims, args.regulations, args.spread, args.seed)
+    else:
+        parser.error("--chroma-dir 또는 --synthetic 중 하나를 지정하세요")
+    if len(ids) == 0:
+        print("벡터가 없습니다.")
+        return
+
+    regulations = [metadata.get("regulation", "") for metadata in metadatas]
+    full = truncate_and_normalize(vectors)
+    index = QuantizedIndex.build(ids, full, args.method, regulations=regulations)
+
+    rng = np.random.default_rng(args.seed)
+    picks = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    queries = truncate_and_normalize(
+        full[picks] + rng.normal(scale=args.noise, size=(len(picks), full.shape[1])).astype(np.float32)
+    )
+    cases = [(query, regulations[pick]) for query, pick in zip(queries, picks)]
+
+    # 정답: 쿼리의 규정 안에서 float32 전수 검색한 top-k
+    truth = []
+    for query, regulation in cases:
+        rows = index.rows_for([regulation])
+        scores = full[rows] @ query
+        truth.append({ids[rows[i]] for i in np.argsort(-scores)[:args.k]})
+
+    unfiltered, unfiltered_ms = timed(lambda case: index.search(case[0], k=args.k), cases)
+    filtered, filtered_ms = timed(lambda case: index.search(case[0], k=args.k, regulations=[case[1]]), cases)
+    region = dict(zip(ids, regulations))
+
+    def summarize(results):
+        recall = np.mean([len({hit for hit, _ in hits} & expected) / max(len(expected), 1)
+                          for hits, expected in zip(results, truth)])
+        precision = np.mean([np.mean([region[hit] == regulation for hit, _ in hits]) if hits else 0.0
+                             for hits, (_, regulation) in zip(results, cases)])
+        return recall, precision
+
+    candidates = np.mean([len(index.rows_for([regulation])) for _, regulation in cases])
+    print(f"조각 {len(ids)}개, 규정 {len(set(regulations))}개, 쿼리 {len(cases)}개, k={args.k}, {args.method}")
+    print(f"{'검색':<10} {'후보 수':>10} {'recall':>8} {'같은 규정':>10} {'ms/쿼리':>9}")
+    for name, results, count, elapsed in (
+        ("전체", unfiltered, len(ids), unfiltered_ms),
+        ("규정 필터", filtered, candidates, filtered_ms),
+    ):
+        recall, precision = summarize(results)
+        print(f"{name:<10} {count:>10.0f} {recall:>8.3f} {precision:>10.3f} {elapsed:>9.3f}")
+
+    if collection is not None:
+        def chroma_query(case, where):
+            return collection.query(query_embeddings=[case[0].tolist()], n_results=args.k, where=where, include=[])
+
+        _, chroma_ms = timed(lambda case: chroma_query(case, None), cases)
+        _, chroma_filtered_ms = timed(lambda case: chroma_query(case, {"regulation": {"$in": [case[1]]}}), cases)
+        print(f"Chroma: 전체 {chroma_ms:.3f} ms/쿼리, where 규정 필터 {chroma_filtered_ms:.3f} ms/쿼리")
+
+        from regulation_meta import RegulationClassifier
+        classifier = RegulationClassifier.load(args.chroma_dir)
+        titled = [(metadata["article_title"], metadata.get("regulation", ""))
+                  for metadata in metadatas if metadata.get("article_title")]
+        if classifier is not None and titled:
+            inferred, infer_ms = timed(lambda item: classifier.infer(item[0]), titled)
+            hit = np.mean([regulation in names for names, (_, regulation) in zip(inferred, titled)])
+            applied = np.mean([bool(names) for names in inferred])
+            print(f"규정 분류기: 조항 제목 {len(titled)}개 중 필터 적용 {applied:.1%}, "
+                  f"정답 규정 포함 {hit:.1%}, {infer_ms * 1000:.0f} µs/질문")
+
+
+if __name__ == "__main__":
+    main()
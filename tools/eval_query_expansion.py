@@ -0,0 +1,122 @@
+"""
+질문 용어 정규화(동의어 사전)의 검색 recall 평가
+
+동의어 사전과 별도로 작성한 비공식 질문 목록(기본: tools/informal_queries.jsonl)으로
+확장하지 않은 경우, 기본 항목만 쓴 사전, 기본 항목과 코퍼스에서 추출한 항목을 함께 쓴 사전(활성 인덱스의 사전)의
+recall@k를 비교한다. 각 질문의 정답은 다음 중 하나이다.
+    articles  - 정답 조항 목록 ([{"regulation": "여비규정", "article": "제7조"}]), 검색된 조각의 조항과 대조
+    reference - 같은 뜻의 규정 용어로 쓴 질문, 이 질문의 검색 결과 top-k 조각을 정답으로 사용
+검색에는 활성 버전의 벡터DB와 임베딩 API를 사용한다 (모의 모델 서버로도 실행 가능).
+
+사용 예:
+    python tools/eval_query_expansion.py
+    python tools/eval_query_expansion.py --queries labeled.jsonl --k 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings import load_settings
+from grounding import normalize_article, normalize_name
+from query_expansion import SEED_SYNONYMS, SynonymIndex
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "informal_queries.jsonl")
+
+
+def load_queries(path):
+    """{"query", "articles" 또는 "reference"} JSONL"""
+    cases = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            case = json.loads(line)
+            if not case.get("articles") and not case.get("reference"):
+                raise ValueError(f"정답(articles 또는 reference)이 없는 질문입니다: {case['query']}")
+            cases.append(case)
+    return cases
+
+
+def article_key(regulation, article):
+    return normalize_name(regulation or ""), normalize_article(article or "")
+
+
+def recall(case, docs, truth_ids):
+    """정답 조항(또는 정답 조각) 중 검색된 비율"""
+    if case.get("articles"):
+        gold = {article_key(item.get("regulation"), item["article"]) for item in case["articles"]}
+        found = {article_key(doc.metadata.get("regulation"), doc.metadata.get("article")) for doc in docs}
+        # 규정명 없이 적은 정답은 조항 번호만 비교
+        hits = sum(1 for regulation, article in gold
+                   if any(article == a and (not regulation or regulation in r) for r, a in found))
+        return hits / len(gold)
+    return len(truth_ids & {doc.id for doc in docs}) / max(len(truth_ids), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동의어 사전 질문 확장의 recall 평가")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="비공식 질문과 정답 JSONL")
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    from rag_pipeline import init_pipeline
+
+    settings = load_settings()
+    settings["READ_ONLY_INDEX"] = True
+    pipeline = init_pipeline(settings)
+    retriever = pipeline["retriever"]
+    retriever.k = args.k
+
+    def search(query):
+        return [doc for doc, _ in retriever.search_with_scores(query)]
+
+    dictionaries = {
+        "기본 항목": SynonymIndex(SEED_SYNONYMS),
+        "기본+추출": pipeline["synonyms"],
+    }
+    cases = load_queries(args.queries)
+    scores = {"확장 없음": [], **{name: [] for name in dictionaries}}
+    changed = {name: 0 for name in dictionaries}
+    for case in cases:
+        query = case["query"]
+        truth_ids = set() if case.get("articles") else {doc.id for doc in search(case["reference"])}
+        scores["확장 없음"].append(recall(case, search(query), truth_ids))
+        line = [f"확장 없음 {scores['확장 없음'][-1]:.2f}"]
+        for name, synonyms in dictionaries.items():
+            expanded, added = synonyms.expand(query)
+            if added:
+                changed[name] += 1
+                scores[name].append(recall(case, search(expanded), truth_ids))
+            else:
+                # 확장되지 않으면 검색 결과도 같음
+                scores[name].append(scores["확장 없음"][-1])
+            line.append(f"{name} {scores[name][-1]:.2f} (+{', '.join(added) or '-'})")
+        print(f"- {query}")
+        print(f"    {' / '.join(line)}")
+
+    # 확장 자체의 비용 (검색 경로에 추가되는 시간)
+    synonyms = pipeline["synonyms"]
+    repeats = 1000
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for case in cases:
+            synonyms.expand(case["query"])
+    expand_us = (time.perf_counter() - started) * 1e6 / (repeats * len(cases))
+
+    labeled = sum(1 for case in cases if case.get("articles"))
+    print()
+    print(f"평가 질문 {len(cases)}개 (정답 조항 {labeled}개, 규정 용어 질문 {len(cases) - labeled}개), k={args.k}")
+    for name, values in scores.items():
+        size = f", 사전 항목 {len(dictionaries[name])}개, 확장된 질문 {changed[name]}개" if name in dictionaries else ""
+        print(f"recall@{args.k} {name}: {statistics.mean(values):.3f}{size}")
+    print(f"질문당 확장 시간: {expand_us:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
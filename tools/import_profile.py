@@ -0,0 +1,131 @@
+"""
+시작 경로별 import 시간 측정 리포트
+
+`python -X importtime`으로 각 단계에서 import되는 모듈을 별도 프로세스에서 측정한다.
+    - startup: 매 세션 UI가 뜨기 전에 import되는 모듈 (app.py 최상위 import문에서 추출)
+    - pipeline: 백그라운드 초기화 스레드에서 import되는 모듈
+    - ingest: 벡터DB 재생성 시에만 import되는 모듈
+
+사용 예:
+    python tools/import_profile.py                       # 리포트 출력
+    python tools/import_profile.py --save baseline.json  # 기준값 저장
+    python tools/import_profile.py --baseline baseline.json --tolerance 0.2
+기준값 대비 startup 단계 시간이 허용치 이상 늘어나면 종료 코드 1을 반환한다.
+"""
+import os
+import ast
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def top_level_imports(path):
+    """스크립트의 최상위 import문이 가져오는 모듈 목록 (함수 안에서 지연 import하는 모듈은 제외)"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+
+# 단계별로 측정할 import 목록
+STAGES = {
+    "startup": top_level_imports(os.path.join(ROOT, "app.py")),
+    "pipeline": ["rag_pipeline"],
+    "ingest": ["ingest"],
+}
+
+
+def profile_imports(modules, already_loaded=()):
+    """모듈 목록의 import 시간을 측정하여 (총 시간 us, {최상위 패키지: 누적 us})를 반환"""
+    preload = "".join(f"import {name};" for name in already_loaded)
+    # 이미 로드된 모듈의 비용은 제외하기 위해 먼저 import한 뒤 측정 대상만 importtime으로 기록
+    code = (
+        f"{preload}"
+        "import sys, importlib;"
+        "sys.stderr.write('--- profile start ---\\n');"
+        + "".join(f"importlib.import_module({name!r});" for name in modules)
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import 실패")
+
+    lines = proc.stderr.split("--- profile start ---\n", 1)[-1].splitlines()
+    packages = {}
+    total = 0
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # 모듈명 앞의 들여쓰기는 import 깊이를 나타내므로 구분자 뒤 공백 한 칸만 제거
+        cumulative, name = int(parts[1]), parts[2][1:]
+        # 들여쓰기가 없는 항목이 최상위 import
+        if name == name.lstrip():
+            top = name.split(".")[0]
+            packages[top] = packages.get(top, 0) + cumulative
+            total += cumulative
+    return total, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시작 경로별 import 시간 리포트")
+    parser.add_argument("--top", type=int, default=10, help="단계별로 표시할 상위 패키지 수")
+    parser.add_argument("--save", help="측정 결과를 기준값 JSON으로 저장")
+    parser.add_argument("--baseline", help="비교할 기준값 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="startup 시간 허용 증가율")
+    args = parser.parse_args()
+
+    report = {}
+    loaded = []
+    for stage, modules in STAGES.items():
+        try:
+            total, packages = profile_imports(modules, already_loaded=loaded)
+        except RuntimeError as e:
+            print(f"[{stage}] 측정 실패: {e}")
+            continue
+        report[stage] = {"total_ms": total / 1000, "packages": {k: v / 1000 for k, v in packages.items()}}
+        loaded.extend(modules)
+
+        print(f"[{stage}] {', '.join(modules)}: {total / 1000:.1f} ms")
+        for name, us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {name:<30} {us / 1000:>8.1f} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"기준값 저장: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressed = False
+        for stage, current in report.items():
+            if stage not in baseline:
+                continue
+            before = baseline[stage]["total_ms"]
+            change = (current["total_ms"] - before) / before if before else 0.0
+            print(f"[{stage}] 기준 {before:.1f} ms -> 현재 {current['total_ms']:.1f} ms ({change:+.0%})")
+            if stage == "startup" and change > args.tolerance:
+                regressed = True
+        if regressed:
+            print("startup import 시간이 허용치를 넘었습니다.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+동시 채팅 세션 부하 테스트
+
+예시 질문으로 시작해 답변의 추천 질문을 클릭하는 다중 턴 세션을 동시에 실행하면서
+동시 세션 수를 단계적으로 늘려 처리량, 지연 시간 분포, 오류율, 세션당 메모리를 측정한다.
+추천 질문 클릭은 앱과 같이 follow_up으로 요청하므로 미리 검색(prefetch) 적중률도 함께 측정한다.
+메모리는 한 번만 드는 파이프라인 로드(첫 요청으로 인덱스가 메모리에 올라오는 것까지 포함, 워밍업 단계에서 측정)와
+세션별 메모리(앱과 같이 SessionStore에 보관한 대화 상태의 크기)를 따로 보고한다.
+
+대상:
+    service   - 답변 서비스(answer_service.py)의 HTTP 엔드포인트 (--stream이면 SSE)
+    inprocess - 이 프로세스에서 rag_pipeline 답변 경로를 직접 실행
+
+사용 예:
+    # 모의 모델 서버와 답변 서비스(워커 2개)를 띄우고 측정
+    python tools/loadtest.py --start-mock --start-service 2 --concurrency 1,4,16,32
+    # 이미 떠 있는 서비스 대상 (서버 프로세스 메모리도 측정)
+    python tools/loadtest.py --url http://localhost:8000 --server-pid 12345
+    # 프로세스 내 답변 경로 대상
+    python tools/loadtest.py --target inprocess --start-mock --mock-latency-ms 500
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import asyncio
+import argparse
+import itertools
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from example_questions import EXAMPLE_QUESTIONS
+from session_store import SessionStore
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_rss(pid):
+    """프로세스와 자식 프로세스(워커)의 RSS 합계 (바이트, 리눅스 /proc 기준)"""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    for target in pids:
+        try:
+            with open(f"/proc/{target}/statm") as f:
+                total += int(f.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            continue
+    return total
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class ServiceTarget:
+    """answer_service HTTP 엔드포인트 대상"""
+
+    def __init__(self, url, stream, timeout):
+        import httpx
+        self.url = url.rstrip("/")
+        self.stream = stream
+        self.client = httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=None))
+
+    async def ask(self, question, chat_history, follow_up=False):
+        """(답변 결과, 첫 토큰까지 걸린 초 또는 None)"""
+        payload = {"question": question, "chat_history": [list(turn) for turn in chat_history]}
+        if follow_up:
+            payload["follow_up"] = True
+        started = time.perf_counter()
+        if not self.stream:
+            response = await self.client.post(f"{self.url}/v1/answer", json=payload)
+            response.raise_for_status()
+            return response.json(), None
+        first_token = None
+        result = None
+        event = "message"
+        async with self.client.stream("POST", f"{self.url}/v1/answer/stream", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data = json.loads(line[len("data:"):].strip())
+                    if event == "token" and first_token is None:
+                        first_token = time.perf_counter() - started
+                    elif event == "done":
+                        result = data
+                    elif event == "error":
+                        raise RuntimeError(data.get("detail", "stream error"))
+        if result is None:
+            raise RuntimeError("스트림이 done 이벤트 없이 종료되었습니다.")
+        return result, first_token
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class InProcessTarget:
+    """이 프로세스에서 rag_pipeline 답변 경로를 스레드로 실행"""
+
+    def __init__(self):
+        from settings import load_settings
+        from rag_pipeline import init_pipeline
+        settings = load_settings()
+        settings["READ_ONLY_INDEX"] = True
+        self.pipeline = init_pipeline(settings)
+
+    def _answer(self, question, chat_history, follow_up):
+        from rag_pipeline import answer_question, prefetch_follow_ups
+        result = answer_question(self.pipeline, question, chat_history, follow_up=follow_up)
+        # 앱과 같이 표시할 추천 질문의 검색을 미리 시작
+        prefetch_follow_ups(self.pipeline, result["follow_up_questions"])
+        return result
+
+    async def ask(self, question, chat_history, follow_up=False):
+        result = await asyncio.to_thread(self._answer, question, list(chat_history), follow_up)
+        return result, None
+
+    async def close(self):
+        pass
+
+
+async def run_session(target, rng, args, stats, deadline, store, session_id):
+    """예시 질문 → 추천 질문 클릭으로 이어지는 한 세션 (대화 상태는 앱과 같이 SessionStore에 보관)"""
+    session = store.get(session_id)
+    question = rng.choice(EXAMPLE_QUESTIONS)
+    follow_up = False
+    for _ in range(args.turns):
+        if time.monotonic() > deadline:
+            break
+        store.add_message(session_id, session, {"role": "user", "content": question})
+        started = time.perf_counter()
+        try:
+            result, first_token = await target.ask(question, session.chat_history, follow_up)
+        except Exception as e:
+            stats["errors"] += 1
+            stats["error_types"][type(e).__name__] = stats["error_types"].get(type(e).__name__, 0) + 1
+            break
+        stats["latencies"].append(time.perf_counter() - started)
+        if first_token is not None:
+            stats["first_token"].append(first_token)
+        if follow_up:
+            stats["follow_ups"] += 1
+            stats["prefetched"] += 1 if (result.get("filters") or {}).get("prefetched") else 0
+        follow_ups = result.get("follow_up_questions", [])
+        store.append_turn(session, question, result["answer"])
+        store.add_message(session_id, session, {
+            "role": "assistant",
+            "content": result["answer"],
+            "reference_ids": [doc["id"] for doc in result.get("source_documents", [])],
+            "follow_up_questions": follow_ups,
+        })
+
+        follow_up = bool(follow_ups) and rng.random() < args.follow_up_prob
+        question = rng.choice(follow_ups) if follow_up else rng.choice(EXAMPLE_QUESTIONS)
+        # 사용자가 답변을 읽는 시간
+        await asyncio.sleep(rng.uniform(0, args.think_time))
+    stats["sessions"] += 1
+
+
+async def warm_up(target, count):
+    """파이프라인의 지연 로드(인덱스, 모델 클라이언트 등)가 끝나도록 예시 질문을 순서대로 요청"""
+    for question in EXAMPLE_QUESTIONS[:count]:
+        try:
+            await target.ask(question, [])
+        except Exception:
+            pass
+
+
+async def run_level(target, concurrency, args, rss_pid):
+    """지정한 동시 세션 수로 duration 동안 세션을 계속 실행"""
+    stats = {"latencies": [], "first_token": [], "errors": 0, "error_types": {}, "sessions": 0,
+             "follow_ups": 0, "prefetched": 0}
+    rng = random.Random(args.seed + concurrency)
+    deadline = time.monotonic() + args.duration
+    # 단계마다 새 저장소 (세션은 측정이 끝날 때까지 유지되어 크기를 잴 수 있음)
+    store = SessionStore()
+    session_ids = itertools.count()
+    rss_before = read_rss(rss_pid)
+    peak = {"rss": rss_before}
+
+    async def sample_memory():
+        while True:
+            peak["rss"] = max(peak["rss"], read_rss(rss_pid))
+            await asyncio.sleep(0.5)
+
+    async def worker():
+        while time.monotonic() < deadline:
+            await run_session(target, rng, args, stats, deadline, store, f"s{next(session_ids)}")
+
+    sampler = asyncio.create_task(sample_memory())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+
+    requests = len(stats["latencies"]) + stats["errors"]
+    sessions = store.memory_report()
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "sessions": stats["sessions"],
+        "throughput_rps": len(stats["latencies"]) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(stats["latencies"], 50) * 1000,
+        "p95_ms": percentile(stats["latencies"], 95) * 1000,
+        "p99_ms": percentile(stats["latencies"], 99) * 1000,
+        "ttft_p95_ms": percentile(stats["first_token"], 95) * 1000 if stats["first_token"] else None,
+        "mean_ms": statistics.mean(stats["latencies"]) * 1000 if stats["latencies"] else 0.0,
+        "error_rate": stats["errors"] / requests if requests else 0.0,
+        "error_types": stats["error_types"],
+        # 클릭한 추천 질문 중 미리 계산한 검색 결과를 쓴 비율
+        "prefetch_hit_rate": stats["prefetched"] / stats["follow_ups"] if stats["follow_ups"] else None,
+        "rss_mb": peak["rss"] / 1024 / 1024,
+        # 단계 동안 늘어난 RSS (동시 요청 처리에 드는 메모리, 파이프라인 로드는 워밍업에서 제외됨)
+        "rss_growth_per_concurrent_kb": max(0, peak["rss"] - rss_before) / concurrency / 1024,
+        # 세션 대화 상태 크기 (앱의 SessionStore에 보관되는 메시지, 대화 히스토리, 청크 ID)
+        "session_avg_kb": sessions["avg_session_bytes"] / 1024,
+        "session_max_kb": sessions["max_session_bytes"] / 1024,
+    }
+
+
+def wait_for_port(url, timeout=60):
+    import httpx
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    raise RuntimeError(f"서버가 응답하지 않습니다: {url}")
+
+
+def start_process(command, env, health_url):
+    process = subprocess.Popen(command, cwd=ROOT, env=env, start_new_session=True)
+    wait_for_port(health_url)
+    return process
+
+
+def stop_process(process):
+    if process and process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=10)
+
+
+async def main_async(args):
+    processes = []
+    env = dict(os.environ)
+    try:
+        if args.start_mock:
+            mock = start_process(
+                [sys.executable, "mock_openai.py", "--port", str(args.mock_port),
+                 "--latency-ms", str(args.mock_latency_ms), "--tokens-per-sec", str(args.mock_tokens_per_sec),
+                 "--error-rate", str(args.mock_error_rate)],
+                env, f"http://127.0.0.1:{args.mock_port}/docs",
+            )
+            processes.append(mock)
+            env.update(OPENAI_API_BASE=f"http://127.0.0.1:{args.mock_port}/v1", OPENAI_API_KEY="mock")
+            os.environ.update(OPENAI_API_BASE=env["OPENAI_API_BASE"], OPENAI_API_KEY="mock")
+
+        server_pid = args.server_pid
+        if args.target == "service" and args.start_service:
+            service = start_process(
+                [sys.executable, "-m", "uvicorn", "answer_service:app", "--port", str(args.service_port),
+                 "--workers", str(args.start_service), "--log-level", "warning"],
+                env, f"http://127.0.0.1:{args.service_port}/healthz",
+            )
+            processes.append(service)
+            args.url = f"http://127.0.0.1:{args.service_port}"
+            server_pid = service.pid
+
+        if args.target == "service":
+            rss_pid = server_pid or os.getpid()
+            # 서비스는 시작 시 파이프라인을 로드하므로 이미 로드된 뒤부터 측정
+            rss_start = read_rss(rss_pid)
+            target = ServiceTarget(args.url, args.stream, args.timeout)
+        else:
+            rss_pid = os.getpid()
+            rss_start = read_rss(rss_pid)
+            target = InProcessTarget()
+        await warm_up(target, args.warmup)
+        load = {"rss_start_mb": rss_start / 1024 / 1024, "pipeline_load_mb": (read_rss(rss_pid) - rss_start) / 1024 / 1024}
+
+        results = []
+        print(f"대상: {args.target} ({args.url if args.target == 'service' else 'in-process'}), "
+              f"단계별 {args.duration:.0f}초, 세션당 최대 {args.turns}턴")
+        print(f"파이프라인 로드 + 워밍업 {args.warmup}회: RSS {load['rss_start_mb']:.1f} MB → "
+              f"+{load['pipeline_load_mb']:.1f} MB (한 번만 듦)")
+        print(f"{'동시':>4} {'요청':>6} {'처리량/s':>9} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} "
+              f"{'TTFT95':>8} {'오류율':>7} {'미리검색':>8} {'RSS MB':>8} {'증가KB/동시':>11} {'세션KB':>8}")
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            result = await run_level(target, concurrency, args, rss_pid)
+            results.append(result)
+            ttft = f"{result['ttft_p95_ms']:.0f}" if result["ttft_p95_ms"] is not None else "-"
+            hit_rate = f"{result['prefetch_hit_rate']:.0%}" if result["prefetch_hit_rate"] is not None else "-"
+            print(f"{concurrency:>4} {result['requests']:>6} {result['throughput_rps']:>9.2f} "
+                  f"{result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f} {result['p99_ms']:>8.0f} "
+                  f"{ttft:>8} {result['error_rate']:>7.1%} {hit_rate:>8} {result['rss_mb']:>8.1f} "
+                  f"{result['rss_growth_per_concurrent_kb']:>11.1f} {result['session_avg_kb']:>8.1f}")
+        await target.close()
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"load": load, "levels": results}, f, indent=2, ensure_ascii=False)
+            print(f"결과 저장: {args.json}")
+    finally:
+        for process in reversed(processes):
+            stop_process(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동시 채팅 세션 부하 테스트")
+    parser.add_argument("--target", choices=["service", "inprocess"], default="service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="답변 서비스 주소")
+    parser.add_argument("--stream", action="store_true", help="SSE 엔드포인트 사용 (첫 토큰 지연 측정)")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="단계별 동시 세션 수")
+    parser.add_argument("--duration", type=float, default=30.0, help="단계별 측정 시간 (초)")
+    parser.add_argument("--turns", type=int, default=4, help="세션당 최대 턴 수")
+    parser.add_argument("--follow-up-prob", type=float, default=0.7, help="추천 질문을 클릭할 확률")
+    parser.add_argument("--think-time", type=float, default=2.0, help="턴 사이 최대 대기 시간 (초)")
+    parser.add_argument("--warmup", type=int, default=3, help="측정 전 순서대로 보내는 요청 수 (파이프라인 로드 측정)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--server-pid", type=int, default=None, help="메모리를 측정할 서버 프로세스 PID")
+    parser.add_argument("--start-service", type=int, default=0, metavar="WORKERS", help="답변 서비스를 지정한 워커 수로 실행")
+    parser.add_argument("--service-port", type=int, default=8000)
+    parser.add_argument("--start-mock", action="store_true", help="모의 OpenAI 서버를 실행하여 사용")
+    parser.add_argument("--mock-port", type=int, default=8001)
+    parser.add_argument("--mock-latency-ms", type=float, default=300.0)
+    parser.add_argument("--mock-tokens-per-sec", type=float, default=60.0)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
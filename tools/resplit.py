@@ -0,0 +1,46 @@
+"""
+청크 크기별 분할 결과 비교 (HWP 파싱 캐시 사용)
+
+HWP 파싱 결과는 hwp_cache에서 읽으므로 여러 청크 크기를 다시 파싱하지 않고 비교할 수 있다.
+
+사용 예:
+    python tools/resplit.py --chunk-sizes 300,500,800 --overlap 50
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings import HWP_DIR
+import ingest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="청크 크기별 분할 결과 비교")
+    parser.add_argument("--hwp-dir", default=HWP_DIR)
+    parser.add_argument("--chunk-sizes", default="300,500,800,1200")
+    parser.add_argument("--overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    docs, errors = ingest.load_hwp_documents(args.hwp_dir)
+    print(f"문서 {len(docs)}개 로드 ({time.perf_counter() - started:.2f}초)")
+    for message in errors:
+        print(f"    {message}")
+    if not docs:
+        return
+
+    print(f"{'크기':>6} {'조각 수':>8} {'평균 길이':>9} {'최대 길이':>9} {'분할 초':>8}")
+    for size in [int(value) for value in args.chunk_sizes.split(",")]:
+        started = time.perf_counter()
+        splits = ingest.split_documents(docs, chunk_size=size, chunk_overlap=min(args.overlap, size // 2))
+        elapsed = time.perf_counter() - started
+        lengths = [len(doc.page_content) for doc in splits] or [0]
+        print(f"{size:>6} {len(splits):>8} {statistics.mean(lengths):>9.0f} {max(lengths):>9} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()